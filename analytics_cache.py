@@ -0,0 +1,153 @@
+"""
+Result cache for derived analytics.
+
+Entries are keyed by the analytics name, a content fingerprint of the input
+panel, the model version and any extra parameters, so a cached result is
+reused for identical inputs and never for changed data or models. The
+in-memory cache is bounded with least-recently-used eviction; an optional
+directory persists entries across server restarts.
+
+One cache serves every session of a server process, and results are handed
+out without copying, so stored frames and series are made read-only (see
+fraud_data.read_only).
+"""
+
+import hashlib
+import os
+import pickle
+import tempfile
+import threading
+import weakref
+from collections import OrderedDict
+
+import pandas as pd
+
+from fraud_data import read_only
+from fraud_models import MODEL_VERSION
+from instrumentation import METRICS
+
+_fingerprints = {}
+
+def panel_fingerprint(panel):
+    """Content hash of a panel (values, index, columns and dtypes)
+
+    The hash is remembered for the lifetime of the panel object, so asking
+    again for the same object is a dictionary lookup. Panels are treated as
+    immutable; build a new frame instead of editing one in place.
+    """
+    key = id(panel)
+    fingerprint = _fingerprints.get(key)
+    if fingerprint is None:
+        digest = hashlib.sha256()
+        digest.update(pd.util.hash_pandas_object(panel, index=True).to_numpy().tobytes())
+        digest.update(repr(list(panel.columns)).encode())
+        digest.update(repr([str(dtype) for dtype in panel.dtypes]).encode())
+        fingerprint = digest.hexdigest()[:32]
+        _fingerprints[key] = fingerprint
+        weakref.finalize(panel, _fingerprints.pop, key, None)
+    return fingerprint
+
+class AnalyticsCache:
+    """Bounded LRU cache of analytics results with optional on-disk persistence"""
+
+    def __init__(self, max_entries=256, directory=None, max_disk_entries=4096):
+        self.max_entries = max_entries
+        self.directory = directory
+        self.max_disk_entries = max_disk_entries
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+    def key(self, name, panel, *params):
+        """Cache key for one analytics result"""
+        return f"{name}-{MODEL_VERSION}-{panel_fingerprint(panel)}-{hashlib.sha1(repr(params).encode()).hexdigest()[:12]}"
+
+    def get(self, name, panel, compute, *params):
+        """Cached ``compute(panel, *params)``, computing and storing it on a miss"""
+        key = self.key(name, panel, *params)
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                METRICS.count_cache(name, hit=True)
+                return self._entries[key]
+
+        value = self._load(key)
+        if value is None:
+            with METRICS.time(f"analytics.{name}", rows=len(panel)):
+                value = compute(panel, *params)
+            self._save(key, value)
+            with self._lock:
+                self.misses += 1
+            METRICS.count_cache(name, hit=False)
+        else:
+            with self._lock:
+                self.hits += 1
+            METRICS.count_cache(name, hit=True)
+        return self._remember(key, value)
+
+    def put(self, name, panel, value, *params, persist=True):
+        """Store a result computed elsewhere, e.g. by incremental recomputation
+
+        ``persist=False`` keeps it in memory only, for results already on disk elsewhere (a snapshot).
+        """
+        key = self.key(name, panel, *params)
+        if persist:
+            self._save(key, value)
+        self._remember(key, value)
+
+    def _remember(self, key, value):
+        value = read_only(value)
+        with self._lock:
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return value
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self):
+        return len(self._entries)
+
+    # Disk persistence
+
+    def _path(self, key):
+        return os.path.join(self.directory, f"{key}.pkl")
+
+    def _load(self, key):
+        if not self.directory:
+            return None
+        try:
+            with open(self._path(key), 'rb') as handle:
+                value = pickle.load(handle)
+        except (OSError, pickle.UnpicklingError, EOFError):
+            return None
+        os.utime(self._path(key))
+        return value
+
+    def _save(self, key, value):
+        if not self.directory:
+            return
+        # Write to a temporary file first so readers never see a partial entry
+        handle, temp_path = tempfile.mkstemp(dir=self.directory, suffix='.tmp')
+        with os.fdopen(handle, 'wb') as temp:
+            pickle.dump(value, temp, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(temp_path, self._path(key))
+        self._prune_disk()
+
+    def _prune_disk(self):
+        entries = [entry for entry in os.scandir(self.directory) if entry.name.endswith('.pkl')]
+        if len(entries) <= self.max_disk_entries:
+            return
+        entries.sort(key=lambda entry: entry.stat().st_mtime)
+        for entry in entries[:len(entries) - self.max_disk_entries]:
+            try:
+                os.remove(entry.path)
+            except OSError:
+                pass
@@ -0,0 +1,331 @@
+"""
+Static per-company fraud reports for a whole universe.
+
+Writes one HTML report per company with the dashboard's content: company
+banner, Z-Score and M-Score gauges for the latest year, scores and red
+flags by year, the Benford first-digit chart, the four ratio charts and the
+common-size and trend tables. Companies are split into shards that a
+process pool renders in parallel.
+
+The stylesheet and plotly.js are written once to ``assets/`` and linked
+from every report. A manifest records a fingerprint of each company's
+inputs (its panel rows, metadata, red-flag rules and model version), so a
+rerun only regenerates the reports whose inputs changed.
+
+Usage:
+    python batch_reports.py universe.parquet --metadata companies.csv --output reports --workers 8
+    python batch_reports.py --output reports --pdf     # built-in case studies, with PDFs
+"""
+
+import argparse
+import hashlib
+import html
+import json
+import re
+import shutil
+import subprocess
+import time
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import plotly.io as pio
+import plotly.offline
+
+from fraud_data import load_builtin_universe, read_fundamentals, read_company_metadata, write_atomic
+from fraud_models import (
+    MODEL_VERSION, ALTMAN_VARIANTS, assign_altman_variants, calculate_altman_variants,
+    calculate_beneish_components, calculate_financial_tables
+)
+from benford import BENFORD_FIELDS, benford_by_group
+from red_flags import DEFAULT_RULES, calculate_red_flags, flag_summary, load_rules, validate_rules
+from figures import RATIO_CHARTS, z_score_gauge, m_score_gauge, benford_chart, ratio_chart
+from batch_screen import shard_panel
+
+# Bump when the report layout changes, so every report is regenerated
+REPORT_VERSION = '3'
+MANIFEST = 'manifest.json'
+ASSETS = 'assets'
+# Browsers tried, in order, for --pdf
+PDF_BROWSERS = ['chromium', 'chromium-browser', 'google-chrome', 'google-chrome-stable', 'chrome']
+
+REPORT_CSS = """
+body { background: #0f172a; color: #f1f5f9; font-family: -apple-system, 'Segoe UI', Helvetica, Arial, sans-serif; margin: 0; }
+main { max-width: 1200px; margin: 0 auto; padding: 1rem 2rem 3rem; }
+h1 { text-align: center; padding: 1.5rem 0; border-bottom: 3px solid #3b82f6; }
+h2 { margin-top: 2.5rem; padding-bottom: 0.5rem; border-bottom: 2px solid #3b82f6; }
+a { color: #60a5fa; }
+.banner { background: linear-gradient(135deg, #1e293b 0%, #334155 100%); border-left: 5px solid #ef4444;
+          border-radius: 12px; padding: 2rem; margin: 2rem 0; }
+.banner h4 { color: #fbbf24; }
+.banner .meta { color: #94a3b8; }
+.banner .description { color: #cbd5e1; line-height: 1.7; }
+.gauges { display: grid; grid-template-columns: 1fr 1fr; gap: 1rem; }
+.flag { border-radius: 8px; padding: 0.6rem 1rem; margin: 0.4rem 0; }
+.flag.high, .flag.critical { background: rgba(239,68,68,0.2); border-left: 4px solid #ef4444; }
+.flag.low, .flag.medium { background: rgba(245,158,11,0.2); border-left: 4px solid #f59e0b; }
+.flag.none { background: rgba(16,185,129,0.2); border-left: 4px solid #10b981; }
+table.data { border-collapse: collapse; width: 100%; font-size: 0.9rem; margin: 1rem 0; }
+table.data th, table.data td { padding: 0.4rem 0.6rem; border-bottom: 1px solid #334155; text-align: right; }
+table.data th:first-child, table.data td:first-child { text-align: left; }
+footer { color: #94a3b8; text-align: center; margin-top: 3rem; font-size: 0.85rem; }
+@media print { body { background: #ffffff; color: #0f172a; } .banner { color: #f1f5f9; } }
+"""
+
+# =======================
+# FINGERPRINTS AND MANIFEST
+# =======================
+
+def report_filename(company):
+    """File name of a company's report: a readable slug plus a hash of the exact name"""
+    slug = re.sub(r'[^A-Za-z0-9]+', '_', company).strip('_') or 'company'
+    return f"{slug}-{hashlib.sha1(company.encode()).hexdigest()[:8]}.html"
+
+def company_fingerprints(panel, metadata, rules):
+    """Content hash of every company's report inputs"""
+    row_hashes = pd.util.hash_pandas_object(panel, index=True).to_numpy()
+    shared = json.dumps([REPORT_VERSION, MODEL_VERSION, list(panel.columns), rules], sort_keys=True).encode()
+    companies = panel.index.get_level_values('Company')
+    # Panels are sorted by company, so each company's rows are one slice
+    starts = np.flatnonzero(np.r_[True, companies[1:] != companies[:-1]])
+    stops = np.r_[starts[1:], len(panel)]
+    fingerprints = {}
+    for company, start, stop in zip(companies[starts], starts, stops):
+        digest = hashlib.sha256(shared)
+        digest.update(row_hashes[start:stop].tobytes())
+        info = metadata.loc[company].to_dict() if company in metadata.index else {}
+        digest.update(json.dumps(info, sort_keys=True, default=str).encode())
+        fingerprints[company] = digest.hexdigest()[:32]
+    return fingerprints
+
+def read_manifest(directory):
+    path = Path(directory) / MANIFEST
+    if not path.exists():
+        return {}
+    with open(path, encoding='utf-8') as handle:
+        return json.load(handle)
+
+def write_assets(directory):
+    """Write the shared stylesheet and plotly.js once, skipping files that are already current"""
+    assets = Path(directory) / ASSETS
+    assets.mkdir(parents=True, exist_ok=True)
+    for name, text in [('report.css', REPORT_CSS), ('plotly.min.js', plotly.offline.get_plotlyjs())]:
+        path = assets / name
+        if not path.exists() or path.read_text(encoding='utf-8') != text:
+            write_atomic(path, text)
+
+# =======================
+# REPORT SECTIONS
+# =======================
+
+def _figure(spec):
+    return pio.to_html(spec, full_html=False, include_plotlyjs=False, validate=False,
+                       config={'displayModeBar': False})
+
+def _table(frame, digits=2):
+    return frame.round(digits).to_html(classes='data', na_rep='–', border=0)
+
+def _banner(company, info):
+    info = {key: html.escape(str(info.get(key, ''))) for key in ['fraud', 'period', 'industry', 'currency', 'units', 'description']}
+    return f"""
+<div class="banner">
+  <h2>🏢 {html.escape(company)}</h2>
+  <h4>⚠️ {info['fraud']}</h4>
+  <p class="meta">📅 Period: {info['period']} &nbsp;·&nbsp; 🏭 {info['industry']} &nbsp;·&nbsp; 💱 {info['currency']} ({info['units']})</p>
+  <p class="description">{info['description']}</p>
+</div>"""
+
+def _red_flags(flags, rules):
+    labels = {rule['name']: rule for rule in rules}
+    parts = []
+    for year, row in flags.iterrows():
+        hits = [labels[name] for name in flags.columns if row[name]]
+        parts.append(f"<h3>{year}</h3>")
+        parts += [f'<div class="flag {rule["severity"]}">{html.escape(rule["label"])}</div>' for rule in hits]
+        if not hits:
+            parts.append('<div class="flag none">✅ No major red flags detected for this period.</div>')
+    return '\n'.join(parts)
+
+def render_report(company, info, tables, rules, variant='Z_Score'):
+    """Full HTML report for one company from its slices of the derived tables
+
+    The Altman gauge and score column use the company's assigned ``variant``.
+    """
+    altman, beneish, ratios = tables['altman'], tables['beneish'], tables['ratios']
+    latest = altman.index[-1]
+    z_column = f"{ALTMAN_VARIANTS[variant]['symbol']}-Score"
+    scores = pd.DataFrame({z_column: altman[variant], 'M_Score': beneish['M_Score']})
+    scores[['Red_Flag_Count', 'Max_Severity']] = flag_summary(tables['red_flags'], rules)
+    charts = ''.join(f"<section>{_figure(ratio_chart(ratios, chart))}</section>" for chart in RATIO_CHARTS)
+    body = f"""
+<h1>🔍 Financial Fraud Detection Report</h1>
+{_banner(company, info)}
+<h2>📊 Scores ({latest})</h2>
+<div class="gauges">
+  <div>{_figure(z_score_gauge(altman.loc[latest, variant], variant))}</div>
+  <div>{_figure(m_score_gauge(beneish.loc[latest, 'M_Score']))}</div>
+</div>
+{_table(scores, 3)}
+<h2>🚩 Red Flags</h2>
+{_red_flags(tables['red_flags'], rules)}
+<h2>🔢 Benford's Law</h2>
+{_figure(benford_chart(tables['benford_digits'], tables['benford_summary'], "First Digit"))}
+<h2>📊 Ratio Analysis</h2>
+{charts}
+<h2>📑 Common Size</h2>
+{_table(tables['common_size'])}
+<h2>📈 Trend</h2>
+{_table(tables['trend'])}
+<footer>Generated {time.strftime('%Y-%m-%d %H:%M')} · model version {MODEL_VERSION}</footer>"""
+    return _page(f"{company} — Fraud Report", body, charts=True)
+
+def _page(title, body, charts=False):
+    script = f'\n<script src="{ASSETS}/plotly.min.js"></script>' if charts else ''
+    return f"""<!DOCTYPE html>
+<html lang="en">
+<head>
+<meta charset="utf-8">
+<title>{html.escape(title)}</title>
+<link rel="stylesheet" href="{ASSETS}/report.css">{script}
+</head>
+<body><main>{body}
+</main></body>
+</html>
+"""
+
+def render_index(manifest):
+    """Index page linking every company's report"""
+    rows = ''.join(
+        f'<tr><td><a href="{entry["file"]}">{html.escape(company)}</a></td><td>{entry["generated"]}</td></tr>'
+        for company, entry in sorted(manifest.items())
+    )
+    body = f"""
+<h1>🔍 Financial Fraud Detection Reports</h1>
+<table class="data"><thead><tr><th>Company</th><th>Generated</th></tr></thead><tbody>{rows}</tbody></table>"""
+    return _page("Fraud Reports", body)
+
+# =======================
+# BATCH RENDERING
+# =======================
+
+def find_browser():
+    """Path of a headless-capable Chromium/Chrome for --pdf, or None"""
+    for name in PDF_BROWSERS:
+        path = shutil.which(name)
+        if path:
+            return path
+    return None
+
+def print_pdf(browser, html_path):
+    """Print a rendered report to PDF next to it with a headless browser"""
+    pdf_path = Path(html_path).with_suffix('.pdf')
+    subprocess.run([browser, '--headless', '--disable-gpu', '--virtual-time-budget=10000',
+                    f"--print-to-pdf={pdf_path}", Path(html_path).resolve().as_uri()],
+                   check=True, capture_output=True)
+    return pdf_path
+
+def render_shard(panel, metadata, rules, directory, browser=None):
+    """Compute the analytics for a shard of companies and write their reports"""
+    altman = calculate_altman_variants(panel)
+    beneish = calculate_beneish_components(panel)
+    tables = calculate_financial_tables(panel)
+    ratios = tables['ratios']
+    companies = panel.index.get_level_values('Company').unique()
+    variants = assign_altman_variants(metadata.reindex(companies), panel)
+    derived = {
+        'altman': altman,
+        'beneish': beneish,
+        'ratios': ratios,
+        'common_size': tables['common_size'],
+        'trend': tables['trend'],
+        'red_flags': calculate_red_flags(panel, rules, ratios, altman['Z_Score'], beneish, altman, variants),
+    }
+    benford_digits, benford_summary = benford_by_group(panel, BENFORD_FIELDS, by='Company')
+
+    written = []
+    for company in companies:
+        tables = {name: table.xs(company, level='Company') for name, table in derived.items()}
+        tables['benford_digits'] = benford_digits.xs(company, level='Company')
+        tables['benford_summary'] = benford_summary.loc[company]
+        info = metadata.loc[company].to_dict() if company in metadata.index else {}
+        path = Path(directory) / report_filename(company)
+        write_atomic(path, render_report(company, info, tables, rules, variants[company]))
+        if browser:
+            print_pdf(browser, path)
+        written.append(company)
+    return written
+
+def export_reports(panel, metadata, directory, rules=DEFAULT_RULES, workers=None, shard_companies=50,
+                   force=False, pdf=False):
+    """Write (or refresh) the reports of every company in a panel; returns the companies regenerated"""
+    rules = validate_rules(rules)
+    browser = find_browser() if pdf else None
+    if pdf and browser is None:
+        raise RuntimeError(f"PDF export needs a headless Chromium or Chrome on PATH (tried {', '.join(PDF_BROWSERS)})")
+    if not panel.index.is_monotonic_increasing:
+        panel = panel.sort_index()
+
+    directory = Path(directory)
+    directory.mkdir(parents=True, exist_ok=True)
+    write_assets(directory)
+    fingerprints = company_fingerprints(panel, metadata, rules)
+    manifest = {} if force else read_manifest(directory)
+
+    def current(company):
+        entry = manifest.get(company)
+        return (entry is not None and entry['fingerprint'] == fingerprints[company]
+                and (directory / entry['file']).exists()
+                and (not pdf or (directory / entry['file']).with_suffix('.pdf').exists()))
+
+    stale = [company for company in fingerprints if not current(company)]
+    if stale:
+        stale_panel = panel.loc[stale]
+        n_shards = max(1, int(np.ceil(len(stale) / shard_companies)))
+        if workers == 1 or n_shards == 1:
+            render_shard(stale_panel, metadata, rules, directory, browser)
+        else:
+            shards = shard_panel(stale_panel, n_shards)
+            with ProcessPoolExecutor(max_workers=workers) as pool:
+                n = len(shards)
+                list(pool.map(render_shard, shards, [metadata] * n, [rules] * n, [directory] * n, [browser] * n))
+
+    generated = time.strftime('%Y-%m-%d %H:%M')
+    for company in stale:
+        manifest[company] = {'file': report_filename(company), 'fingerprint': fingerprints[company],
+                             'generated': generated}
+    # Companies no longer in the universe keep their old report but leave the index
+    manifest = {company: manifest[company] for company in fingerprints}
+    write_atomic(directory / MANIFEST, json.dumps(manifest, indent=1, sort_keys=True))
+    write_atomic(directory / 'index.html', render_index(manifest))
+    return stale
+
+def main():
+    parser = argparse.ArgumentParser(description="Write a static fraud report for every company in a universe")
+    parser.add_argument('universe', nargs='?', help="fundamentals file (CSV or Parquet); built-in case studies if omitted")
+    parser.add_argument('--metadata', help="company metadata file (CSV or Parquet) for a universe file")
+    parser.add_argument('--output', '-o', default='reports', help="output directory")
+    parser.add_argument('--workers', type=int, default=None, help="worker processes (default: CPU count)")
+    parser.add_argument('--shard-companies', type=int, default=50, help="companies per worker task")
+    parser.add_argument('--rules', help="red-flag rule set (JSON); built-in rules if omitted")
+    parser.add_argument('--pdf', action='store_true', help="also print each report to PDF with headless Chromium/Chrome")
+    parser.add_argument('--force', action='store_true', help="regenerate every report, even if its inputs are unchanged")
+    args = parser.parse_args()
+    if args.pdf and find_browser() is None:
+        parser.error(f"--pdf needs a headless Chromium or Chrome on PATH (tried {', '.join(PDF_BROWSERS)})")
+
+    start = time.perf_counter()
+    if args.universe:
+        panel, metadata = read_fundamentals(args.universe), read_company_metadata(args.universe, args.metadata)
+    else:
+        panel, metadata = load_builtin_universe()
+    rules = load_rules(args.rules) if args.rules else DEFAULT_RULES
+    regenerated = export_reports(panel, metadata, args.output, rules, args.workers, args.shard_companies,
+                                 args.force, args.pdf)
+    elapsed = time.perf_counter() - start
+
+    n_companies = panel.index.get_level_values('Company').nunique()
+    print(f"Regenerated {len(regenerated)} of {n_companies} reports in {elapsed:.1f}s -> {args.output}/index.html")
+
+if __name__ == '__main__':
+    main()
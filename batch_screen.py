@@ -0,0 +1,146 @@
+"""
+Headless batch screening of a whole universe.
+
+Scores every company-year with the dashboard's models (Altman Z-Score,
+Beneish M-Score, Benford first-digit test, red flags) and writes a ranked
+risk table. Companies are split into shards that a process pool scores in
+parallel.
+
+Usage:
+    python batch_screen.py universe.parquet --output risk_table.parquet --workers 8
+    python batch_screen.py --output risk_table.csv      # built-in case studies
+    python batch_screen.py quarterly.parquet --quarterly  # trailing-twelve-month scores per quarter
+"""
+
+import argparse
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import pandas as pd
+import numpy as np
+
+from fraud_data import load_builtin_universe, read_fundamentals, read_company_metadata, compact_panel
+from fraud_models import (
+    calculate_altman_variants, altman_zone, assign_altman_variants, assigned_altman_scores,
+    calculate_beneish_m_score, calculate_all_ratios
+)
+from benford import BENFORD_FIELDS, benford_by_group
+from red_flags import DEFAULT_RULES, calculate_red_flags, flag_summary, load_rules
+from sensitivity import DEFAULT_PERTURBATIONS, load_perturbations, score_sensitivity
+from periods import ttm_panel
+
+# Beneish threshold above which a company-year is a likely manipulator
+M_SCORE_THRESHOLD = -1.78
+
+def screen_panel(panel, rules=DEFAULT_RULES, scenarios=0, perturbations=DEFAULT_PERTURBATIONS, variants=None):
+    """Risk table for every company-year of a panel
+
+    With ``variants`` (each company's Altman variant, from
+    assign_altman_variants), adds the assigned variant's score and zone.
+    With ``scenarios``, adds the Monte Carlo probabilities of the Z-Score
+    being in distress and the M-Score above the manipulation threshold.
+    """
+    altman = calculate_altman_variants(panel)
+    z_scores = altman['Z_Score']
+    ratios = calculate_all_ratios(panel)
+    flags = calculate_red_flags(panel, rules, ratios, z_scores, altman=altman, variants=variants)
+    _, benford = benford_by_group(panel, BENFORD_FIELDS, by='Company')
+
+    table = pd.DataFrame(index=panel.index)
+    table['Z_Score'] = z_scores
+    table['Z_Zone'] = altman_zone(z_scores)
+    if variants is not None:
+        table[['Altman_Variant', 'Altman_Score', 'Altman_Zone']] = assigned_altman_scores(altman, variants)
+    table['M_Score'] = calculate_beneish_m_score(panel)
+    table['Likely_Manipulator'] = table['M_Score'] > M_SCORE_THRESHOLD
+    companies = panel.index.get_level_values('Company')
+    table['Benford_Chi_Square'] = benford['Chi_Square'].reindex(companies).to_numpy()
+    table['Benford_Compliant'] = benford['Compliant'].reindex(companies).to_numpy()
+    table[['Red_Flag_Count', 'Max_Severity']] = flag_summary(flags, rules)
+    table['Red_Flags'] = [', '.join(name for name, hit in zip(flags.columns, row) if hit) for row in flags.to_numpy()]
+    if scenarios:
+        sensitivity = score_sensitivity(panel, perturbations, scenarios)
+        table[['P_Z_Distress', 'P_M_Manipulator']] = sensitivity[['P_Z_Distress', 'P_M_Manipulator']]
+    return table
+
+def rank_risk_table(table):
+    """Order company-years (or company-quarters) from highest to lowest risk and number them"""
+    periods = [level for level in table.index.names if level != 'Company']
+    ranked = table.reset_index().sort_values(
+        ['Red_Flag_Count', 'Likely_Manipulator', 'M_Score', 'Z_Score', 'Company'] + periods,
+        ascending=[False, False, False, True, True] + [True] * len(periods),
+        na_position='last',
+        kind='mergesort'
+    )
+    ranked.insert(0, 'Rank', np.arange(1, len(ranked) + 1))
+    return ranked.reset_index(drop=True)
+
+def shard_panel(panel, n_shards):
+    """Split a panel into ``n_shards`` sub-panels of whole companies"""
+    companies = panel.index.get_level_values('Company').unique()
+    return [panel.loc[list(shard)] for shard in np.array_split(companies, n_shards) if len(shard)]
+
+def screen_universe(panel, workers=None, shard_companies=250, rules=DEFAULT_RULES,
+                    scenarios=0, perturbations=DEFAULT_PERTURBATIONS, variants=None):
+    """Ranked risk table for a panel, scoring company shards in a process pool"""
+    n_companies = panel.index.get_level_values('Company').nunique()
+    n_shards = max(1, int(np.ceil(n_companies / shard_companies)))
+    if workers == 1 or n_shards == 1:
+        return rank_risk_table(screen_panel(panel, rules, scenarios, perturbations, variants))
+    shards = shard_panel(panel, n_shards)
+    n = len(shards)
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        tables = list(pool.map(screen_panel, shards, [rules] * n, [scenarios] * n, [perturbations] * n,
+                               [variants] * n))
+    return rank_risk_table(pd.concat(tables))
+
+def write_table(table, path):
+    if path.lower().endswith(('.parquet', '.pq')):
+        table.to_parquet(path, index=False)
+    else:
+        table.to_csv(path, index=False)
+
+def main():
+    parser = argparse.ArgumentParser(description="Score every company-year in a universe and write a ranked risk table")
+    parser.add_argument('universe', nargs='?', help="fundamentals file (CSV or Parquet); built-in case studies if omitted")
+    parser.add_argument('--output', '-o', default='risk_table.csv', help="output file, .parquet or .csv")
+    parser.add_argument('--workers', type=int, default=None, help="worker processes (default: CPU count)")
+    parser.add_argument('--shard-companies', type=int, default=250, help="companies per worker task")
+    parser.add_argument('--metadata', help="company metadata (CSV/Parquet) for choosing each company's Altman variant")
+    parser.add_argument('--rules', help="red-flag rule set (JSON); built-in rules if omitted")
+    parser.add_argument('--compact', action='store_true', help="hold the universe in compact storage (float32, int16 years)")
+    parser.add_argument('--quarterly', action='store_true',
+                        help="the universe has a Quarter column; score trailing-twelve-month figures per quarter")
+    parser.add_argument('--scenarios', type=int, default=0,
+                        help="Monte Carlo scenarios per company-year for threshold-crossing probabilities (default: off)")
+    parser.add_argument('--perturbations', help="Monte Carlo perturbation set (JSON); built-in set if omitted")
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    if (args.quarterly or args.metadata) and not args.universe:
+        parser.error("--quarterly and --metadata need a universe file")
+    metadata = None
+    if args.quarterly:
+        panel = ttm_panel(read_fundamentals(args.universe, quarterly=True))
+    elif args.universe:
+        panel = read_fundamentals(args.universe)
+    else:
+        panel, metadata = load_builtin_universe()
+    if args.metadata:
+        metadata = read_company_metadata(args.universe, args.metadata)
+    variants = None if metadata is None else assign_altman_variants(metadata, panel)
+    if args.compact:
+        panel = compact_panel(panel)
+    rules = load_rules(args.rules) if args.rules else DEFAULT_RULES
+    perturbations = load_perturbations(args.perturbations) if args.perturbations else DEFAULT_PERTURBATIONS
+    table = screen_universe(panel, args.workers, args.shard_companies, rules, args.scenarios, perturbations,
+                            variants)
+    write_table(table, args.output)
+    elapsed = time.perf_counter() - start
+
+    n_companies = table['Company'].nunique()
+    print(f"Scored {len(table)} company-years for {n_companies} companies in {elapsed:.1f}s -> {args.output}")
+    print(table.head(10).to_string(index=False))
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,215 @@
+"""
+Benchmarks for the fraud analytics models.
+
+Times each model function on synthetic panels of increasing size, reports
+throughput (rows per second) and peak memory, and saves the results as
+JSON. Comparing against a saved baseline exits with status 1 when any
+function got slower than the allowed tolerance.
+
+Usage:
+    python benchmark.py                                  # 10 .. 1,000,000 rows
+    python benchmark.py --sizes 1000 100000 --output benchmark_results/latest.json
+    python benchmark.py --baseline benchmark_results/baseline.json --tolerance 0.25
+    python benchmark.py --sizes 1000000 --compact --memory    # compact storage and its memory budget
+    python benchmark.py --startup --snapshot fraud_snapshot   # dashboard cold start in fresh processes
+"""
+
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+import tracemalloc
+from datetime import datetime, timezone
+
+import numpy as np
+import pandas as pd
+
+from fraud_data import compact_panel, memory_budget
+from fraud_models import (
+    MODEL_VERSION, calculate_altman_z_score, calculate_beneish_components, calculate_beneish_m_score,
+    calculate_all_ratios, calculate_common_size, calculate_trend, calculate_financial_tables
+)
+from benford import BENFORD_FIELDS, benfords_law_analysis
+from synthetic_data import synthetic_panel
+
+DEFAULT_SIZES = [10, 100, 1_000, 10_000, 100_000, 1_000_000]
+DASHBOARD = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'streamlit_fraud_dashboard (02).py')
+STARTUP_PHASES = ['startup.streamlit_import', 'startup.imports', 'startup.first_render']
+
+# Run in a fresh interpreter: import Streamlit, then render the dashboard once headless
+_STARTUP_SCRIPT = """
+import json, logging, sys, time
+started = time.perf_counter()
+from streamlit.testing.v1 import AppTest
+imported = time.perf_counter()
+logging.disable(logging.WARNING)
+app = AppTest.from_file(sys.argv[1], default_timeout=600)
+app.run()
+if app.exception:
+    sys.exit(app.exception[0].value)
+from instrumentation import METRICS
+timings = (METRICS.phases()['Mean_ms'] / 1e3).to_dict()
+timings['startup.streamlit_import'] = imported - started
+print(json.dumps(timings))
+"""
+
+def _benford(panel):
+    return benfords_law_analysis(panel[BENFORD_FIELDS].to_numpy().ravel())
+
+BENCHMARKS = {
+    'calculate_altman_z_score': calculate_altman_z_score,
+    'calculate_beneish_m_score': calculate_beneish_m_score,
+    'benfords_law_analysis': _benford,
+    'calculate_all_ratios': calculate_all_ratios,
+    'calculate_common_size': calculate_common_size,
+    'calculate_trend': calculate_trend,
+    'calculate_financial_tables': calculate_financial_tables,
+}
+
+def time_function(function, panel, min_time=0.2, max_repeats=50):
+    """Best and median wall time of ``function(panel)`` over repeated runs"""
+    function(panel)
+    timings = []
+    started = time.perf_counter()
+    while len(timings) < max_repeats and (len(timings) < 3 or time.perf_counter() - started < min_time):
+        start = time.perf_counter()
+        function(panel)
+        timings.append(time.perf_counter() - start)
+    return min(timings), float(np.median(timings))
+
+def peak_memory(function, panel):
+    """Peak bytes allocated while running ``function(panel)`` once"""
+    tracemalloc.start()
+    try:
+        function(panel)
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+def panel_memory_budget(panel):
+    """Memory budget of a panel and every derived table"""
+    return memory_budget({
+        'panel': panel,
+        'altman': calculate_altman_z_score(panel),
+        'beneish': calculate_beneish_components(panel),
+        'ratios': calculate_all_ratios(panel),
+        'common_size': calculate_common_size(panel),
+        'trend': calculate_trend(panel),
+    })
+
+def run_benchmarks(sizes=DEFAULT_SIZES, names=None, seed=0, compact=False, memory=False):
+    """Benchmark results as a list of dicts, one per (function, size)"""
+    results = []
+    for size in sizes:
+        panel = synthetic_panel(size, seed=seed)
+        if compact:
+            panel = compact_panel(panel)
+        if memory:
+            print(f"Memory budget at {size:,d} rows:\n{panel_memory_budget(panel).to_string(float_format='{:,.1f}'.format)}",
+                  flush=True)
+        for name, function in BENCHMARKS.items():
+            if names and name not in names:
+                continue
+            best, median = time_function(function, panel)
+            results.append({
+                'function': name,
+                'rows': size,
+                'best_seconds': best,
+                'median_seconds': median,
+                'rows_per_second': size / best if best > 0 else float('inf'),
+                'peak_memory_bytes': peak_memory(function, panel),
+            })
+            print(f"{name:28s} {size:>9,d} rows  {best * 1e3:10.3f} ms  "
+                  f"{results[-1]['rows_per_second']:14,.0f} rows/s  {results[-1]['peak_memory_bytes'] / 2**20:8.1f} MiB",
+                  flush=True)
+    return results
+
+def startup_timings(snapshot=None):
+    """Seconds per startup phase of one cold dashboard run in a new process"""
+    env = dict(os.environ)
+    if snapshot:
+        env['FRAUD_SNAPSHOT_PATH'] = snapshot
+    completed = subprocess.run([sys.executable, '-c', _STARTUP_SCRIPT, DASHBOARD], env=env, check=True,
+                               cwd=os.path.dirname(DASHBOARD), capture_output=True, text=True)
+    timings = json.loads(completed.stdout.strip().splitlines()[-1])
+    return {phase: timings[phase] for phase in STARTUP_PHASES}
+
+def run_startup_benchmark(repeats=5, snapshot=None):
+    """Dashboard cold-start results in the run_benchmarks format (rows=0), best and median of ``repeats``"""
+    runs = [startup_timings(snapshot) for _ in range(repeats)]
+    results = []
+    for phase in STARTUP_PHASES:
+        seconds = [run[phase] for run in runs]
+        results.append({
+            'function': phase,
+            'rows': 0,
+            'best_seconds': min(seconds),
+            'median_seconds': float(np.median(seconds)),
+        })
+        print(f"{phase:28s} {min(seconds) * 1e3:10.1f} ms best  {np.median(seconds) * 1e3:10.1f} ms median", flush=True)
+    return results
+
+def environment(compact=False):
+    return {
+        'timestamp': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+        'model_version': MODEL_VERSION,
+        'python': sys.version.split()[0],
+        'numpy': np.__version__,
+        'pandas': pd.__version__,
+        'platform': platform.platform(),
+        'cpu_count': os.cpu_count(),
+        'compact': compact,
+    }
+
+def compare(results, baseline, tolerance):
+    """(function, rows, slowdown) for results slower than the baseline by more than ``tolerance``"""
+    reference = {(row['function'], row['rows']): row['best_seconds'] for row in baseline['results']}
+    regressions = []
+    for row in results:
+        previous = reference.get((row['function'], row['rows']))
+        if previous and row['best_seconds'] > previous * (1 + tolerance):
+            regressions.append((row['function'], row['rows'], row['best_seconds'] / previous))
+    return regressions
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the fraud analytics models on synthetic panels")
+    parser.add_argument('--sizes', type=int, nargs='+', default=DEFAULT_SIZES, help="panel sizes in rows")
+    parser.add_argument('--functions', nargs='+', choices=list(BENCHMARKS), help="functions to run (default: all)")
+    parser.add_argument('--output', default='benchmark_results/latest.json', help="where to save the results")
+    parser.add_argument('--baseline', help="earlier results file to compare against")
+    parser.add_argument('--tolerance', type=float, default=0.25, help="allowed slowdown before failing (0.25 = 25%%)")
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--compact', action='store_true', help="benchmark panels in compact storage (float32, int16 years)")
+    parser.add_argument('--memory', action='store_true', help="print the memory budget of the panel and derived tables")
+    parser.add_argument('--startup', action='store_true', help="time the dashboard's cold start instead of the models")
+    parser.add_argument('--snapshot', help="with --startup: start from this snapshot directory (see snapshot.py)")
+    parser.add_argument('--repeats', type=int, default=5, help="with --startup: fresh processes to time")
+    args = parser.parse_args()
+    if args.snapshot and not args.startup:
+        parser.error("--snapshot needs --startup")
+
+    if args.startup:
+        results = run_startup_benchmark(args.repeats, args.snapshot)
+    else:
+        results = run_benchmarks(args.sizes, args.functions, args.seed, args.compact, args.memory)
+    report = {'environment': environment(args.compact), 'results': results}
+    os.makedirs(os.path.dirname(args.output) or '.', exist_ok=True)
+    with open(args.output, 'w') as handle:
+        json.dump(report, handle, indent=2)
+    print(f"Saved results to {args.output}")
+
+    if args.baseline:
+        with open(args.baseline) as handle:
+            baseline = json.load(handle)
+        regressions = compare(report['results'], baseline, args.tolerance)
+        for name, rows, slowdown in regressions:
+            print(f"REGRESSION {name} at {rows:,d} rows: {slowdown:.2f}x slower than baseline")
+        if regressions:
+            sys.exit(1)
+        print("No regressions against baseline")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,239 @@
+"""
+Benford's Law digit tests.
+
+Digits are extracted with NumPy arithmetic (log10 scaling and modulo), so a
+test over millions of amounts is a handful of array operations. Supported
+tests follow Nigrini's forensic analytics:
+
+- first:     first digit, 1-9
+- second:    second digit, 0-9
+- first_two: first two digits, 10-99
+- last_two:  last two digits of the integer part, 00-99
+
+Each test reports per-digit proportions with Z-statistics, the chi-square
+statistic and the mean absolute deviation (MAD) with its conformity level.
+Many groups (companies, account groups) are tested in one batched call.
+"""
+
+import pandas as pd
+import numpy as np
+
+# Line items tested by the dashboard
+BENFORD_FIELDS = ['Revenue', 'COGS', 'SGA', 'Total_Assets', 'Current_Assets',
+                  'Current_Liabilities', 'Total_Debt', 'Receivables']
+
+CONFORMITY_LEVELS = ['Close conformity', 'Acceptable conformity',
+                     'Marginally acceptable conformity', 'Nonconformity']
+
+def _first_two_expected():
+    digits = np.arange(10, 100)
+    return digits, np.log10(1 + 1 / digits)
+
+def _second_expected():
+    first_two, expected = _first_two_expected()
+    return np.arange(10), np.bincount(first_two % 10, weights=expected, minlength=10)
+
+# digits, expected proportions, MAD cut-offs (close/acceptable/marginal),
+# chi-square critical value at 5% significance
+BENFORD_TESTS = {
+    'first': {
+        'digits': np.arange(1, 10),
+        'expected': np.log10(1 + 1 / np.arange(1, 10)),
+        'mad': (0.006, 0.012, 0.015),
+        'critical': 15.507,
+    },
+    'second': {
+        'digits': _second_expected()[0],
+        'expected': _second_expected()[1],
+        'mad': (0.008, 0.010, 0.012),
+        'critical': 16.919,
+    },
+    'first_two': {
+        'digits': _first_two_expected()[0],
+        'expected': _first_two_expected()[1],
+        'mad': (0.0012, 0.0018, 0.0022),
+        'critical': 112.022,
+    },
+    # Nigrini gives no MAD table for the last-two test; its expected
+    # distribution is uniform over 100 bins like first_two, so reuse its cut-offs
+    'last_two': {
+        'digits': np.arange(100),
+        'expected': np.full(100, 0.01),
+        'mad': (0.0012, 0.0018, 0.0022),
+        'critical': 123.225,
+    },
+}
+
+# =======================
+# DIGIT EXTRACTION
+# =======================
+
+def _leading_two_integers(n):
+    """First two significant digits (10-99) of positive int64 values, in exact integer arithmetic"""
+    k = np.maximum(np.floor(np.log10(n)).astype(np.int64) - 1, 0)
+    # log10 can land on the wrong side of a power of ten
+    leading = n // 10 ** k
+    k = np.where(leading >= 100, k + 1, np.where((leading < 10) & (k > 0), k - 1, k))
+    leading = n // 10 ** k
+    return np.where(leading < 10, leading * 10, leading)
+
+def _leading_two(x):
+    """First two significant digits (10-99) of positive finite values"""
+    exponent = np.floor(np.log10(x)) - 1
+    # log10 can land on the wrong side of a power of ten
+    scaled = x / 10.0 ** exponent
+    exponent = exponent + (scaled >= 100) - (scaled < 10)
+    scaled = x / 10.0 ** exponent
+    # A few ulps of slack absorb floating-point noise such as 0.3 / 0.01 = 29.999...
+    mantissa = np.floor(scaled + 4 * np.spacing(scaled))
+    leading = np.where(mantissa >= 100, 10, mantissa).astype(np.int64)
+    # ...but a whole amount carries no noise: 999999999999999 starts with 99, not 10
+    exact = (mantissa > np.floor(scaled)) & (x == np.floor(x)) & (x < 2.0 ** 63)
+    leading[exact] = _leading_two_integers(x[exact].astype(np.int64))
+    return leading
+
+def digit_bins(values, test='first', min_value=1.0):
+    """Bin position of every value for a Benford test, -1 where the value is not tested
+
+    Only positive values of at least ``min_value`` are tested (the last-two
+    test additionally needs an integer part of at least 10). The default of
+    1.0 keeps amounts below one currency unit out of the first-digit test.
+    """
+    x = np.asarray(values, dtype=np.float64).ravel()
+    bins = np.full(x.shape, -1, dtype=np.int64)
+    valid = np.isfinite(x) & (x >= max(min_value, np.finfo(np.float64).tiny))
+    if test == 'last_two':
+        valid &= x >= 10
+        bins[valid] = np.floor(x[valid]).astype(np.int64) % 100
+        return bins
+
+    first_two = _leading_two(x[valid])
+    if test == 'first':
+        bins[valid] = first_two // 10 - 1
+    elif test == 'second':
+        bins[valid] = first_two % 10
+    elif test == 'first_two':
+        bins[valid] = first_two - 10
+    else:
+        raise ValueError(f"Unknown Benford test: {test}")
+    return bins
+
+def digit_counts(values, test='first', groups=None, n_groups=None, min_value=1.0):
+    """Digit histogram per group as an (n_groups, n_digits) integer array
+
+    ``groups`` holds an integer group code (0..n_groups-1) per value; without
+    it all values form a single group. Histograms are additive, so counts
+    of separate batches can simply be summed.
+    """
+    n_digits = len(BENFORD_TESTS[test]['digits'])
+    bins = digit_bins(values, test, min_value)
+    if groups is None:
+        codes = np.zeros(bins.shape, dtype=np.int64)
+        n_groups = 1
+    else:
+        codes = np.asarray(groups, dtype=np.int64).ravel()
+        if n_groups is None:
+            n_groups = int(codes.max()) + 1 if codes.size else 0
+    tested = bins >= 0
+    flat = codes[tested] * n_digits + bins[tested]
+    return np.bincount(flat, minlength=n_groups * n_digits).reshape(n_groups, n_digits)
+
+# =======================
+# TEST STATISTICS
+# =======================
+
+def conformity_level(mad, test='first'):
+    """Nigrini conformity label for MAD value(s)"""
+    levels = np.searchsorted(np.array(BENFORD_TESTS[test]['mad']), np.asarray(mad), side='right')
+    return np.array(CONFORMITY_LEVELS, dtype=object)[levels]
+
+def benford_statistics(counts, test='first', labels=None):
+    """Per-digit and per-group Benford statistics from a digit-count matrix
+
+    ``counts`` is the (n_groups, n_digits) array from digit_counts (a single
+    histogram is also accepted). Returns ``(digits, summary)``: ``digits`` is
+    indexed by (group, Digit) with Count, Actual, Expected and Z columns,
+    ``summary`` is indexed by group with N, Chi_Square, Critical, Compliant,
+    MAD and Conformity. Groups without tested values get NaN statistics.
+    """
+    spec = BENFORD_TESTS[test]
+    counts = np.atleast_2d(np.asarray(counts, dtype=np.float64))
+    n_groups, n_digits = counts.shape
+    labels = pd.RangeIndex(n_groups) if labels is None else pd.Index(labels)
+    if labels.name is None:
+        labels = labels.rename('Group')
+    expected = spec['expected']
+
+    n = counts.sum(axis=1, keepdims=True)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        actual = counts / n
+        deviation = np.abs(actual - expected)
+        # Continuity correction, applied only when smaller than the deviation
+        correction = 1 / (2 * n)
+        z = np.where(correction < deviation, deviation - correction, deviation) / np.sqrt(expected * (1 - expected) / n)
+        chi_square = (n * (actual - expected) ** 2 / expected).sum(axis=1)
+    mad = deviation.mean(axis=1)
+    has_data = n[:, 0] > 0
+    chi_square[~has_data] = np.nan
+
+    digits = pd.DataFrame({
+        'Count': counts.ravel().astype(np.int64),
+        'Actual': actual.ravel(),
+        'Expected': np.tile(expected, n_groups),
+        'Z': z.ravel(),
+    }, index=pd.MultiIndex.from_product([labels, spec['digits']], names=[labels.name, 'Digit']))
+
+    summary = pd.DataFrame({
+        'N': n[:, 0].astype(np.int64),
+        'Chi_Square': chi_square,
+        'Critical': spec['critical'],
+        'Compliant': has_data & (chi_square < spec['critical']),
+        'MAD': mad,
+        'Conformity': np.where(has_data, conformity_level(mad, test), None),
+    }, index=labels)
+    return digits, summary
+
+def benford_test(values, test='first', min_value=1.0):
+    """Run one Benford test over a flat collection of values"""
+    return benford_statistics(digit_counts(values, test, min_value=min_value), test)
+
+def benford_by_group(panel, columns=BENFORD_FIELDS, by='Company', test='first', min_value=1.0):
+    """Run a Benford test for every company (or every line item) of a panel in one batched call
+
+    ``by`` is an index level of the panel (e.g. 'Company') to test each of
+    its values separately, or 'Account' to test each line item in
+    ``columns`` across the whole panel.
+    """
+    values = panel[columns].to_numpy()
+    n_rows, n_columns = values.shape
+    if by == 'Account':
+        labels = pd.Index(columns, name='Account')
+        groups = np.tile(np.arange(n_columns), n_rows)
+    else:
+        codes, uniques = pd.factorize(panel.index.get_level_values(by))
+        labels = pd.Index(uniques, name=by)
+        groups = np.repeat(codes, n_columns)
+    counts = digit_counts(values, test, groups=groups, n_groups=len(labels), min_value=min_value)
+    return benford_statistics(counts, test, labels)
+
+def benford_distributions(counts, test='first'):
+    """Chart inputs from one digit histogram
+
+    Returns the actual and expected digit distributions (in percent), the
+    chi-square statistic computed on digit counts, whether it is below the
+    5% critical value for the test, and the full summary row.
+    """
+    digits, summary = benford_statistics(counts, test)
+    index = BENFORD_TESTS[test]['digits']
+    actual_dist = pd.Series(digits['Actual'].fillna(0).to_numpy() * 100, index=index)
+    expected_dist = pd.Series(digits['Expected'].to_numpy() * 100, index=index)
+    summary = summary.iloc[0]
+    return actual_dist, expected_dist, summary['Chi_Square'], bool(summary['Compliant']), summary
+
+def benfords_law_analysis(financial_values, test='first'):
+    """Benford's Law analysis for fraud detection
+
+    Returns the actual and expected digit distributions (in percent), the
+    chi-square statistic and whether the values comply with Benford's Law.
+    """
+    return benford_distributions(digit_counts(financial_values, test), test)[:4]
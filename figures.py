@@ -0,0 +1,326 @@
+"""
+Figure factory for the dashboard's charts.
+
+Every chart is built from a shared layout template (gauges or line/bar
+charts), so the styling lives in one place. Builders return the plotly
+figure dict. A FigureCache keeps the go.Figure made from it per (company,
+chart, data fingerprint): a repeat view of the same company and data skips
+building and validating the figure. st.plotly_chart still converts the
+figure to a dict and encodes it to JSON on every run.
+"""
+
+import functools
+import threading
+import warnings
+from collections import OrderedDict
+
+import numpy as np
+import plotly.graph_objects as go
+import plotly.io as pio
+
+from fraud_models import ALTMAN_VARIANTS
+from instrumentation import METRICS
+
+# Plotly templates for gauges and charts
+GAUGE_TEMPLATE = 'plotly'
+CHART_TEMPLATE = 'plotly_dark'
+
+# Shared layout templates
+GAUGE_LAYOUT = dict(
+    height=300,
+    paper_bgcolor='rgba(0,0,0,0)',
+    font={'color': '#f1f5f9'},
+    xaxis=dict(type='category')
+)
+CHART_LAYOUT = dict(
+    height=400,
+    paper_bgcolor='rgba(0,0,0,0)',
+    plot_bgcolor='rgba(15,23,42,0.8)',
+    xaxis=dict(type='category')
+)
+
+# Upper end of the Altman gauges (default 5); the EM-Score runs 3.25 higher
+ALTMAN_GAUGE_MAX = {'EM_Score': 8}
+
+SAFE_COLOR = '#10b981'
+WARNING_COLOR = '#f59e0b'
+DANGER_COLOR = '#ef4444'
+
+# Ratio line charts: series (column, legend name, colour) and
+# reference lines (y, dash, colour, label, label above or below the line)
+RATIO_CHARTS = {
+    'profitability': {
+        'title': "Profitability Ratios",
+        'series': [('Gross_Margin', 'Gross Margin %', '#10b981'),
+                   ('Net_Profit_Margin', 'Net Profit Margin %', '#3b82f6'),
+                   ('ROA', 'ROA %', '#f59e0b')],
+        'lines': [(5, "dot", "orange", "Low Profit Warning (5%)", 'top'),
+                  (0, "dot", "red", "Negative Return Zone", 'bottom')]
+    },
+    'liquidity': {
+        'title': "Liquidity Ratios",
+        'series': [('Current_Ratio', 'Current Ratio', '#8b5cf6'),
+                   ('Quick_Ratio', 'Quick Ratio', '#ec4899')],
+        'lines': [(1.0, "dash", "red", "Minimum Safe Level", 'top')]
+    },
+    'leverage': {
+        'title': "Leverage Ratios",
+        'series': [('Debt_to_Equity', 'Debt to Equity', '#ef4444'),
+                   ('Debt_Ratio', 'Debt Ratio %', '#f59e0b')],
+        'lines': [(2.0, "dot", "red", "High Leverage Threshold (2.0)", 'top')]
+    },
+    'efficiency': {
+        'title': "Efficiency Ratios",
+        'series': [('Asset_Turnover', 'Asset Turnover', '#06b6d4'),
+                   ('Receivables_Turnover', 'Receivables Turnover', '#22c55e'),
+                   ('Days_Sales_Outstanding', 'DSO (Days)', '#f59e0b')],
+        'lines': []
+    },
+}
+
+# Cross-company overlays: metric title and reference lines as in RATIO_CHARTS
+OVERLAY_METRICS = {
+    'Debt_to_Equity': {'title': "Debt to Equity",
+                       'lines': [(2.0, "dot", "red", "High Leverage Threshold (2.0)", 'top')]},
+    'Days_Sales_Outstanding': {'title': "Days Sales Outstanding", 'lines': []},
+    'Z_Score': {'title': "Altman Z-Score", 'lines': [(1.81, "dash", "red", "Distress (1.81)", 'bottom')]},
+    'M_Score': {'title': "Beneish M-Score", 'lines': [(-1.78, "dash", "red", "Manipulation Threshold (-1.78)", 'top')]},
+}
+# Above this many companies an overlay draws the peer median and
+# inter-quartile band instead of one line per company
+OVERLAY_MAX_SERIES = 200
+# Periods kept per series; longer histories are thinned evenly
+OVERLAY_MAX_POINTS = 120
+HIGHLIGHT_COLOR = '#f59e0b'
+PEER_COLOR = '#3b82f6'
+
+# =======================
+# CHART BUILDERS
+# =======================
+# Builders return plotly figure dicts. The figure is validated without its
+# template, which is then attached as a shared pre-serialized dict: copying
+# and validating a template is most of the cost of building a small figure.
+
+@functools.lru_cache(maxsize=None)
+def _template(name):
+    return pio.templates[name].to_plotly_json()
+
+def _spec(data, layout, template):
+    spec = go.Figure(data, layout={**layout, 'template': {}}).to_dict()
+    spec['layout']['template'] = _template(template)
+    return spec
+
+def _reference_line(y, dash, color, text, position):
+    """Horizontal line across the plot with a label at its right end"""
+    shape = {'type': 'line', 'xref': 'x domain', 'x0': 0, 'x1': 1, 'yref': 'y', 'y0': y, 'y1': y,
+             'line': {'color': color, 'dash': dash}}
+    annotation = {'text': text, 'showarrow': False, 'xref': 'x domain', 'x': 1, 'xanchor': 'right',
+                  'yref': 'y', 'y': y, 'yanchor': 'bottom' if position == 'top' else 'top'}
+    return shape, annotation
+
+def _gauge(value, title, risk, color, axis_range, steps, threshold):
+    indicator = go.Indicator(
+        mode="gauge+number",
+        value=value,
+        title={'text': f"{title}<br><span style='font-size:0.8em;color:{color}'>{risk} Risk</span>"},
+        gauge={
+            'axis': {'range': axis_range},
+            'bar': {'color': color},
+            'steps': steps,
+            'threshold': {
+                'line': {'color': "red", 'width': 4},
+                'thickness': 0.75,
+                'value': threshold
+            }
+        }
+    )
+    return _spec([indicator], GAUGE_LAYOUT, GAUGE_TEMPLATE)
+
+def z_score_gauge(z_score, variant='Z_Score'):
+    """Altman gauge for one of the ALTMAN_VARIANTS with its distress, grey and safe zones"""
+    spec = ALTMAN_VARIANTS[variant]
+    distress, safe = spec['zones']
+    if z_score > safe:
+        risk, color = "Low", SAFE_COLOR
+    elif z_score > distress:
+        risk, color = "Medium", WARNING_COLOR
+    else:
+        risk, color = "High", DANGER_COLOR
+    top = ALTMAN_GAUGE_MAX.get(variant, 5)
+    steps = [
+        {'range': [0, distress], 'color': '#fee2e2'},
+        {'range': [distress, safe], 'color': '#fef3c7'},
+        {'range': [safe, top], 'color': '#d1fae5'}
+    ]
+    return _gauge(z_score, f"Altman {spec['symbol']}-Score", risk, color, [None, top], steps, distress)
+
+def m_score_gauge(m_score):
+    """Beneish M-Score gauge with the manipulation threshold"""
+    risk, color = ("High", DANGER_COLOR) if m_score > -1.78 else ("Low", SAFE_COLOR)
+    steps = [
+        {'range': [-5, -2.22], 'color': '#d1fae5'},
+        {'range': [-2.22, -1.78], 'color': '#fef3c7'},
+        {'range': [-1.78, 0], 'color': '#fee2e2'}
+    ]
+    return _gauge(m_score, "Beneish M-Score", risk, color, [-5, 0], steps, -1.78)
+
+def benford_chart(digit_stats, summary, digit_label):
+    """Expected against actual digit frequencies, titled with the test verdict"""
+    digits = digit_stats.index.tolist()
+    bars = [
+        go.Bar(
+            x=digits,
+            y=(digit_stats['Expected'] * 100).values,
+            name='Expected (Benford)',
+            marker_color='#3b82f6',
+            opacity=0.85
+        ),
+        go.Bar(
+            x=digits,
+            y=(digit_stats['Actual'].fillna(0) * 100).values,
+            name='Actual',
+            marker_color='#10b981',
+            opacity=0.85
+        )
+    ]
+    compliance_text = "✓ COMPLIANT" if summary['Compliant'] else "✗ NON-COMPLIANT"
+    compliance_color = SAFE_COLOR if summary['Compliant'] else DANGER_COLOR
+    layout = dict(
+        CHART_LAYOUT,
+        title=f"Benford's Law Analysis - χ² = {summary['Chi_Square']:.2f} - <span style='color:{compliance_color}'>{compliance_text}</span> - MAD {summary['MAD']:.4f} ({summary['Conformity']})",
+        xaxis=dict(CHART_LAYOUT['xaxis'], title=digit_label),
+        yaxis_title="Frequency (%)",
+        barmode='group'
+    )
+    return _spec(bars, layout, CHART_TEMPLATE)
+
+def ratio_chart(ratios, chart):
+    """One of the RATIO_CHARTS over a company's years"""
+    spec = RATIO_CHARTS[chart]
+    lines = [go.Scatter(x=ratios.index, y=ratios[column],
+                        mode='lines+markers+text', name=name,
+                        line=dict(color=color, width=3))
+             for column, name, color in spec['series']]
+    references = [_reference_line(*line) for line in spec['lines']]
+    layout = dict(CHART_LAYOUT, title=spec['title'])
+    if references:
+        layout['shapes'], layout['annotations'] = map(list, zip(*references))
+    return _spec(lines, layout, CHART_TEMPLATE)
+
+def score_histogram(counts, edges, threshold, title, color):
+    """Distribution of simulated scores (share of scenarios per bin) with the model threshold"""
+    bars = [go.Bar(x=(edges[:-1] + edges[1:]) / 2, y=counts, width=np.diff(edges),
+                   marker_color=color, opacity=0.85, name=title)]
+    threshold_line = {'type': 'line', 'xref': 'x', 'x0': threshold, 'x1': threshold,
+                      'yref': 'y domain', 'y0': 0, 'y1': 1, 'line': {'color': 'red', 'dash': 'dash'}}
+    layout = dict(CHART_LAYOUT, height=300, title=title, xaxis={}, yaxis_title="Scenarios (%)",
+                  bargap=0, shapes=[threshold_line])
+    return _spec(bars, layout, CHART_TEMPLATE)
+
+def metric_block(values):
+    """Companies, periods and the (companies x periods) block of a (Company, Year)-indexed Series"""
+    index = values.index.remove_unused_levels()
+    companies, periods = index.levels[0], index.levels[1]
+    block = np.full((len(companies), len(periods)), np.nan)
+    block[index.codes[0], index.codes[1]] = values.to_numpy(dtype=np.float64)
+    return companies, periods, block
+
+def downsample_periods(n_periods, max_points):
+    """Positions of at most ``max_points`` evenly spaced periods, always keeping the first and last"""
+    if n_periods <= max_points:
+        return np.arange(n_periods)
+    return np.unique(np.linspace(0, n_periods - 1, max_points).round().astype(np.int64))
+
+def overlay_chart(values, metric, highlight=None, max_series=OVERLAY_MAX_SERIES, max_points=OVERLAY_MAX_POINTS):
+    """One metric's trajectories across many companies, drawn with WebGL
+
+    Up to ``max_series`` companies are drawn as one line each, packed into a
+    single trace with gaps between companies. Beyond that, the chart shows
+    the peers' median and inter-quartile band per period instead. The
+    ``highlight`` company is always drawn on top.
+    """
+    companies, periods, block = metric_block(values)
+    keep = downsample_periods(len(periods), max_points)
+    periods, block = np.asarray(periods)[keep], block[:, keep]
+    block[~np.isfinite(block)] = np.nan
+
+    if len(companies) <= max_series:
+        # A NaN column after each company breaks the line between companies
+        gap = np.full((len(companies), 1), np.nan)
+        traces = [go.Scattergl(
+            x=np.tile(np.r_[periods.astype(np.float64), np.nan], len(companies)),
+            y=np.hstack([block, gap]).ravel(),
+            text=np.repeat(np.asarray(companies, dtype=object), len(periods) + 1),
+            mode='lines', name=f"Companies ({len(companies)})",
+            line=dict(color='rgba(148,163,184,0.45)', width=1),
+            hovertemplate="%{text}<br>%{x}: %{y:.2f}<extra></extra>"
+        )]
+        subtitle = f"{len(companies)} companies"
+    else:
+        with warnings.catch_warnings():
+            warnings.simplefilter('ignore', RuntimeWarning)  # periods no company reports
+            lower, median, upper = np.nanpercentile(block, [25, 50, 75], axis=0)
+        traces = [
+            go.Scattergl(x=periods, y=upper, mode='lines', line=dict(width=0), showlegend=False, hoverinfo='skip'),
+            go.Scattergl(x=periods, y=lower, mode='lines', line=dict(width=0), fill='tonexty',
+                         fillcolor='rgba(59,130,246,0.25)', name="Inter-quartile range",
+                         hovertemplate="%{x}: %{y:.2f} (25th percentile)<extra></extra>"),
+            go.Scattergl(x=periods, y=median, mode='lines+markers', name="Peer median",
+                         line=dict(color=PEER_COLOR, width=2)),
+        ]
+        subtitle = f"median and inter-quartile range of {len(companies)} companies"
+
+    if highlight is not None and highlight in companies:
+        traces.append(go.Scattergl(x=periods, y=block[companies.get_loc(highlight)], mode='lines+markers',
+                                   name=str(highlight), line=dict(color=HIGHLIGHT_COLOR, width=3)))
+
+    spec = OVERLAY_METRICS.get(metric, {'title': metric, 'lines': []})
+    layout = dict(CHART_LAYOUT, title=f"{spec['title']} - {subtitle}", hovermode='closest')
+    references = [_reference_line(*line) for line in spec['lines']]
+    if references:
+        layout['shapes'], layout['annotations'] = map(list, zip(*references))
+    return _spec(traces, layout, CHART_TEMPLATE)
+
+# =======================
+# FIGURE CACHE
+# =======================
+
+class FigureCache:
+    """Bounded LRU cache of built figures keyed by (company, chart, data fingerprint)
+
+    A miss runs the builder and validates its dict into a go.Figure once. A
+    hit returns that same Figure, so the builder and plotly's validation are
+    skipped. The per-run to_dict and JSON encoding in st.plotly_chart are not
+    skipped. Every session gets the same Figure object: draw it and never
+    change it. To change a figure, call its builder for a new one.
+    """
+
+    def __init__(self, max_entries=512):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, company, chart, fingerprint, build, *args):
+        """Cached go.Figure of ``build(*args)``; ``chart`` also names the figure in the timing metrics"""
+        key = (company, chart, fingerprint)
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                METRICS.count_cache(f"figure.{chart}", hit=True)
+                return self._entries[key]
+
+        with METRICS.time(f"figure.{chart}"):
+            figure = go.Figure(build(*args))
+        METRICS.count_cache(f"figure.{chart}", hit=False)
+        with self._lock:
+            self._entries[key] = figure
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return figure
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self):
+        return len(self._entries)
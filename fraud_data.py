@@ -0,0 +1,436 @@
+"""
+Company-year panel data model for the fraud analysis dashboard.
+
+All fundamentals live in a single long-format DataFrame indexed by
+(Company, Year), with one row per company and fiscal year. Company
+metadata (fraud summary, currency, reporting units) is kept alongside in a
+frame indexed by Company.
+
+Besides the built-in case studies, universes can be read from CSV or
+Parquet files with one row per company-year and the columns Company, Year
+and the line items in FIELDS. Only those columns are read, with fixed
+dtypes, and a single company can be loaded without reading the rest.
+"""
+
+import os
+import uuid
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+PANEL_INDEX = ['Company', 'Year']
+# Quarterly panels add the fiscal quarter (1-4) as a third index level
+QUARTERLY_INDEX = ['Company', 'Year', 'Quarter']
+
+# Line items used by the scoring models, in the order they are stored
+FIELDS = ['Revenue', 'COGS', 'SGA', 'EBIT', 'Net_Income', 'Total_Assets', 'Current_Assets',
+          'Fixed_Assets', 'Current_Liabilities', 'Total_Debt', 'Total_Equity', 'Receivables',
+          'Inventory', 'Retained_Earnings', 'Market_Cap', 'Depreciation', 'CFO']
+
+KEY_DTYPES = {'Company': str, 'Year': 'int64', 'Quarter': 'int64'}
+FIELD_DTYPES = {field: 'float64' for field in FIELDS}
+# Opt-in compact storage: single-precision line items and small integer years
+COMPACT_FIELD_DTYPE = 'float32'
+COMPACT_YEAR_DTYPE = 'int16'
+METADATA_COLUMNS = ['fraud', 'period', 'description', 'currency', 'units', 'industry']
+
+# Rows per CSV chunk when streaming a file
+CSV_CHUNK_ROWS = 250_000
+# Rows per Parquet row group; smaller groups make single-company reads cheaper
+PARQUET_ROW_GROUP_ROWS = 64_000
+# Companies per panel when a whole file is streamed company by company
+COMPANY_CHUNK = 10_000
+
+# The built-in statements are stored as absolute amounts (e.g. 39090e6 dollars,
+# 192.125e8 rupees), not in millions or crore
+COMPANY_INFO = {
+    'WorldCom': {
+        'fraud': 'Accounting Fraud - $11 billion',
+        'period': '2000-2002',
+        'description': 'WorldCom inflated assets by booking operating expenses as capital expenditures, leading to one of the largest accounting frauds in history.',
+        'currency': 'USD',
+        'units': 'absolute',
+        'industry': 'Telecommunications'
+    },
+    'IL&FS': {
+        'fraud': 'Debt Default Crisis - ₹91,000 crore',
+        'period': '2015-2018',
+        'description': 'IL&FS defaulted on debt obligations, revealing major accounting irregularities and poor governance practices.',
+        'currency': 'INR',
+        'units': 'absolute',
+        'industry': 'Financial Services'
+    },
+    'Xerox': {
+        'fraud': 'Revenue Recognition Fraud - $6 billion',
+        'period': '1997-2000',
+        'description': 'Xerox manipulated revenue recognition by accelerating lease revenue and improperly accounting for equipment sales.',
+        'currency': 'USD',
+        'units': 'absolute',
+        'industry': 'Technology Hardware'
+    },
+    'Bhushan Steel': {
+        'fraud': 'Bank Fraud & Debt Default - ₹47,000 crore',
+        'period': '2014-2017',
+        'description': 'Bhushan Steel was involved in fraudulent loans and fund diversion, leading to insolvency proceedings.',
+        'currency': 'INR',
+        'units': 'absolute',
+        'industry': 'Steel'
+    }
+}
+
+# =======================
+# BUILT-IN CASE STUDIES
+# =======================
+
+def builtin_company_frames():
+    """Financial data for the built-in case-study companies, one DataFrame per company"""
+    
+    # WorldCom Data (2000-2001) 
+    worldcom = pd.DataFrame({
+        'Year': [1999,2000, 2001],
+        'Revenue': [36000e6,39090e6, 35181e6],
+        'COGS': [17000e6, 15508e6, 15910e6],
+        'SGA': [7000e6, 7421e6, 7547e6],
+        'EBIT': [9000e6,10345e6, 7519e6],
+        'Net_Income': [4200e6,5134e6, 1514e6],
+        'Total_Assets': [95000e6, 104363e6, 107485e6],
+        'Current_Assets': [95000e6, 21033e6, 19526e6],
+        'Fixed_Assets': [50000e6,54653e6, 58365e6],
+        'Current_Liabilities': [16000e6, 17149e6, 20063e6],
+        'Total_Debt': [26000e6, 30323e6, 31983e6],
+        'Total_Equity': [42000e6,46557e6, 45289e6],
+        'Receivables': [4500e6,5138e6, 6304e6],
+        'Inventory': [1300e6, 1465e6, 1513e6],
+        'Retained_Earnings': [15000e6,17694e6, 19172e6],
+        'Market_Cap': [150000e6,115000e6, 45000e6],
+        'Depreciation': [6000e6, 6373e6, 7490e6],
+        'CFO':[3500e6, 10240e6, 7001e6]
+    })
+    
+    # IL&FS Data (2015-2018)
+    ilfs = pd.DataFrame({
+        'Year': [2015, 2016, 2017, 2018],
+        'Revenue': [192.125e8, 192.11557e8, 234.6465e8, 229.4347e8],
+        'COGS': [45.2e8, 52.1e8, 58.7e8, 62.4e8],
+        'SGA': [13.825e8, 16.5609e8, 18.9909e8, 19.0513e8],
+        'EBIT': [161.6385e8, 154.0426e8, 177.9783e8, 167.9961e8],
+        'Net_Income': [24.937e8, 19.2779e8, 20.8781e8, 9.9660e8],
+        'Total_Assets': [1542.844e8, 1795.6088e8, 1956.2608e8, 2188.9279e8],
+        'Current_Assets': [810.8627e8,  822.0826e8, 856.7468e8, 785.7735e8],
+        'Fixed_Assets': [0.4806e8, 0.4472e8, 0.4046e8,  0.7968e8],
+        'Current_Liabilities': [619.4992e8, 743.7955e8, 724.9711e8,  820.1098e8],
+        'Total_Debt': [917.3757e8, 1233.7509e8, 1341.9523e8, 1475.5373e8],
+        'Total_Equity': [203.1238e8, 230.6752e8, 240.7124e8, 239.9749e8],
+        'Receivables': [16.9873e8, 15.1298e8, 18.8868e8, 26.6748e8],
+        'Inventory': [0.0e8, 0.0e8, 0.0e8, 0.0e8],
+        'Retained_Earnings': [176.557e8, 191.6085e8, 201.6457e8, 200.9082e8],
+        'Market_Cap': [203.1238e8, 230.6752e8, 240.7124e8, 239.9749e8],#book equity
+        'Depreciation': [0.2075e8, 0.1746e8, 0.2247e8, 0.2541e8],
+        'CFO': [51.7917e8,  -35.4439e8, 9.2444e8, -283.6166e8],
+
+    })
+    
+    # Xerox Corporation Data (1997-2000)
+    xerox = pd.DataFrame({
+        'Year': [1997, 1998, 1999, 2000],
+        'Revenue': [18.166e9, 19.447e9, 19.228e9, 18.632e9],
+        'COGS': [16.003e9, 18.684e9, 17.192e9, 19.186e9],
+        'SGA': [5.517e9, 5.873e9, 5.603e9, 5.230e9],
+        'EBIT':[-3.354e9,-5.110e9,-3.567e9,-5.784e9],
+        'Net_Income': [1.452e9, 0.395e9, 1.424e9, -0.384e9],
+        'Total_Assets': [27.732e9, 30.024e9, 28.814e9, 29.687e9],
+        'Current_Assets': [10.766e9, 12.475e9, 11.985e9, 13.094e9],
+        'Fixed_Assets': [2.377e9, 2.386e9, 2.456e9, 2.495e9],
+        'Current_Liabilities': [7.692e9, 8.507e9, 7.950e9, 6.286e9],
+        'Total_Debt': [12.486e9, 14.971e9, 14.951e9, 18.097e9],
+        'Total_Equity': [4.985e9, 4.857e9, 4.911e9, 3.637e9],
+        'Receivables': [2.745e9, 2.671e9, 2.622e9, 2.281e9],
+        'Inventory': [2.792e9, 3.269e9, 2.961e9, 1.930e9],
+        'Retained_Earnings': [3.921e9, 3.348e9, 3.915e9, 2.879e9],
+        'Market_Cap': [31.2e9, 28.6e9, 29.9e9, 15.4e9],
+        'Depreciation': [1.543e9, 1.629e9, 1.718e9, 1.802e9],
+        'CFO': [0.472e9, -1.165e9, 1.224e9, -0.827e9],
+
+    })
+    
+    # Bhushan Steel Data (2014-2017)
+    bhushan = pd.DataFrame({
+       'Year': [2014, 2015, 2016, 2017],
+       'Revenue': [7845.0e8, 8567.0e8, 8234.0e8, 7589.0e8],
+       'COGS': [6234.0e8, 6845.0e8, 6789.0e8, 6523.0e8],
+       'SGA': [856.0e8, 945.0e8, 1023.0e8, 1145.0e8],
+       'EBIT': [755.0e8, 778.0e8, 422.0e8, -79.0e8],
+       'Net_Income': [345.0e8, 289.0e8, -245.0e8, -867.0e8],
+       'Total_Assets': [44567.0e8, 47892.0e8, 49234.0e8, 48567.0e8],
+       'Current_Assets': [12534.0e8, 13567.0e8, 13892.0e8, 13245.0e8],
+       'Fixed_Assets': [29833.0e8, 32125.0e8, 33142.0e8, 33122.0e8],
+       'Current_Liabilities': [9845.0e8, 11234.0e8, 14567.0e8, 17892.0e8],
+       'Total_Debt': [28567.0e8, 32589.0e8, 36892.0e8, 39845.0e8],
+       'Total_Equity': [8234.0e8, 8523.0e8, 8278.0e8, 7411.0e8],
+       'Receivables': [4567.0e8, 5234.0e8, 5678.0e8, 5892.0e8],
+       'Inventory': [3245.0e8, 3567.0e8, 3789.0e8, 3623.0e8],
+       'Retained_Earnings': [4567.0e8, 4856.0e8, 4611.0e8, 3744.0e8],
+       'Market_Cap': [12500.0e8, 11000.0e8, 7500.0e8, 3500.0e8],
+       'Depreciation': [1845.0e8, 2023.0e8, 2167.0e8, 2289.0e8],
+       'CFO': [945.0e8, 812.0e8, -678.0e8, -1845.0e8],
+   })
+
+    return {
+        'WorldCom': worldcom,
+        'IL&FS': ilfs,
+        'Xerox': xerox,
+        'Bhushan Steel': bhushan
+    }
+
+# =======================
+# PANEL CONSTRUCTION
+# =======================
+
+def build_panel(frames):
+    """Stack per-company frames into one panel indexed by (Company, Year)
+
+    Rows are sorted by year within each company, which the period-over-period
+    models (Beneish, trend) rely on.
+    """
+    panel = pd.concat(frames, names=['Company', None]).reset_index(level=0)
+    panel = panel.set_index(PANEL_INDEX).sort_index()
+    return panel[FIELDS]
+
+def company_metadata(companies=None):
+    """Company metadata frame indexed by Company, in display order"""
+    info = pd.DataFrame.from_dict(COMPANY_INFO, orient='index')
+    info.index.name = 'Company'
+    if companies is not None:
+        info = info.reindex(companies)
+    return info
+
+def load_builtin_universe():
+    """Panel and metadata for the built-in case-study companies"""
+    frames = builtin_company_frames()
+    return build_panel(frames), company_metadata(list(frames))
+
+def company_years(panel, company):
+    """Fiscal years available for one company, in ascending order"""
+    return panel.xs(company, level='Company').index.tolist()
+
+# =======================
+# COMPACT STORAGE
+# =======================
+
+def _fits_float32(values):
+    """Whether every value survives a round trip through float32 without overflow or underflow"""
+    magnitude = np.abs(values[np.isfinite(values) & (values != 0)])
+    if not len(magnitude):
+        return True
+    info = np.finfo(np.float32)
+    return magnitude.max() <= info.max and magnitude.min() >= info.tiny
+
+def compact_panel(panel):
+    """Panel in compact storage: float32 line items where the values fit, int16 years
+
+    Company and Year are index levels, so rows already hold only small
+    integer codes into the sorted company and year labels. Single precision
+    keeps about seven significant digits, ample for statements reported in
+    millions or crore; a line item whose values would overflow float32 is
+    left in float64. The models preserve the input precision, so derived
+    tables of a compact panel are float32 as well.
+    """
+    dtypes = {field: COMPACT_FIELD_DTYPE for field in panel.columns
+              if panel[field].dtype.kind == 'f' and _fits_float32(panel[field].to_numpy())}
+    compact = panel.astype(dtypes)
+    years = compact.index.levels[1]
+    if len(years) and np.iinfo(COMPACT_YEAR_DTYPE).min <= years.min() and years.max() <= np.iinfo(COMPACT_YEAR_DTYPE).max:
+        compact.index = compact.index.set_levels(years.astype(COMPACT_YEAR_DTYPE), level='Year')
+    return compact
+
+def memory_budget(tables):
+    """Memory held by each named frame, with a total row
+
+    An index is counted with the first table that holds it; derived tables
+    share the panel's index, so it is not counted again for each of them.
+    """
+    rows = []
+    seen = set()
+    for name, table in tables.items():
+        size = int(np.sum(table.memory_usage(index=id(table.index) not in seen, deep=True)))
+        seen.add(id(table.index))
+        width = table.shape[1] if table.ndim == 2 else 1
+        rows.append({'Table': name, 'Rows': len(table), 'Columns': width, 'Bytes': size})
+    budget = pd.DataFrame(rows, columns=['Table', 'Rows', 'Columns', 'Bytes']).set_index('Table')
+    budget.loc['Total'] = [budget['Rows'].max() if len(budget) else 0, budget['Columns'].sum(), budget['Bytes'].sum()]
+    budget['MiB'] = budget['Bytes'] / 2**20
+    budget['Bytes_per_Row'] = budget['Bytes'] / budget['Rows'].where(budget['Rows'] > 0)
+    return budget
+
+# =======================
+# SHARED STORAGE
+# =======================
+
+def _read_only_array(values):
+    values = values.view()
+    values.flags.writeable = False
+    return values
+
+def read_only(value):
+    """``value`` with the arrays of its frames and series marked read-only, without copying them
+
+    Objects shared by every session of a server process (st.cache_resource,
+    the analytics cache) are handed to readers as they are, not copied, so
+    an in-place edit by one reader would show up in every other session.
+    With read-only arrays, writes into the values (through .loc, .iloc,
+    .at or .to_numpy()) raise ValueError. Chained assignment such as
+    ``frame['Revenue'].iloc[0] = 5`` changes only a temporary copy under
+    copy-on-write, and the shared frame is left as it was. Adding,
+    replacing or dropping whole columns changes the frame object itself
+    and is not prevented. Readers that need to change a frame take a
+    .copy(). Arrays are returned as read-only views; dicts, lists and
+    tuples are converted item by item, and other values are returned
+    unchanged.
+    """
+    if isinstance(value, pd.DataFrame):
+        if not value.columns.is_unique:
+            return value
+        columns = {name: _read_only_array(column.to_numpy()) if isinstance(column.dtype, np.dtype) else column
+                   for name, column in value.items()}
+        return pd.DataFrame(columns, index=value.index, columns=value.columns, copy=False)
+    if isinstance(value, pd.Series):
+        if not isinstance(value.dtype, np.dtype):
+            return value
+        return pd.Series(_read_only_array(value.to_numpy()), index=value.index, name=value.name, copy=False)
+    if isinstance(value, np.ndarray):
+        return _read_only_array(value)
+    if isinstance(value, dict):
+        return {key: read_only(item) for key, item in value.items()}
+    if type(value) in (list, tuple):
+        return type(value)(read_only(item) for item in value)
+    return value
+
+# =======================
+# FILE INGESTION
+# =======================
+
+def _is_parquet(path):
+    return Path(path).suffix.lower() in ('.parquet', '.pq')
+
+def _projection(columns, keys=PANEL_INDEX):
+    """Key columns plus the requested line items, in FIELDS order"""
+    fields = FIELDS if columns is None else [f for f in FIELDS if f in columns]
+    return list(keys) + fields
+
+def _to_panel(frame, compact=False, keys=PANEL_INDEX):
+    frame = frame.astype({c: dtype for c, dtype in {**KEY_DTYPES, **FIELD_DTYPES}.items() if c in frame.columns})
+    panel = frame.set_index(keys).sort_index()
+    return compact_panel(panel) if compact else panel
+
+def read_fundamentals(path, companies=None, columns=None, compact=False, quarterly=False):
+    """Read a company-year panel from a CSV or Parquet file
+
+    Only the key columns and the requested line items are read (all of
+    FIELDS by default). When ``companies`` is given, only their rows are
+    kept: Parquet files are memory-mapped and filtered on row-group
+    statistics, CSV files are streamed in chunks, so the rest of the
+    universe is never held in memory. ``compact`` returns the panel in
+    compact storage (see compact_panel). ``quarterly`` reads a file with a
+    Quarter column into a panel indexed by QUARTERLY_INDEX.
+    """
+    keys = QUARTERLY_INDEX if quarterly else PANEL_INDEX
+    usecols = _projection(columns, keys)
+    if _is_parquet(path):
+        import pyarrow.parquet as pq
+        filters = [('Company', 'in', list(companies))] if companies is not None else None
+        table = pq.read_table(path, columns=usecols, filters=filters, memory_map=True)
+        return _to_panel(table.to_pandas(), compact, keys)
+
+    dtypes = {c: dtype for c, dtype in {**KEY_DTYPES, **FIELD_DTYPES}.items() if c in usecols}
+    reader = pd.read_csv(path, usecols=usecols, dtype=dtypes, chunksize=CSV_CHUNK_ROWS)
+    if companies is None:
+        chunks = list(reader)
+    else:
+        wanted = set(companies)
+        chunks = [chunk[chunk['Company'].isin(wanted)] for chunk in reader]
+    frame = pd.concat(chunks, ignore_index=True) if chunks else pd.DataFrame(columns=usecols)
+    return _to_panel(frame[usecols], compact, keys)
+
+def iter_fundamentals(path, columns=None, chunk_rows=CSV_CHUNK_ROWS, quarterly=False):
+    """Stream a fundamentals file as raw column-projected chunks (not indexed or sorted)"""
+    usecols = _projection(columns, QUARTERLY_INDEX if quarterly else PANEL_INDEX)
+    if _is_parquet(path):
+        import pyarrow.parquet as pq
+        parquet_file = pq.ParquetFile(path, memory_map=True)
+        for batch in parquet_file.iter_batches(batch_size=chunk_rows, columns=usecols):
+            yield batch.to_pandas()
+        return
+
+    dtypes = {c: dtype for c, dtype in {**KEY_DTYPES, **FIELD_DTYPES}.items() if c in usecols}
+    yield from pd.read_csv(path, usecols=usecols, dtype=dtypes, chunksize=chunk_rows)
+
+def iter_company_panels(path, chunk_companies=COMPANY_CHUNK, columns=None, compact=False):
+    """Stream a fundamentals file as panels of ``chunk_companies`` whole companies
+
+    Scores need each company's full history, which iter_fundamentals chunks
+    split. Each panel is a filtered read_fundamentals: Parquet reads skip
+    the row groups without those companies, CSV files are rescanned once
+    per panel.
+    """
+    companies = list_companies(path)
+    for start in range(0, len(companies), chunk_companies):
+        yield read_fundamentals(path, companies[start:start + chunk_companies], columns, compact)
+
+def list_companies(path):
+    """Companies present in a fundamentals file, reading only the Company column"""
+    if _is_parquet(path):
+        import pyarrow.parquet as pq
+        import pyarrow.compute as pc
+        table = pq.read_table(path, columns=['Company'], memory_map=True)
+        return sorted(pc.unique(table['Company']).to_pylist())
+
+    seen = set()
+    for chunk in pd.read_csv(path, usecols=['Company'], dtype={'Company': str}, chunksize=CSV_CHUNK_ROWS):
+        seen.update(chunk['Company'].unique())
+    return sorted(seen)
+
+def read_company_metadata(path, metadata_path=None):
+    """Metadata frame for the companies in a fundamentals file
+
+    ``metadata_path`` is an optional CSV/Parquet file with a Company column
+    and any of METADATA_COLUMNS; companies it does not describe get empty
+    text fields.
+    """
+    info = pd.DataFrame(index=pd.Index(list_companies(path), name='Company'), columns=METADATA_COLUMNS)
+    if metadata_path is not None:
+        extra = pd.read_parquet(metadata_path) if _is_parquet(metadata_path) else pd.read_csv(metadata_path, dtype=str)
+        extra = extra.set_index('Company').reindex(columns=METADATA_COLUMNS)
+        info = extra.combine_first(info).reindex(columns=METADATA_COLUMNS)
+    return info.fillna('')
+
+def write_atomic(path, text):
+    """Replace ``path`` with ``text`` in one step: readers see the old file or the new one, never a part
+
+    The temporary file is created next to ``path`` with mode 0o666, which
+    the kernel reduces by the process umask exactly as for open(). The
+    umask is never changed, so threads creating files at the same time are
+    not affected.
+    """
+    path = os.fspath(path)
+    temp_path = f"{path}.{uuid.uuid4().hex[:12]}.tmp"
+    handle = os.open(temp_path, os.O_CREAT | os.O_EXCL | os.O_WRONLY, 0o666)
+    try:
+        with os.fdopen(handle, 'w', encoding='utf-8') as temp:
+            temp.write(text)
+        os.replace(temp_path, path)
+    except BaseException:
+        os.unlink(temp_path)
+        raise
+
+def write_fundamentals(panel, path):
+    """Write a panel as CSV or Parquet in the layout read_fundamentals expects
+
+    Parquet output is sorted by company with bounded row groups, so that
+    single-company reads only touch the row groups holding that company.
+    """
+    frame = panel.sort_index().reset_index()[_projection(None, panel.index.names)]
+    if _is_parquet(path):
+        frame.to_parquet(path, index=False, row_group_size=PARQUET_ROW_GROUP_ROWS)
+    else:
+        frame.to_csv(path, index=False)
@@ -0,0 +1,361 @@
+"""
+Fraud detection and financial analysis models.
+
+Every function takes the company-year panel built by ``fraud_data`` (indexed
+by Company and Year, rows ordered by year within each company) and scores
+the whole universe at once. Results keep the panel's index, so one company
+is selected with ``result.loc[company]`` or ``result.xs(company)``.
+Quarterly panels (Company, Year, Quarter) are scored the same way; see
+``periods`` for trailing-twelve-month rollups.
+"""
+
+import pandas as pd
+import numpy as np
+
+# Bump whenever a model's output changes, so cached results are recomputed
+MODEL_VERSION = '3'
+
+class _Table:
+    """Derived table filled column by column into one preallocated block
+
+    The block takes the input panel's float precision, so compact (float32)
+    panels give float32 tables, and the finished frame wraps the block
+    without copying it.
+    """
+
+    def __init__(self, df, columns):
+        self.index = df.index
+        self.columns = list(columns)
+        dtype = np.result_type(np.float32, *[dtype for dtype in df.dtypes if dtype.kind == 'f'])
+        self.block = np.empty((len(self.columns), len(df)), dtype=dtype)
+
+    def __setitem__(self, column, values):
+        self.block[self.columns.index(column)] = values
+
+    def __getitem__(self, column):
+        return self.block[self.columns.index(column)]
+
+    def frame(self):
+        return pd.DataFrame(self.block.T, index=self.index, columns=self.columns, copy=False)
+
+# =======================
+# FRAUD DETECTION MODELS
+# =======================
+
+def calculate_altman_z_score(df):
+    """Altman Z-Score for bankruptcy prediction"""
+    working_capital = df['Current_Assets'] - df['Current_Liabilities']
+    
+    X1 = working_capital / df['Total_Assets']
+    X2 = df['Retained_Earnings'] / df['Total_Assets']
+    X3 = df['EBIT'] / df['Total_Assets']
+    X4 = df['Market_Cap'] / (df['Total_Assets'] - df['Total_Equity'])
+    X5 = df['Revenue'] / df['Total_Assets']
+    
+    z_score = 1.2*X1 + 1.4*X2 + 3.3*X3 + 0.6*X4 + 1.0*X5
+    
+    return z_score
+
+# Altman model variants: intercept, weights of ALTMAN_RATIOS and the
+# (distress, safe) zone cut-offs. X4 is market equity over liabilities in
+# the original model and book equity over liabilities in the later ones.
+ALTMAN_RATIOS = ['X1', 'X2', 'X3', 'X4_Market', 'X4_Book', 'X5']
+ALTMAN_VARIANTS = {
+    'Z_Score': {'symbol': 'Z', 'label': "public manufacturers",
+                'intercept': 0.0, 'weights': [1.2, 1.4, 3.3, 0.6, 0.0, 1.0], 'zones': (1.81, 2.99)},
+    'Z_Prime': {'symbol': "Z'", 'label': "private manufacturers",
+                'intercept': 0.0, 'weights': [0.717, 0.847, 3.107, 0.0, 0.420, 0.998], 'zones': (1.23, 2.90)},
+    'Z_Double_Prime': {'symbol': "Z''", 'label': "non-manufacturers",
+                       'intercept': 0.0, 'weights': [6.56, 3.26, 6.72, 0.0, 1.05, 0.0], 'zones': (1.10, 2.60)},
+    'EM_Score': {'symbol': 'EM', 'label': "emerging-market issuers",
+                 'intercept': 3.25, 'weights': [6.56, 3.26, 6.72, 0.0, 1.05, 0.0], 'zones': (4.15, 5.85)},
+}
+
+# Variant assignment: issuers reporting in these currencies get the EM-Score,
+# industries matching none of the keywords are non-manufacturers (Z'')
+EMERGING_MARKET_CURRENCIES = {'ARS', 'BDT', 'BRL', 'CLP', 'CNY', 'COP', 'EGP', 'IDR', 'INR', 'KES', 'MXN',
+                              'MYR', 'NGN', 'PEN', 'PHP', 'PKR', 'PLN', 'RUB', 'THB', 'TRY', 'VND', 'ZAR'}
+MANUFACTURING_KEYWORDS = ('manufactur', 'steel', 'metal', 'chemical', 'hardware', 'automo', 'industrial',
+                          'machinery', 'material', 'pharma', 'textile', 'paper', 'cement', 'aerospace',
+                          'electronic', 'semiconductor', 'food', 'beverage')
+
+def calculate_altman_ratios(df):
+    """The X1-X5 ratios shared by every Altman variant (X4 in its market and book forms)"""
+    ratios = _Table(df, ALTMAN_RATIOS)
+    liabilities = df['Total_Assets'] - df['Total_Equity']
+    ratios['X1'] = (df['Current_Assets'] - df['Current_Liabilities']) / df['Total_Assets']
+    ratios['X2'] = df['Retained_Earnings'] / df['Total_Assets']
+    ratios['X3'] = df['EBIT'] / df['Total_Assets']
+    ratios['X4_Market'] = df['Market_Cap'] / liabilities
+    ratios['X4_Book'] = df['Total_Equity'] / liabilities
+    ratios['X5'] = df['Revenue'] / df['Total_Assets']
+    return ratios.frame()
+
+def calculate_altman_variants(df):
+    """Every ALTMAN_VARIANTS score for every row, one column per variant
+
+    The ratios are computed once and all variants are scored by a single
+    (variants x ratios) @ (ratios x rows) product. A ratio a variant does
+    not use never affects it: rows with a missing or infinite ratio are
+    rescored from the ratios each variant uses.
+    """
+    ratios = calculate_altman_ratios(df).to_numpy().T
+    weights = np.array([variant['weights'] for variant in ALTMAN_VARIANTS.values()], dtype=ratios.dtype)
+    intercepts = np.array([variant['intercept'] for variant in ALTMAN_VARIANTS.values()], dtype=ratios.dtype)
+
+    finite = np.isfinite(ratios).all(axis=0)
+    scores = weights @ np.where(finite, ratios, 0) + intercepts[:, None]
+    if not finite.all():
+        for row, (variant_weights, intercept) in enumerate(zip(weights, intercepts)):
+            used = variant_weights != 0
+            scores[row, ~finite] = variant_weights[used] @ ratios[used][:, ~finite] + intercept
+    return pd.DataFrame(scores.T, index=df.index, columns=list(ALTMAN_VARIANTS), copy=False)
+
+def altman_zone(z_scores, variant='Z_Score'):
+    """Altman zone (Distress / Grey / Safe) for each score of one variant, or of each row's variant
+
+    ``variant`` is a variant name or, with per-row scores from several
+    variants, an aligned array of names.
+    """
+    if isinstance(variant, str):
+        distress, safe = ALTMAN_VARIANTS[variant]['zones']
+    else:
+        cut_offs = pd.DataFrame({name: spec['zones'] for name, spec in ALTMAN_VARIANTS.items()}, index=['distress', 'safe'])
+        distress, safe = cut_offs.reindex(columns=np.asarray(variant)).to_numpy()
+    zones = np.select([z_scores > safe, z_scores > distress], ['Safe', 'Grey'], default='Distress')
+    return pd.Series(np.where(pd.isna(z_scores), None, zones), index=z_scores.index)
+
+def assign_altman_variants(metadata, panel=None):
+    """Altman variant suited to each company in the metadata
+
+    Emerging-market issuers (by reporting currency) get the EM-Score and
+    non-manufacturers (by industry) the Z''-Score. Manufacturers get the
+    original Z-Score, or Z' when the panel has no market value for them
+    (private firms). Companies without an industry are treated as
+    manufacturers.
+    """
+    currencies = metadata.get('currency', pd.Series(None, index=metadata.index, dtype=object))
+    industries = metadata.get('industry', pd.Series(None, index=metadata.index, dtype=object))
+    emerging = currencies.fillna('').str.upper().isin(EMERGING_MARKET_CURRENCIES)
+    named = industries.fillna('').str.lower()
+    manufacturer = (named == '') | named.str.contains('|'.join(MANUFACTURING_KEYWORDS))
+    private = pd.Series(False, index=metadata.index)
+    if panel is not None:
+        listed = (panel['Market_Cap'] > 0).groupby(level='Company', sort=False).any()
+        private = ~listed.reindex(metadata.index, fill_value=True)
+    variants = np.select([emerging, ~manufacturer, private], ['EM_Score', 'Z_Double_Prime', 'Z_Prime'],
+                         default='Z_Score')
+    return pd.Series(variants, index=metadata.index, name='Altman_Variant')
+
+def assigned_altman_scores(variants, assignments):
+    """Each row's score under its company's assigned variant, with the variant and zone"""
+    companies = variants.index.get_level_values('Company')
+    variant = assignments.reindex(companies).fillna('Z_Score').to_numpy()
+    columns = variants.columns.get_indexer(variant)
+    scores = pd.Series(variants.to_numpy()[np.arange(len(variants)), columns], index=variants.index)
+    return pd.DataFrame({'Altman_Variant': variant, 'Altman_Score': scores,
+                         'Altman_Zone': altman_zone(scores, variant)}, index=variants.index)
+
+BENEISH_COMPONENTS = ['DSRI', 'GMI', 'AQI', 'SGI', 'DEPI', 'SGAI', 'LVGI', 'TATA']
+BENEISH_WEIGHTS = [0.92, 0.528, 0.404, 0.892, 0.115, -0.172, -0.327, 4.679]
+BENEISH_INTERCEPT = -4.84
+
+def quarter_numbers(index):
+    """Consecutive quarter number (Year * 4 + Quarter - 1) of each row of a quarterly panel index"""
+    years = index.get_level_values('Year').to_numpy(dtype=np.int64)
+    return years * 4 + index.get_level_values('Quarter').to_numpy(dtype=np.int64) - 1
+
+def _prior_period(df, columns):
+    """Previous-year values of ``columns``, shifted within each company
+
+    Quarterly panels (with a Quarter index level, e.g. TTM rollups) compare
+    each quarter with the same quarter of the prior year; if that quarter
+    is missing, the prior values are NaN.
+    """
+    grouped = df[columns].groupby(level='Company', sort=False)
+    if 'Quarter' not in df.index.names:
+        return grouped.shift(1)
+    periods = pd.Series(quarter_numbers(df.index), index=df.index)
+    year_ago = periods.groupby(level='Company', sort=False).shift(4)
+    return grouped.shift(4).where(periods - year_ago == 4, axis=0)
+
+def beneish_indices(current, previous):
+    """The eight Beneish indices from current- and prior-year line items
+
+    ``current`` and ``previous`` map line items to aligned values (panel
+    columns or NumPy arrays of any shape), so the same formulas score
+    simulated scenarios.
+    """
+    def gross_margin(frame):
+        return (frame['Revenue'] - frame['COGS']) / frame['Revenue']
+
+    def asset_quality(frame):
+        return 1 - (frame['Current_Assets'] + frame['Fixed_Assets']) / frame['Total_Assets']
+
+    def depreciation_rate(frame):
+        return frame['Depreciation'] / (frame['Depreciation'] + frame['Fixed_Assets'])
+
+    return {
+        'DSRI': (current['Receivables'] / current['Revenue']) / (previous['Receivables'] / previous['Revenue']),
+        'GMI': gross_margin(previous) / gross_margin(current),
+        'AQI': asset_quality(current) / asset_quality(previous),
+        'SGI': current['Revenue'] / previous['Revenue'],
+        'DEPI': depreciation_rate(previous) / depreciation_rate(current),
+        'SGAI': (current['SGA'] / current['Revenue']) / (previous['SGA'] / previous['Revenue']),
+        'LVGI': (current['Total_Debt'] / current['Total_Assets']) / (previous['Total_Debt'] / previous['Total_Assets']),
+        'TATA': (current['Net_Income'] - current['CFO']) / current['Total_Assets'],
+    }
+
+def calculate_beneish_components(df):
+    """Beneish M-Score indices and composite score for every row, computed in one vectorized pass
+
+    The first year of each company has no prior period, so its indices and
+    score are NaN.
+    """
+    columns = ['Revenue', 'COGS', 'SGA', 'Current_Assets', 'Fixed_Assets', 'Total_Assets',
+               'Total_Debt', 'Receivables', 'Depreciation']
+    previous = _prior_period(df, columns)
+
+    components = _Table(df, BENEISH_COMPONENTS + ['M_Score'])
+    for name, values in beneish_indices(df, previous).items():
+        components[name] = values
+    # TATA is defined for every row, but the score needs all eight indices
+    components['TATA'] = np.where(previous['Revenue'].notna(), components['TATA'], np.nan)
+
+    weights = np.array(BENEISH_WEIGHTS, dtype=components.block.dtype)
+    components['M_Score'] = BENEISH_INTERCEPT + weights @ components.block[:len(BENEISH_COMPONENTS)]
+    return components.frame()
+
+def calculate_beneish_m_score(df):
+    """Beneish M-Score for earnings manipulation detection"""
+    return calculate_beneish_components(df)['M_Score']
+
+RATIO_COLUMNS = ['Gross_Margin', 'Operating_Margin', 'Net_Profit_Margin', 'ROA', 'ROE', 'Current_Ratio',
+                 'Quick_Ratio', 'Debt_to_Equity', 'Debt_Ratio', 'Asset_Turnover', 'Receivables_Turnover',
+                 'Days_Sales_Outstanding']
+COMMON_SIZE_COLUMNS = ['COGS_%', 'Net_Income_%', 'SGA_%', 'EBIT_%', 'Current_Assets_%', 'Fixed_Assets_%',
+                       'Debt_%', 'Equity_%']
+TREND_FIELDS = ['Revenue', 'Receivables', 'EBIT', 'Net_Income', 'Total_Assets', 'Total_Debt', 'Total_Equity',
+                'Current_Assets', 'Current_Liabilities']
+TREND_COLUMNS = ['Revenue_Index', 'Receivables_Index', 'EBIT_Index', 'Net_Income_Index', 'Assets_Index',
+                 'Debt_Index', 'Equity_Index', 'Current_Assets_Index', 'Current_Liabilities_Index']
+
+FINANCIAL_TABLES = {'ratios': RATIO_COLUMNS, 'common_size': COMMON_SIZE_COLUMNS, 'trend': TREND_COLUMNS}
+# Line items read by each table
+_TABLE_FIELDS = {
+    'ratios': ['Revenue', 'COGS', 'EBIT', 'Net_Income', 'Total_Assets', 'Total_Equity', 'Current_Assets',
+               'Current_Liabilities', 'Inventory', 'Total_Debt', 'Receivables'],
+    'common_size': ['Revenue', 'COGS', 'Net_Income', 'SGA', 'EBIT', 'Total_Assets', 'Current_Assets',
+                    'Fixed_Assets', 'Total_Debt', 'Total_Equity'],
+    'trend': TREND_FIELDS,
+}
+
+def _company_starts(index):
+    """First row of each company in a panel index grouped by company"""
+    codes = index.codes[index.names.index('Company')]
+    return np.flatnonzero(np.r_[True, codes[1:] != codes[:-1]])
+
+def _first_valid(values, starts):
+    """Each company's first non-NaN value of every row of a (fields x rows) block, repeated over its rows"""
+    n_rows = values.shape[1]
+    sizes = np.diff(np.r_[starts, n_rows])
+    first = values[:, starts]
+    if not np.isnan(first).any():
+        return np.repeat(first, sizes, axis=1)
+    positions = np.where(np.isnan(values), n_rows, np.arange(n_rows))
+    first = np.repeat(np.minimum.reduceat(positions, starts, axis=1), sizes, axis=1)
+    padded = np.hstack([values, np.full((len(values), 1), np.nan, dtype=values.dtype)])
+    return np.take_along_axis(padded, first, axis=1)
+
+def calculate_financial_tables(df, tables=FINANCIAL_TABLES):
+    """Ratios, common-size and trend tables in one pass over the panel's line items
+
+    The line items are read once as a 2D block and every denominator is
+    prepared once, then shared by the outputs that divide by it. A zero
+    denominator, or a zero or negative base for a common-size share or a
+    trend index (e.g. a loss-year EBIT base), gives NaN rather than inf or a
+    sign-flipped percentage. Returns a frame per requested table and
+    ``masked``, marking the cells set to NaN that way.
+    """
+    columns = [column for name in tables for column in FINANCIAL_TABLES[name]]
+    out = _Table(df, columns)
+    masked = np.zeros(out.block.shape, dtype=bool)
+    fields = sorted(set().union(*(_TABLE_FIELDS[name] for name in tables)))
+    # Column views of the panel's own block where it already has the output precision
+    item = {field: df[field].to_numpy(dtype=out.block.dtype) for field in fields}
+
+    def base(values, positive=False):
+        """Denominator with unusable values as NaN, and where they were"""
+        unusable = values <= 0 if positive else values == 0
+        return np.where(unusable, np.nan, values), unusable
+
+    def divide(column, numerator, denominator, scale=None):
+        values, unusable = denominator
+        result = numerator / values
+        out[column] = result if scale is None else result * scale
+        masked[columns.index(column)] = unusable
+
+    if 'ratios' in tables:
+        revenue = base(item['Revenue'])
+        assets = base(item['Total_Assets'])
+        equity = base(item['Total_Equity'])
+        current_liabilities = base(item['Current_Liabilities'])
+        # Profitability
+        divide('Gross_Margin', item['Revenue'] - item['COGS'], revenue, 100)
+        divide('Operating_Margin', item['EBIT'], revenue, 100)
+        divide('Net_Profit_Margin', item['Net_Income'], revenue, 100)
+        divide('ROA', item['Net_Income'], assets, 100)
+        divide('ROE', item['Net_Income'], equity, 100)
+        # Liquidity
+        divide('Current_Ratio', item['Current_Assets'], current_liabilities)
+        divide('Quick_Ratio', item['Current_Assets'] - item['Inventory'], current_liabilities)
+        # Leverage
+        divide('Debt_to_Equity', item['Total_Debt'], equity)
+        divide('Debt_Ratio', item['Total_Debt'], assets, 100)
+        # Efficiency
+        divide('Asset_Turnover', item['Revenue'], assets)
+        divide('Receivables_Turnover', item['Revenue'], base(item['Receivables']))
+        divide('Days_Sales_Outstanding', item['Receivables'], revenue, 365)
+
+    if 'common_size' in tables:
+        # Shares of a negative revenue or asset base are meaningless
+        positive_revenue = base(item['Revenue'], positive=True)
+        positive_assets = base(item['Total_Assets'], positive=True)
+        for column, field, denominator in [('COGS_%', 'COGS', positive_revenue),
+                                           ('Net_Income_%', 'Net_Income', positive_revenue),
+                                           ('SGA_%', 'SGA', positive_revenue),
+                                           ('EBIT_%', 'EBIT', positive_revenue),
+                                           ('Current_Assets_%', 'Current_Assets', positive_assets),
+                                           ('Fixed_Assets_%', 'Fixed_Assets', positive_assets),
+                                           ('Debt_%', 'Total_Debt', positive_assets),
+                                           ('Equity_%', 'Total_Equity', positive_assets)]:
+            divide(column, item[field], denominator, 100)
+
+    if 'trend' in tables and len(df):
+        # Base year: each company's first reported value of the line item
+        bases = _first_valid(np.stack([item[field] for field in TREND_FIELDS]), _company_starts(df.index))
+        for column, field, first in zip(TREND_COLUMNS, TREND_FIELDS, bases):
+            divide(column, item[field], base(first, positive=True), 100)
+
+    frames = {}
+    position = 0
+    for name in tables:
+        width = len(FINANCIAL_TABLES[name])
+        frames[name] = pd.DataFrame(out.block[position:position + width].T, index=df.index,
+                                    columns=FINANCIAL_TABLES[name], copy=False)
+        position += width
+    frames['masked'] = pd.DataFrame(masked.T, index=df.index, columns=columns, copy=False)
+    return frames
+
+def calculate_all_ratios(df):
+    """Profitability, liquidity, leverage and efficiency ratios (see calculate_financial_tables)"""
+    return calculate_financial_tables(df, ['ratios'])['ratios']
+
+def calculate_common_size(df):
+    """Income items as % of revenue and balance-sheet items as % of total assets"""
+    return calculate_financial_tables(df, ['common_size'])['common_size']
+
+def calculate_trend(df):
+    """Line items indexed to each company's first year (= 100)"""
+    return calculate_financial_tables(df, ['trend'])['trend']
+
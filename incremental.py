@@ -0,0 +1,218 @@
+"""
+Incremental recomputation of derived analytics.
+
+A daily filing feed adds a handful of new fiscal years or restatements to a
+large universe. Rather than rescoring every company-year, IncrementalAnalytics
+keeps the derived tables next to the panel and, for each batch of filings,
+recomputes only the rows that depend on what changed:
+
+* Altman Z-Score, ratios and common-size figures are row-local, so only the
+  changed rows are recomputed.
+* The Beneish M-Score of year t uses years t and t-1, so a change to year t
+  recomputes rows t and t+1 of that company.
+* Trend indices divide each line item by the company's first reported
+  (non-NaN) value of it, so a company's whole history is re-indexed only
+  when a change lands at or before the last of those base rows (a restated
+  or newly back-filled early year, or a base value restated to NaN);
+  otherwise only the changed rows are, reading the company's rows up to its
+  base rows alongside them.
+
+Model work is proportional to the number of filings. Each batch still
+copies the panel and tables once (a plain memory copy, no model work), which
+keeps every panel immutable for the fingerprint-keyed AnalyticsCache.
+
+    analytics = IncrementalAnalytics(panel)
+    changed = analytics.apply(todays_filings)    # frame indexed by (Company, Year)
+    analytics.store(get_analytics_cache())
+"""
+
+import numpy as np
+import pandas as pd
+
+from fraud_data import FIELDS, PANEL_INDEX
+from fraud_models import (
+    TREND_FIELDS, calculate_altman_z_score, calculate_altman_variants, calculate_beneish_components,
+    calculate_all_ratios, calculate_common_size, calculate_trend
+)
+
+# Derived tables, named as in the dashboard's AnalyticsCache, and how far each one reaches
+ANALYTICS = {
+    'altman': (calculate_altman_z_score, 'row'),
+    'altman_variants': (calculate_altman_variants, 'row'),
+    'beneish': (calculate_beneish_components, 'prior'),
+    'ratios': (calculate_all_ratios, 'row'),
+    'common_size': (calculate_common_size, 'row'),
+    'trend': (calculate_trend, 'base'),
+}
+
+def _filing_rows(filings):
+    """Filings as panel rows: (Company, Year) index, FIELDS columns, last filing wins"""
+    if not isinstance(filings.index, pd.MultiIndex):
+        filings = filings.set_index(PANEL_INDEX)
+    filings = filings[FIELDS].astype(float)
+    return filings[~filings.index.duplicated(keep='last')].sort_index()
+
+def _row_keys(index):
+    """One sortable integer per (Company, Year) row of a sorted panel index"""
+    return index.codes[0].astype(np.int64) * (len(index.levels[1]) + 1) + index.codes[1]
+
+def _locate(index, companies, years):
+    """Row of each (company, year) in a sorted panel index, or where it would be inserted, and whether it exists"""
+    company_codes = index.levels[0].searchsorted(companies).astype(np.int64)
+    year_codes = index.levels[1].searchsorted(years)
+    # A company not in the panel goes before the whole block of the company it sorts ahead of
+    known = company_codes < len(index.levels[0])
+    known[known] = index.levels[0][company_codes[known]] == companies[known]
+    year_codes = np.where(known, year_codes, 0)
+    positions = np.searchsorted(_row_keys(index), company_codes * (len(index.levels[1]) + 1) + year_codes)
+    found = positions < len(index)
+    at = positions[found]
+    found[found] = ((index.levels[0][index.codes[0][at]] == companies[found]) &
+                    (index.levels[1][index.codes[1][at]] == years[found]))
+    return positions, found
+
+def _same_rows(old, new):
+    return ((old == new) | (np.isnan(old) & np.isnan(new))).all(axis=1)
+
+def _insert_keys(index, locs, new_keys):
+    """Sorted panel index with ``new_keys`` inserted before the old rows ``locs``"""
+    levels, codes = [], []
+    for level in range(2):
+        values = new_keys.get_level_values(level)
+        old_level, old_codes = index.levels[level], index.codes[level]
+        positions = old_level.searchsorted(values)
+        known = positions < len(old_level)
+        known[known] = old_level[positions[known]] == values[known]
+        if not known.all():
+            # A new company or year joins the level; keep the level sorted and recode
+            merged = old_level.union(values.unique()).astype(old_level.dtype)
+            old_codes = merged.searchsorted(old_level)[old_codes]
+            old_level = merged
+        levels.append(old_level)
+        codes.append(_insert_rows(old_codes, locs, old_level.searchsorted(values)))
+    return pd.MultiIndex(levels=levels, codes=codes, names=index.names, verify_integrity=False)
+
+def _insert_rows(values, locs, inserted, out=None):
+    """``values`` with ``inserted`` placed before the positions ``locs`` (sorted), copied into ``out``"""
+    if out is None:
+        out = np.empty(len(values) + len(locs), dtype=np.result_type(values, inserted))
+    bounds = np.concatenate([[0], locs, [len(values)]])
+    for offset, (start, stop) in enumerate(zip(bounds[:-1], bounds[1:])):
+        out[start + offset:stop + offset] = values[start:stop]
+    out[locs + np.arange(len(locs))] = inserted
+    return out
+
+def _splice(table, index, locs, rows, values):
+    """Copy of a table on ``index``: empty rows inserted before old rows ``locs``, ``values`` written to ``rows``"""
+    frame = table.to_frame() if isinstance(table, pd.Series) else table
+    # Column-major, so the frame below wraps the array without another copy
+    data = np.empty((frame.shape[1], len(index)), dtype=np.result_type(*frame.dtypes))
+    for position, (_, column) in enumerate(frame.items()):
+        _insert_rows(column.to_numpy(), locs, np.nan, out=data[position])
+    data[:, rows] = values.reshape(len(rows), -1).T
+    if isinstance(table, pd.Series):
+        return pd.Series(data[0], index=index, name=table.name)
+    spliced = pd.DataFrame(data.T, index=index, columns=table.columns, copy=False)
+    # Compact panels may mix float32 and float64 line items
+    return spliced if frame.dtypes.nunique() == 1 else spliced.astype(dict(frame.dtypes))
+
+class IncrementalAnalytics:
+    """A panel and its derived tables, kept current one batch of filings at a time"""
+
+    def __init__(self, panel):
+        if not panel.index.is_monotonic_increasing:
+            panel = panel.sort_index()
+        self.panel = panel
+        self.tables = {name: compute(panel) for name, (compute, _) in ANALYTICS.items()}
+        self.recomputed = {}
+
+    def apply(self, filings):
+        """Apply new or restated company-years, returning the keys that changed
+
+        ``recomputed`` records how many rows of each table were recomputed.
+        """
+        filings = _filing_rows(filings)
+        index = self.panel.index
+        companies = filings.index.get_level_values('Company')
+        years = filings.index.get_level_values('Year')
+        positions, found = _locate(index, companies, years)
+
+        same = np.zeros(len(filings), dtype=bool)
+        same[found] = _same_rows(self.panel.iloc[positions[found]].to_numpy(), filings[found].to_numpy())
+        changed, positions, found = filings[~same], positions[~same], found[~same]
+        self.recomputed = dict.fromkeys(ANALYTICS, 0)
+        if changed.empty:
+            return changed.index
+
+        # Old rows shift down by the number of new rows inserted before them
+        locs = positions[~found]
+        new_index = _insert_keys(index, locs, changed.index[~found]) if len(locs) else index
+        rows = positions + np.searchsorted(locs, positions, side='right')
+        rows[~found] = locs + np.arange(len(locs))
+        panel = _splice(self.panel, new_index, locs, rows, changed[self.panel.columns].to_numpy())
+
+        starts, stops = self._company_bounds(new_index, changed.index.get_level_values('Company'))
+        bases = self._base_rows(panel, starts, stops)
+        tables = {}
+        for name, (compute, reach) in ANALYTICS.items():
+            targets, inputs = self._dependents(rows, starts, stops, reach, bases)
+            rows_read = panel.iloc[inputs]
+            rows_read.index = rows_read.index.remove_unused_levels()
+            # Models keep their input's row order, so targets are found by position
+            values = compute(rows_read).to_numpy()[np.searchsorted(inputs, targets)]
+            tables[name] = _splice(self.tables[name], new_index, locs, targets, values)
+            self.recomputed[name] = len(targets)
+
+        self.panel = panel
+        self.tables = tables
+        return changed.index
+
+    def store(self, cache):
+        """Seed an AnalyticsCache with the current tables for the current panel"""
+        for name, table in self.tables.items():
+            cache.put(name, self.panel, table)
+
+    @staticmethod
+    def _company_bounds(index, companies):
+        """First and one-past-last row of each changed row's company"""
+        keys = _row_keys(index)
+        codes = index.levels[0].searchsorted(companies).astype(np.int64) * (len(index.levels[1]) + 1)
+        return np.searchsorted(keys, codes), np.searchsorted(keys, codes + len(index.levels[1]) + 1)
+
+    @staticmethod
+    def _base_rows(panel, starts, stops):
+        """Last trend base row of each changed row's company: the latest first non-NaN row over TREND_FIELDS
+
+        A line item with no value at all counts as based on the company's last
+        row, since any value filed for it becomes its base.
+        """
+        bases = np.empty(len(starts), dtype=np.int64)
+        values = panel[TREND_FIELDS]
+        for start in np.unique(starts):
+            stop = stops[starts == start][0]
+            reported = ~np.isnan(values.iloc[start:stop].to_numpy(dtype=float))
+            first = np.where(reported.any(axis=0), reported.argmax(axis=0), stop - start - 1)
+            bases[starts == start] = start + first.max()
+        return bases
+
+    @staticmethod
+    def _dependents(rows, starts, stops, reach, bases):
+        """Rows to recompute and the rows their computation reads, as sorted positions"""
+        if reach == 'row':
+            targets = np.unique(rows)
+            return targets, targets
+        if reach == 'prior':
+            # Year t feeds the score of t and t+1; each target also reads its prior year
+            following = rows + 1
+            targets = np.unique(np.concatenate([rows, following[following < stops]]))
+            previous = targets - 1
+            inputs = np.unique(np.concatenate([targets, previous[previous >= 0]]))
+            return targets, inputs
+        # Trend: whole company when a base row may have changed, otherwise just the row;
+        # either way the company's rows up to its base rows are read, so each item finds its base
+        rebased = rows <= bases
+        whole = [np.arange(start, stop) for start, stop in zip(starts[rebased], stops[rebased])]
+        targets = np.unique(np.concatenate([rows] + whole))
+        prefixes = [np.arange(start, base + 1) for start, base in zip(starts, bases)]
+        inputs = np.unique(np.concatenate([targets] + prefixes))
+        return targets, inputs
@@ -0,0 +1,158 @@
+"""
+Timing instrumentation for the dashboard.
+
+A process-wide Metrics registry records, for every named phase (page
+sections, data loading, analytics functions, figure building, chart
+serialization), the number of calls, total wall time, rows processed and a
+window of recent durations for latency percentiles, plus analytics cache
+hits and misses. The registry is exported as Prometheus text (for the node
+exporter's textfile collector) or appended to a JSON-lines log.
+
+    with METRICS.time('section.scores'):
+        ...
+
+    @timed('load_company_data')
+    def load_company_data(): ...
+"""
+
+import functools
+import json
+import os
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+
+import numpy as np
+import pandas as pd
+
+from fraud_data import write_atomic
+
+# Recent durations kept per phase for percentiles
+WINDOW = 2048
+QUANTILES = [0.5, 0.9, 0.95, 0.99]
+
+class _Phase:
+    def __init__(self):
+        self.calls = 0
+        self.seconds = 0.0
+        self.rows = 0
+        self.recent = deque(maxlen=WINDOW)
+
+class Metrics:
+    """Thread-safe registry of phase timings and cache hit/miss counts"""
+
+    def __init__(self):
+        self._phases = {}
+        self._cache = {}
+        self._lock = threading.Lock()
+
+    def record(self, name, seconds, rows=0):
+        with self._lock:
+            phase = self._phases.setdefault(name, _Phase())
+            phase.calls += 1
+            phase.seconds += seconds
+            phase.rows += rows
+            phase.recent.append(seconds)
+
+    @contextmanager
+    def time(self, name, rows=0):
+        """Time the enclosed block as one call of phase ``name``"""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(name, time.perf_counter() - start, rows)
+
+    def count_cache(self, name, hit):
+        with self._lock:
+            hits, misses = self._cache.get(name, (0, 0))
+            self._cache[name] = (hits + 1, misses) if hit else (hits, misses + 1)
+
+    def reset(self):
+        with self._lock:
+            self._phases.clear()
+            self._cache.clear()
+
+    def phases(self):
+        """One row per phase: calls, total and mean time, latency percentiles and rows processed"""
+        with self._lock:
+            items = [(name, phase.calls, phase.seconds, phase.rows, np.array(phase.recent))
+                     for name, phase in self._phases.items()]
+        rows = []
+        for name, calls, seconds, n_rows, recent in sorted(items):
+            quantiles = np.quantile(recent, QUANTILES) * 1e3
+            rows.append([name, calls, seconds, seconds / calls * 1e3, *quantiles, n_rows])
+        columns = ['Phase', 'Calls', 'Total_s', 'Mean_ms'] + [f"p{int(q * 100)}_ms" for q in QUANTILES] + ['Rows']
+        return pd.DataFrame(rows, columns=columns).set_index('Phase')
+
+    def cache(self):
+        """Hits, misses and hit rate for each analytics cache entry name"""
+        with self._lock:
+            items = sorted(self._cache.items())
+        table = pd.DataFrame([(name, hits, misses) for name, (hits, misses) in items],
+                             columns=['Table', 'Hits', 'Misses']).set_index('Table')
+        table['Hit_Rate'] = table['Hits'] / (table['Hits'] + table['Misses'])
+        return table
+
+    # Export
+
+    def prometheus_text(self, prefix='fraud_dashboard'):
+        """Registry in the Prometheus text exposition format"""
+        with self._lock:
+            phases = [(name, phase.calls, phase.seconds, phase.rows, np.array(phase.recent))
+                      for name, phase in sorted(self._phases.items())]
+            cache = sorted(self._cache.items())
+        lines = [f"# HELP {prefix}_phase_seconds Wall time of dashboard phases and analytics functions",
+                 f"# TYPE {prefix}_phase_seconds summary"]
+        for name, calls, seconds, _, recent in phases:
+            for q, value in zip(QUANTILES, np.quantile(recent, QUANTILES)):
+                lines.append(f'{prefix}_phase_seconds{{phase="{name}",quantile="{q}"}} {value:.6g}')
+            lines.append(f'{prefix}_phase_seconds_sum{{phase="{name}"}} {seconds:.6g}')
+            lines.append(f'{prefix}_phase_seconds_count{{phase="{name}"}} {calls}')
+        lines += [f"# HELP {prefix}_rows_processed_total Panel rows processed by each phase",
+                  f"# TYPE {prefix}_rows_processed_total counter"]
+        lines += [f'{prefix}_rows_processed_total{{phase="{name}"}} {rows}' for name, _, _, rows, _ in phases if rows]
+        lines += [f"# HELP {prefix}_cache_requests_total Analytics cache lookups by result",
+                  f"# TYPE {prefix}_cache_requests_total counter"]
+        for name, (hits, misses) in cache:
+            lines.append(f'{prefix}_cache_requests_total{{table="{name}",result="hit"}} {hits}')
+            lines.append(f'{prefix}_cache_requests_total{{table="{name}",result="miss"}} {misses}')
+        return '\n'.join(lines) + '\n'
+
+    def json_record(self):
+        """Registry as one JSON-serialisable record, stamped with the time and process"""
+        phases = self.phases()
+        return {
+            'timestamp': time.time(),
+            'pid': os.getpid(),
+            'phases': phases.reset_index().to_dict(orient='records'),
+            'cache': self.cache().reset_index().to_dict(orient='records'),
+        }
+
+    def export(self, path):
+        """Write Prometheus text (atomically replacing ``path``), or append a JSON line for .json/.jsonl paths"""
+        if path.lower().endswith(('.json', '.jsonl')):
+            with open(path, 'a', encoding='utf-8') as handle:
+                handle.write(json.dumps(self.json_record()) + '\n')
+            return
+        # Created with the umask's mode, like open(), so the node exporter can read it
+        write_atomic(path, self.prometheus_text())
+
+METRICS = Metrics()
+
+def _rows(value):
+    return len(value) if hasattr(value, '__len__') and not isinstance(value, str) else 0
+
+def timed(name, metrics=METRICS):
+    """Decorator timing every call of a function as phase ``name``
+
+    Rows processed are taken from the length of the first argument.
+    """
+    def decorate(function):
+        @functools.wraps(function)
+        def wrapper(*args, **kwargs):
+            with metrics.time(name, _rows(args[0]) if args else 0):
+                return function(*args, **kwargs)
+        return wrapper
+    return decorate
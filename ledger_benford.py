@@ -0,0 +1,190 @@
+"""
+Out-of-core Benford analysis of general ledger extracts.
+
+A ledger file (CSV or Parquet) is split into byte ranges or row groups that
+worker processes read independently, in bounded chunks, reducing each
+chunk to digit-count histograms. Histograms are additive, so the per-range
+results are merged by summation and the full ledger is never held in
+memory. The merged histograms feed the same statistics as the dashboard's
+Benford chart.
+
+Usage:
+    python ledger_benford.py ledger.csv --column Amount --workers 8
+"""
+
+import argparse
+import io
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import pandas as pd
+import numpy as np
+
+from benford import BENFORD_TESTS, digit_counts, benford_statistics, benford_distributions
+
+# Rows parsed at a time inside a worker
+LEDGER_CHUNK_ROWS = 500_000
+# Target size of the CSV byte range handed to one task
+LEDGER_RANGE_BYTES = 64 * 1024 * 1024
+# Nigrini excludes amounts below 10 from ledger digit tests
+LEDGER_MIN_AMOUNT = 10.0
+
+# =======================
+# HISTOGRAMS
+# =======================
+
+def empty_histograms():
+    """Zero digit counts for every Benford test"""
+    return {test: np.zeros(len(spec['digits']), dtype=np.int64) for test, spec in BENFORD_TESTS.items()}
+
+def amount_histograms(amounts, sign='positive', min_value=LEDGER_MIN_AMOUNT):
+    """Digit counts of one batch of amounts for every Benford test
+
+    ``sign`` selects which entries are tested: 'positive' (debits),
+    'negative' (credits, by magnitude) or 'absolute' (both).
+    """
+    amounts = np.asarray(amounts, dtype=np.float64)
+    if sign == 'negative':
+        amounts = -amounts
+    elif sign == 'absolute':
+        amounts = np.abs(amounts)
+    elif sign != 'positive':
+        raise ValueError(f"Unknown sign selection: {sign}")
+    return {test: digit_counts(amounts, test, min_value=min_value)[0] for test in BENFORD_TESTS}
+
+def merge_histograms(histograms):
+    """Sum an iterable of histogram dicts"""
+    merged = empty_histograms()
+    for histogram in histograms:
+        for test, counts in histogram.items():
+            merged[test] += counts
+    return merged
+
+# =======================
+# PARTITIONING
+# =======================
+
+def _is_parquet(path):
+    return os.path.splitext(path)[1].lower() in ('.parquet', '.pq')
+
+def _csv_ranges(path, range_bytes):
+    """Split a CSV file into (start, end) byte ranges aligned on line breaks, after the header
+
+    Assumes no quoted field spans several lines, which holds for flat
+    ledger extracts.
+    """
+    size = os.path.getsize(path)
+    with open(path, 'rb') as handle:
+        handle.readline()
+        start = handle.tell()
+        ranges = []
+        while start < size:
+            handle.seek(min(start + range_bytes, size))
+            handle.readline()
+            end = min(handle.tell(), size)
+            ranges.append((start, end))
+            start = end
+    return ranges
+
+class _RangeReader(io.RawIOBase):
+    """Read-only file view limited to a byte range"""
+
+    def __init__(self, path, start, end):
+        self._handle = open(path, 'rb')
+        self._handle.seek(start)
+        self._remaining = end - start
+
+    def readable(self):
+        return True
+
+    def readinto(self, buffer):
+        size = min(len(buffer), self._remaining)
+        if size <= 0:
+            return 0
+        read = self._handle.readinto(memoryview(buffer)[:size])
+        self._remaining -= read
+        return read
+
+    def close(self):
+        self._handle.close()
+        super().close()
+
+def _csv_header(path):
+    return pd.read_csv(path, nrows=0).columns.tolist()
+
+def _count_csv_range(path, start, end, names, column, sign, min_value, chunk_rows):
+    reader = io.BufferedReader(_RangeReader(path, start, end))
+    try:
+        chunks = pd.read_csv(reader, names=names, header=None, usecols=[column],
+                             dtype={column: np.float64}, chunksize=chunk_rows)
+        return merge_histograms(amount_histograms(chunk[column].to_numpy(), sign, min_value) for chunk in chunks)
+    finally:
+        reader.close()
+
+def _count_parquet_row_groups(path, row_groups, column, sign, min_value, chunk_rows):
+    import pyarrow.parquet as pq
+    parquet_file = pq.ParquetFile(path, memory_map=True)
+    batches = parquet_file.iter_batches(batch_size=chunk_rows, row_groups=row_groups, columns=[column])
+    return merge_histograms(
+        amount_histograms(batch.column(0).to_numpy(zero_copy_only=False), sign, min_value) for batch in batches
+    )
+
+def _ledger_tasks(path, column, sign, min_value, chunk_rows, range_bytes):
+    """(function, args) pairs that together cover the whole ledger"""
+    if _is_parquet(path):
+        import pyarrow.parquet as pq
+        n_groups = pq.ParquetFile(path).num_row_groups
+        return [(_count_parquet_row_groups, (path, [group], column, sign, min_value, chunk_rows))
+                for group in range(n_groups)]
+    names = _csv_header(path)
+    if column not in names:
+        raise KeyError(f"Column '{column}' not found in {path}")
+    return [(_count_csv_range, (path, start, end, names, column, sign, min_value, chunk_rows))
+            for start, end in _csv_ranges(path, range_bytes)]
+
+def _run_task(task):
+    function, args = task
+    return function(*args)
+
+# =======================
+# PIPELINE
+# =======================
+
+def ledger_histograms(path, column='Amount', sign='positive', min_value=LEDGER_MIN_AMOUNT,
+                      workers=None, chunk_rows=LEDGER_CHUNK_ROWS, range_bytes=LEDGER_RANGE_BYTES):
+    """Digit-count histograms of a ledger's amount column for every Benford test
+
+    The file is partitioned into independent ranges that ``workers``
+    processes (default: CPU count) read and count in chunks of
+    ``chunk_rows``; only the small per-range histograms travel back to be
+    merged. ``workers=1`` runs in-process.
+    """
+    tasks = _ledger_tasks(path, column, sign, min_value, chunk_rows, range_bytes)
+    if workers == 1 or len(tasks) <= 1:
+        return merge_histograms(_run_task(task) for task in tasks)
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        return merge_histograms(pool.map(_run_task, tasks))
+
+def ledger_benford_analysis(histograms, test='first'):
+    """Benford chart inputs from merged ledger histograms
+
+    Returns ``(actual_dist, expected_dist, chi_square, compliant, summary)``,
+    the same values the dashboard's Benford chart is drawn from.
+    """
+    return benford_distributions(histograms[test], test)
+
+def main():
+    parser = argparse.ArgumentParser(description="Benford digit tests over a general ledger extract")
+    parser.add_argument('path', help="ledger file (CSV or Parquet)")
+    parser.add_argument('--column', default='Amount', help="amount column (default: Amount)")
+    parser.add_argument('--sign', choices=['positive', 'negative', 'absolute'], default='positive')
+    parser.add_argument('--min-value', type=float, default=LEDGER_MIN_AMOUNT)
+    parser.add_argument('--workers', type=int, default=None)
+    args = parser.parse_args()
+
+    histograms = ledger_histograms(args.path, args.column, args.sign, args.min_value, args.workers)
+    rows = {test: benford_statistics(counts, test)[1].iloc[0] for test, counts in histograms.items()}
+    print(pd.DataFrame(rows).T[['N', 'Chi_Square', 'Critical', 'Compliant', 'MAD', 'Conformity']].to_string())
+
+if __name__ == '__main__':
+    main()
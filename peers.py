@@ -0,0 +1,91 @@
+"""
+Industry peer percentiles.
+
+Each company-year is ranked against the other companies in its industry in
+the same fiscal year, for every ratio from calculate_all_ratios, every
+Altman variant and the Beneish M-Score. PeerIndex sorts every (industry,
+year, metric) peer set once when it is built; a percentile lookup is then
+two binary searches in that group's slice of the sorted array.
+"""
+
+import numpy as np
+import pandas as pd
+
+from fraud_data import COMPANY_CHUNK, iter_company_panels
+from fraud_models import calculate_altman_variants, calculate_beneish_m_score, calculate_all_ratios
+
+# Peer group for companies without an industry in the metadata
+UNCLASSIFIED = 'Unclassified'
+
+def peer_metrics(panel, ratios=None, altman=None, m_scores=None):
+    """Metrics ranked against peers: every ratio, Altman variant and M_Score, one row per company-year"""
+    metrics = (calculate_all_ratios(panel) if ratios is None else ratios).copy()
+    altman = calculate_altman_variants(panel) if altman is None else altman
+    for variant in altman:
+        metrics[variant] = altman[variant]
+    metrics['M_Score'] = calculate_beneish_m_score(panel) if m_scores is None else m_scores
+    return metrics
+
+def universe_peer_metrics(path, chunk_companies=COMPANY_CHUNK):
+    """peer_metrics of every company in a fundamentals file, computed ``chunk_companies`` at a time"""
+    return pd.concat([peer_metrics(panel) for panel in iter_company_panels(path, chunk_companies)])
+
+def company_industries(metadata):
+    """Industry of each company, with missing industries grouped as UNCLASSIFIED"""
+    industries = metadata['industry'] if 'industry' in metadata else pd.Series('', index=metadata.index)
+    return industries.fillna('').replace('', UNCLASSIFIED)
+
+class PeerIndex:
+    """Sorted metric values per (industry, year, metric) for percentile lookups"""
+
+    def __init__(self, metrics, industries):
+        # Group ids from the index codes, without materialising a label per row
+        index = metrics.index
+        industry_codes, industry_names = pd.factorize(industries.reindex(index.levels[0]).fillna(UNCLASSIFIED))
+        years = index.levels[1]
+        keys, group_ids = np.unique(industry_codes[index.codes[0]].astype(np.int64) * len(years) + index.codes[1],
+                                    return_inverse=True)
+        groups = [(industry_names[key // len(years)], years[key % len(years)]) for key in keys]
+        self.groups = {group: position for position, group in enumerate(groups)}
+        self.metrics = list(metrics.columns)
+        id_dtype = np.min_scalar_type(max(len(groups) - 1, 0))
+        self._sorted = {}
+        self._offsets = {}
+        for metric in self.metrics:
+            values = metrics[metric].to_numpy(dtype=float)
+            valid = np.isfinite(values)
+            values, ids = values[valid], group_ids[valid]
+            # Sort by value, then stably by group: a radix sort on the small group ids
+            by_value = np.argsort(values)
+            order = by_value[np.argsort(ids[by_value].astype(id_dtype), kind='stable')]
+            self._sorted[metric] = values[order]
+            self._offsets[metric] = np.searchsorted(ids[order], np.arange(len(groups) + 1))
+
+    def peers(self, industry, year, metric):
+        """Sorted values of one metric across an industry's companies in one year"""
+        group = self.groups.get((industry, year))
+        if group is None:
+            return np.empty(0)
+        offsets = self._offsets[metric]
+        return self._sorted[metric][offsets[group]:offsets[group + 1]]
+
+    def percentile(self, industry, year, metric, value):
+        """Percentile of ``value`` among an industry's companies in one year, and the number of peers
+
+        Ties count half, so the median company sits at the 50th percentile.
+        """
+        peers = self.peers(industry, year, metric)
+        if not len(peers) or not np.isfinite(value):
+            return np.nan, len(peers)
+        below = np.searchsorted(peers, value, side='left')
+        at_or_below = np.searchsorted(peers, value, side='right')
+        return 100 * (below + at_or_below) / (2 * len(peers)), len(peers)
+
+    def company_percentiles(self, industry, year, values):
+        """Value, Percentile and Peers for each metric of one company-year"""
+        rows = []
+        for metric in self.metrics:
+            value = values.get(metric, np.nan)
+            percentile, n_peers = self.percentile(industry, year, metric, value)
+            rows.append((metric, value, percentile, n_peers))
+        return pd.DataFrame(rows, columns=['Metric', 'Value', 'Percentile', 'Peers']).set_index('Metric')
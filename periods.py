@@ -0,0 +1,96 @@
+"""
+Quarterly filings: trailing-twelve-month rollups and rolling ratio z-scores.
+
+A quarterly panel is indexed by (Company, Year, Quarter) (read one with
+``read_fundamentals(path, quarterly=True)``). ttm_panel turns it into
+trailing-twelve-month (TTM) figures that the annual models score directly;
+on quarterly panels the Beneish M-Score compares each quarter with the same
+quarter of the prior year.
+
+rolling_zscores flags sudden moves in any derived table (ratios, common-size
+figures, scores): each value is compared with the mean and spread of the
+same company's preceding periods. Both are grouped shift and cumulative-sum
+operations over the whole panel, with no loop over companies.
+
+    ttm = ttm_panel(read_fundamentals('filings.parquet', quarterly=True))
+    anomalies = rolling_zscores(calculate_all_ratios(ttm)).abs() > 3
+"""
+
+import numpy as np
+import pandas as pd
+
+from fraud_models import quarter_numbers
+
+# Income-statement and cash-flow items, summed over four quarters for TTM;
+# every other line item is a balance (or market value) taken at quarter end
+FLOW_FIELDS = ['Revenue', 'COGS', 'SGA', 'EBIT', 'Net_Income', 'Depreciation', 'CFO']
+
+# Preceding periods a value is compared with, and how many must be present
+ROLLING_WINDOW = 8
+ROLLING_MIN_PERIODS = 4
+
+def ttm_panel(quarterly, complete=True):
+    """Trailing-twelve-month panel of a quarterly panel
+
+    Flow items are summed over each quarter and the three before it;
+    balance-sheet items are the quarter-end values. A quarter without the
+    three consecutive quarters before it has no TTM flows and is dropped
+    when ``complete`` (otherwise its flows are NaN).
+    """
+    if not quarterly.index.is_monotonic_increasing:
+        quarterly = quarterly.sort_index()
+    flows = [field for field in FLOW_FIELDS if field in quarterly.columns]
+    grouped = quarterly[flows].groupby(level='Company', sort=False)
+    trailing = quarterly[flows] + grouped.shift(1) + grouped.shift(2) + grouped.shift(3)
+
+    periods = pd.Series(quarter_numbers(quarterly.index), index=quarterly.index)
+    consecutive = periods - periods.groupby(level='Company', sort=False).shift(3) == 3
+    ttm = quarterly.copy()
+    ttm[flows] = trailing.where(consecutive, axis=0).astype(quarterly[flows].dtypes.to_dict())
+    if complete:
+        ttm = ttm[consecutive.to_numpy()]
+        ttm.index = ttm.index.remove_unused_levels()
+    return ttm
+
+def rolling_zscores(table, window=ROLLING_WINDOW, min_periods=ROLLING_MIN_PERIODS):
+    """z-score of every value against the same company's preceding ``window`` periods
+
+    The current value is excluded from its own baseline, so a sudden jump
+    stands out. Non-finite values (e.g. a ratio over a zero denominator) are
+    skipped; a z-score needs ``min_periods`` finite values in the window and
+    a non-zero spread, otherwise it is NaN. Rows must be grouped by company
+    in period order, as panels are.
+    """
+    frame = table.to_frame() if isinstance(table, pd.Series) else table
+    values = frame.to_numpy(dtype=np.float64)
+    valid = np.isfinite(values)
+    n_rows = len(frame)
+    codes = frame.index.codes[frame.index.names.index('Company')]
+    starts = np.flatnonzero(np.r_[True, codes[1:] != codes[:-1]]) if n_rows else np.empty(0, dtype=np.int64)
+    sizes = np.diff(np.r_[starts, n_rows])
+    company = np.repeat(np.arange(len(starts)), sizes)
+    first_row = np.repeat(starts, sizes)
+
+    # Deviations from each company's own mean keep the running sums small
+    counts = np.add.reduceat(valid, starts, axis=0) if n_rows else valid
+    totals = np.add.reduceat(np.where(valid, values, 0), starts, axis=0) if n_rows else values
+    centre = np.repeat(totals / np.maximum(counts, 1), sizes, axis=0)
+    deviation = np.where(valid, values - centre, 0)
+
+    # Per-company running totals, differenced over the rows [row - window, row - 1]
+    running = [pd.DataFrame(part).groupby(company).cumsum().to_numpy()
+               for part in (valid.astype(np.float64), deviation, deviation ** 2)]
+    rows = np.arange(n_rows)
+    last = rows - 1
+    before = np.maximum(rows - window, first_row) - 1
+    has_last, has_before = (last >= first_row)[:, None], (before >= first_row)[:, None]
+    n, s1, s2 = [np.where(has_last, total[last.clip(0)], 0) - np.where(has_before, total[before.clip(0)], 0)
+                 for total in running]
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        mean = s1 / n
+        spread = np.sqrt(np.maximum(s2 - s1 * mean, 0) / (n - 1))
+        z_scores = (deviation - mean) / spread
+    z_scores[~valid | (n < max(min_periods, 2)) | ~(spread > 0)] = np.nan
+    result = pd.DataFrame(z_scores, index=frame.index, columns=frame.columns)
+    return result.iloc[:, 0].rename(table.name) if isinstance(table, pd.Series) else result
@@ -0,0 +1,147 @@
+"""
+Declarative red-flag rules.
+
+A rule is plain data: a field, a comparison, a threshold and a severity.
+Rules are evaluated as boolean masks over whole columns, so one call
+produces the flag matrix for every company-year of a panel. Custom rule
+sets are loaded from JSON files of the form
+
+    [
+        {"name": "Low_Net_Profit_Margin", "label": "📉 Low Net Profit Margin",
+         "field": "Net_Profit_Margin", "op": "<", "threshold": 5, "severity": "medium"},
+        ...
+    ]
+
+Fields may be any panel line item (Total_Equity, CFO, ...), any ratio from
+calculate_all_ratios, Z_Score, M_Score, a Beneish component (DSRI, ...) or
+Altman_Distress_Margin: the company-year's score under its company's
+assigned Altman variant minus that variant's distress cut-off, so it is
+negative exactly when the gauge shows the distress zone.
+"""
+
+import json
+import operator
+
+import pandas as pd
+import numpy as np
+
+from fraud_models import (
+    ALTMAN_VARIANTS, assigned_altman_scores, calculate_altman_variants, calculate_altman_z_score,
+    calculate_beneish_components, calculate_all_ratios, BENEISH_COMPONENTS
+)
+
+OPERATORS = {
+    '<': operator.lt,
+    '<=': operator.le,
+    '>': operator.gt,
+    '>=': operator.ge,
+    '==': operator.eq,
+    '!=': operator.ne
+}
+
+SEVERITIES = ['low', 'medium', 'high', 'critical']
+# Rule fields derived from the Altman variants rather than read from a table
+ALTMAN_FIELDS = {'Altman_Score', 'Altman_Distress_Margin'}
+
+DEFAULT_RULES = [
+    {'name': 'Low_Net_Profit_Margin', 'label': "📉 Low Net Profit Margin",
+     'field': 'Net_Profit_Margin', 'op': '<', 'threshold': 5, 'severity': 'medium'},
+    {'name': 'Liquidity_Crisis', 'label': "💧 Liquidity Crisis",
+     'field': 'Current_Ratio', 'op': '<', 'threshold': 1.0, 'severity': 'high'},
+    {'name': 'High_Leverage', 'label': "⚖️ High Leverage",
+     'field': 'Debt_to_Equity', 'op': '>', 'threshold': 2.0, 'severity': 'medium'},
+    {'name': 'Bankruptcy_Risk', 'label': "⚠️ Bankruptcy Risk",
+     'field': 'Altman_Distress_Margin', 'op': '<', 'threshold': 0, 'severity': 'high'},
+    {'name': 'Negative_Equity', 'label': "🚨 Negative Equity",
+     'field': 'Total_Equity', 'op': '<', 'threshold': 0, 'severity': 'critical'}
+]
+
+def validate_rules(rules):
+    """Check a rule set, returning it with defaults filled in"""
+    checked = []
+    names = set()
+    for position, rule in enumerate(rules):
+        missing = {'name', 'field', 'op', 'threshold'} - set(rule)
+        if missing:
+            raise ValueError(f"Rule {position} is missing {', '.join(sorted(missing))}")
+        if rule['op'] not in OPERATORS:
+            raise ValueError(f"Rule {rule['name']}: unknown operator {rule['op']!r}")
+        severity = rule.get('severity', 'medium')
+        if severity not in SEVERITIES:
+            raise ValueError(f"Rule {rule['name']}: unknown severity {severity!r}")
+        if rule['name'] in names:
+            raise ValueError(f"Duplicate rule name {rule['name']}")
+        names.add(rule['name'])
+        checked.append({**rule, 'label': rule.get('label', rule['name']), 'severity': severity,
+                        'threshold': float(rule['threshold'])})
+    return checked
+
+def load_rules(path):
+    """Rule set from a JSON file"""
+    with open(path, encoding='utf-8') as handle:
+        return validate_rules(json.load(handle))
+
+def rule_inputs(df, fields, ratios=None, z_scores=None, beneish=None, altman=None, variants=None):
+    """Frame holding every field referenced by a rule set, one row per company-year
+
+    Ratios, scores and Beneish components are only computed when a rule
+    needs them and they were not passed in. ``variants`` maps companies to
+    their assigned Altman variant (see assign_altman_variants); companies
+    without one are scored with the original Z-Score.
+    """
+    inputs = pd.DataFrame(index=df.index)
+    fields = set(fields)
+    panel_fields = [f for f in df.columns if f in fields]
+    if panel_fields:
+        inputs[panel_fields] = df[panel_fields]
+    ratio_fields = fields - set(panel_fields) - {'Z_Score', 'M_Score'} - set(BENEISH_COMPONENTS) - ALTMAN_FIELDS
+    if ratio_fields:
+        if ratios is None:
+            ratios = calculate_all_ratios(df)
+        unknown = ratio_fields - set(ratios.columns)
+        if unknown:
+            raise KeyError(f"Unknown rule field(s): {', '.join(sorted(unknown))}")
+        inputs[sorted(ratio_fields)] = ratios[sorted(ratio_fields)]
+    if 'Z_Score' in fields:
+        inputs['Z_Score'] = calculate_altman_z_score(df) if z_scores is None else z_scores
+    if fields & ALTMAN_FIELDS:
+        altman = calculate_altman_variants(df) if altman is None else altman
+        variants = pd.Series(dtype=object) if variants is None else pd.Series(variants, dtype=object)
+        assigned = assigned_altman_scores(altman, variants)
+        distress = {name: spec['zones'][0] for name, spec in ALTMAN_VARIANTS.items()}
+        inputs['Altman_Score'] = assigned['Altman_Score']
+        inputs['Altman_Distress_Margin'] = assigned['Altman_Score'] - assigned['Altman_Variant'].map(distress)
+    beneish_fields = fields & ({'M_Score'} | set(BENEISH_COMPONENTS))
+    if beneish_fields:
+        if beneish is None:
+            beneish = calculate_beneish_components(df)
+        inputs[sorted(beneish_fields)] = beneish[sorted(beneish_fields)]
+    return inputs
+
+def evaluate_rules(inputs, rules):
+    """Boolean flag matrix: one column per rule, one row per company-year
+
+    Missing values never raise a flag.
+    """
+    flags = {}
+    for rule in rules:
+        values = inputs[rule['field']]
+        flags[rule['name']] = OPERATORS[rule['op']](values, rule['threshold']) & values.notna()
+    return pd.DataFrame(flags, index=inputs.index)
+
+def calculate_red_flags(df, rules=DEFAULT_RULES, ratios=None, z_scores=None, beneish=None, altman=None, variants=None):
+    """Red-flag matrix for every company-year of a panel, judging Altman distress by each company's ``variants``"""
+    rules = validate_rules(rules)
+    inputs = rule_inputs(df, [rule['field'] for rule in rules], ratios, z_scores, beneish, altman, variants)
+    return evaluate_rules(inputs, rules)
+
+def flag_summary(flags, rules=DEFAULT_RULES):
+    """Flag count and highest severity for every company-year"""
+    rules = validate_rules(rules)
+    levels = np.array([SEVERITIES.index(rule['severity']) for rule in rules])
+    hits = flags[[rule['name'] for rule in rules]].to_numpy()
+    highest = np.where(hits, levels, -1).max(axis=1) if len(rules) else np.full(len(flags), -1)
+    summary = pd.DataFrame(index=flags.index)
+    summary['Red_Flag_Count'] = hits.sum(axis=1)
+    summary['Max_Severity'] = np.where(highest >= 0, np.array(SEVERITIES, dtype=object)[highest.clip(0)], None)
+    return summary
@@ -0,0 +1,343 @@
+"""
+Local HTTP scoring API.
+
+Serves the dashboard's models as JSON without Streamlit. The universe is
+loaded and scored once at startup (Altman variants, Beneish M-Score and
+components, ratios, red flags, Benford first-digit test); requests are then
+lookups in an in-memory index keyed by (company, year). Encoded responses
+are kept in an LRU cache, so repeat queries only copy bytes.
+
+Endpoints:
+    GET  /health                          status, companies and company-years loaded
+    GET  /companies                       every company with its years and Altman variant
+    GET  /score?company=X&year=2001       one company-year (all years if ``year`` is omitted)
+    POST /batch                           {"queries": [{"company": "X", "year": 2001}, {"company": "Y"}]}
+
+Usage:
+    python scoring_api.py universe.parquet --metadata companies.csv --port 8765
+    python scoring_api.py                      # built-in case studies
+"""
+
+import argparse
+import json
+import threading
+import time
+from collections import OrderedDict
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+import numpy as np
+
+from fraud_data import load_builtin_universe, read_fundamentals, read_company_metadata
+from fraud_models import (
+    ALTMAN_VARIANTS, BENEISH_COMPONENTS, assign_altman_variants, assigned_altman_scores,
+    calculate_altman_variants, calculate_beneish_components, calculate_all_ratios, altman_zone
+)
+from benford import BENFORD_FIELDS, benford_by_group
+from red_flags import DEFAULT_RULES, calculate_red_flags, load_rules, validate_rules
+
+# Beneish threshold above which a company-year is a likely manipulator
+M_SCORE_THRESHOLD = -1.78
+
+DEFAULT_PORT = 8765
+DEFAULT_CACHE_SIZE = 10_000
+# Largest request body and batch accepted
+MAX_BODY_BYTES = 1 << 20
+MAX_BATCH = 1_000
+
+def _number(value):
+    """JSON-ready float, with NaN and infinities as null"""
+    value = float(value)
+    return value if np.isfinite(value) else None
+
+def _values(array):
+    """JSON-ready list of floats, with NaN and infinities as null"""
+    return [_number(value) for value in array.tolist()]
+
+class ScoringIndex:
+    """Every score of a panel, looked up by (company, year)
+
+    Tables are held as row-major float blocks; a company-year's JSON record
+    is assembled from its rows on request.
+    """
+
+    def __init__(self, panel, metadata, rules=DEFAULT_RULES):
+        rules = validate_rules(rules)
+        if not panel.index.is_monotonic_increasing:
+            panel = panel.sort_index()
+        altman = calculate_altman_variants(panel)
+        beneish = calculate_beneish_components(panel)
+        ratios = calculate_all_ratios(panel)
+        companies = panel.index.get_level_values('Company').unique()
+        self.variants = assign_altman_variants(metadata.reindex(companies), panel)
+        flags = calculate_red_flags(panel, rules, ratios, altman['Z_Score'], beneish, altman, self.variants)
+        _, benford = benford_by_group(panel, BENFORD_FIELDS, by='Company')
+        assigned = assigned_altman_scores(altman, self.variants)
+
+        self.ratio_names = list(ratios.columns)
+        self._altman = altman.to_numpy(dtype=np.float64)
+        self._assigned = assigned['Altman_Score'].to_numpy(dtype=np.float64)
+        self._assigned_zone = assigned['Altman_Zone'].to_numpy()
+        self._z_zone = altman_zone(altman['Z_Score']).to_numpy()
+        self._beneish = beneish[BENEISH_COMPONENTS + ['M_Score']].to_numpy(dtype=np.float64)
+        self._ratios = ratios.to_numpy(dtype=np.float64)
+        self._flags = flags[[rule['name'] for rule in rules]].to_numpy(dtype=bool)
+        self._rules = [{'name': rule['name'], 'label': rule['label'], 'severity': rule['severity']} for rule in rules]
+        self._benford = {
+            company: {'n': int(row['N']), 'chi_square': _number(row['Chi_Square']),
+                      'critical': _number(row['Critical']), 'compliant': bool(row['Compliant']),
+                      'mad': _number(row['MAD']), 'conformity': row['Conformity']}
+            for company, row in benford.iterrows()
+        }
+
+        # (company, year) -> row, and each company's rows in year order
+        index = panel.index
+        company_names = index.get_level_values('Company').tolist()
+        years = index.get_level_values('Year').astype(int).tolist()
+        self.rows = {key: position for position, key in enumerate(zip(company_names, years))}
+        self.years = {}
+        for company, year in zip(company_names, years):
+            self.years.setdefault(company, []).append(year)
+
+    def __len__(self):
+        return len(self.rows)
+
+    def record(self, company, year):
+        """Scores of one company-year as a JSON-ready dict; KeyError if it is not in the panel"""
+        row = self.rows[(company, year)]
+        variant = self.variants[company]
+        m_score = self._beneish[row, -1]
+        return {
+            'company': company,
+            'year': year,
+            'altman': {
+                'variant': variant,
+                'model': ALTMAN_VARIANTS[variant]['symbol'],
+                'score': _number(self._assigned[row]),
+                'zone': self._assigned_zone[row],
+                'variants': dict(zip(ALTMAN_VARIANTS, _values(self._altman[row]))),
+            },
+            'z_score': _number(self._altman[row, 0]),
+            'z_zone': self._z_zone[row],
+            'beneish': {
+                'm_score': _number(m_score),
+                'likely_manipulator': bool(m_score > M_SCORE_THRESHOLD),
+                'components': dict(zip(BENEISH_COMPONENTS, _values(self._beneish[row, :-1]))),
+            },
+            'ratios': dict(zip(self.ratio_names, _values(self._ratios[row]))),
+            'red_flags': [rule for rule, hit in zip(self._rules, self._flags[row]) if hit],
+            'benford': self._benford.get(company),
+        }
+
+    def company_records(self, company):
+        """Records of every year of a company; KeyError if it is not in the panel"""
+        return [self.record(company, year) for year in self.years[company]]
+
+    def companies(self):
+        return [{'company': company, 'years': years, 'altman_variant': self.variants[company]}
+                for company, years in self.years.items()]
+
+class ResponseCache:
+    """Bounded LRU cache of encoded JSON responses"""
+
+    def __init__(self, max_entries=DEFAULT_CACHE_SIZE):
+        self.max_entries = max_entries
+        self.hits = self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key, build):
+        """Cached bytes for ``key``, encoding ``build()`` on a miss"""
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return self._entries[key]
+        encoded = json.dumps(build(), ensure_ascii=False, allow_nan=False).encode()
+        with self._lock:
+            self.misses += 1
+            self._entries[key] = encoded
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return encoded
+
+    def __len__(self):
+        return len(self._entries)
+
+class QueryError(Exception):
+    """A bad or unanswerable query, with the HTTP status to report it with"""
+
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+
+# =======================
+# HTTP SERVICE
+# =======================
+
+def parse_query(company, year):
+    """(company, year or None) from a query's raw values"""
+    if not isinstance(company, str) or not company:
+        raise QueryError(400, "company is required")
+    if year is None or year == '':
+        return company, None
+    try:
+        return company, int(year)
+    except (TypeError, ValueError):
+        raise QueryError(400, f"year must be an integer, got {year!r}") from None
+
+def score(index, cache, company, year=None):
+    """Encoded record of a company-year, or of all the company's years when ``year`` is None"""
+    if company not in index.years:
+        raise QueryError(404, f"unknown company {company!r}")
+    if year is not None and (company, year) not in index.rows:
+        raise QueryError(404, f"no {year} data for {company!r}")
+    if year is None:
+        return cache.get((company, None), lambda: {'company': company, 'years': index.company_records(company)})
+    return cache.get((company, year), lambda: index.record(company, year))
+
+def score_batch(index, cache, queries):
+    """Encoded batch response: one record or error per query, in order"""
+    if not isinstance(queries, list):
+        raise QueryError(400, "queries must be a list")
+    if len(queries) > MAX_BATCH:
+        raise QueryError(400, f"at most {MAX_BATCH} queries per batch")
+    results = []
+    for query in queries:
+        try:
+            if not isinstance(query, dict):
+                raise QueryError(400, "each query must be an object")
+            results.append(score(index, cache, *parse_query(query.get('company'), query.get('year'))))
+        except QueryError as error:
+            results.append(json.dumps({'error': str(error), 'status': error.status}).encode())
+    return b'{"results":[' + b','.join(results) + b']}'
+
+class ScoringHandler(BaseHTTPRequestHandler):
+    """Routes requests to the server's ScoringIndex and ResponseCache"""
+
+    protocol_version = 'HTTP/1.1'
+    server_version = 'FraudScoring/1'
+    # Keep-alive responses go out as headers then body; without TCP_NODELAY
+    # the body waits on the client's delayed ACK (~40 ms per request)
+    disable_nagle_algorithm = True
+
+    def do_GET(self):
+        self.respond(self.get_body)
+
+    def do_POST(self):
+        self.respond(self.post_body)
+
+    def respond(self, handle):
+        """Send ``handle()``'s body, a QueryError as its JSON error, and anything else as a 500"""
+        try:
+            body = handle()
+        except QueryError as error:
+            return self.send_error_json(error)
+        except Exception as error:
+            self.log_error("internal error on %s: %r", self.path, error)
+            # The request body may be partly unread, so the connection cannot be reused
+            self.close_connection = True
+            return self.send_error_json(QueryError(500, "internal server error"))
+        self.send_json(body)
+
+    def get_body(self):
+        url = urlsplit(self.path)
+        params = {name: values[-1] for name, values in parse_qs(url.query).items()}
+        index, cache = self.server.index, self.server.cache
+        if url.path == '/health':
+            return json.dumps({'status': 'ok', 'companies': len(index.years), 'rows': len(index),
+                               'cache_entries': len(cache), 'cache_hits': cache.hits,
+                               'cache_misses': cache.misses}).encode()
+        if url.path == '/companies':
+            return cache.get(('/companies',), lambda: {'companies': index.companies()})
+        if url.path == '/score':
+            return score(index, cache, *parse_query(params.get('company'), params.get('year')))
+        raise QueryError(404, f"no endpoint {url.path}")
+
+    def post_body(self):
+        url = urlsplit(self.path)
+        if url.path != '/batch':
+            raise QueryError(404, f"no endpoint {url.path}")
+        length = self.content_length()
+        try:
+            request = json.loads(self.rfile.read(length) or b'{}')
+        except ValueError:
+            raise QueryError(400, "body must be JSON") from None
+        if not isinstance(request, dict):
+            raise QueryError(400, "body must be a JSON object")
+        return score_batch(self.server.index, self.server.cache, request.get('queries'))
+
+    def content_length(self):
+        """The request's Content-Length, checked to be a whole number within MAX_BODY_BYTES"""
+        header = self.headers.get('Content-Length')
+        if header is None:
+            # Unknown lengths (e.g. chunked bodies) would leave the body unread
+            self.close_connection = True
+            raise QueryError(411, "Content-Length required")
+        header = header.strip()
+        if not header.isdigit():
+            self.close_connection = True
+            raise QueryError(400, "Content-Length must be a non-negative integer")
+        length = int(header)
+        if length > MAX_BODY_BYTES:
+            self.close_connection = True
+            raise QueryError(413, f"request body larger than {MAX_BODY_BYTES} bytes")
+        return length
+
+    def send_json(self, body, status=200):
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json; charset=utf-8')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def send_error_json(self, error):
+        self.send_json(json.dumps({'error': str(error)}).encode(), error.status)
+
+    def log_message(self, format, *args):
+        if self.server.verbose:
+            super().log_message(format, *args)
+
+class ScoringServer(ThreadingHTTPServer):
+    """Threaded HTTP server holding one scored universe"""
+
+    daemon_threads = True
+
+    def __init__(self, address, index, cache_size=DEFAULT_CACHE_SIZE, verbose=False):
+        super().__init__(address, ScoringHandler)
+        self.index = index
+        self.cache = ResponseCache(cache_size)
+        self.verbose = verbose
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve fraud scores for a universe as a local JSON API")
+    parser.add_argument('universe', nargs='?', help="fundamentals file (CSV or Parquet); built-in case studies if omitted")
+    parser.add_argument('--metadata', help="company metadata (CSV/Parquet) for choosing each company's Altman variant")
+    parser.add_argument('--rules', help="red-flag rule set (JSON); built-in rules if omitted")
+    parser.add_argument('--host', default='127.0.0.1', help="interface to listen on (default: localhost only)")
+    parser.add_argument('--port', type=int, default=DEFAULT_PORT)
+    parser.add_argument('--cache-size', type=int, default=DEFAULT_CACHE_SIZE, help="responses kept in the LRU cache")
+    parser.add_argument('--verbose', action='store_true', help="log every request")
+    args = parser.parse_args()
+    if args.metadata and not args.universe:
+        parser.error("--metadata needs a universe file")
+
+    start = time.perf_counter()
+    if args.universe:
+        panel, metadata = read_fundamentals(args.universe), read_company_metadata(args.universe, args.metadata)
+    else:
+        panel, metadata = load_builtin_universe()
+    rules = load_rules(args.rules) if args.rules else DEFAULT_RULES
+    index = ScoringIndex(panel, metadata, rules)
+    server = ScoringServer((args.host, args.port), index, args.cache_size, args.verbose)
+    print(f"Scored {len(index)} company-years for {len(index.years)} companies in "
+          f"{time.perf_counter() - start:.1f}s; serving on http://{args.host}:{args.port}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,181 @@
+"""
+Monte Carlo sensitivity of the Altman Z-Score and Beneish M-Score.
+
+Line items that are uncertain or often restated (Market_Cap is book equity
+for IL&FS, receivables are restated in most of the case studies) are
+multiplied by random factors drawn from configurable distributions. Every
+scenario of every company-year is scored at once: the perturbed line items
+are (scenarios x rows) arrays fed to the models' own formulas, so there is
+no Python loop over scenarios. Perturbations are plain data, loaded from
+JSON files of the form
+
+    [
+        {"field": "Market_Cap", "dist": "lognormal", "sigma": 0.3},
+        {"field": "Receivables", "dist": "uniform", "low": 0.8, "high": 1.1},
+        ...
+    ]
+
+Each draw is independent per scenario, company-year and line item; the
+prior year used by the M-Score is the same perturbed row as in its own
+year's score.
+"""
+
+import json
+
+import numpy as np
+import pandas as pd
+
+from fraud_models import (
+    calculate_altman_z_score, beneish_indices, quarter_numbers, BENEISH_COMPONENTS, BENEISH_WEIGHTS,
+    BENEISH_INTERCEPT
+)
+
+Z_DISTRESS = 1.81
+M_MANIPULATOR = -1.78
+
+# Line items read by the two scores
+SCORE_FIELDS = ['Revenue', 'COGS', 'SGA', 'EBIT', 'Net_Income', 'Total_Assets', 'Current_Assets',
+                'Fixed_Assets', 'Current_Liabilities', 'Total_Debt', 'Total_Equity', 'Receivables',
+                'Retained_Earnings', 'Market_Cap', 'Depreciation', 'CFO']
+
+# Multiplicative factors with mean 1 (uniform: between low and high)
+DISTRIBUTIONS = {
+    'normal': ('sigma',),
+    'lognormal': ('sigma',),
+    'uniform': ('low', 'high'),
+}
+
+DEFAULT_PERTURBATIONS = [
+    {'field': 'Market_Cap', 'dist': 'lognormal', 'sigma': 0.30},
+    {'field': 'Receivables', 'dist': 'normal', 'sigma': 0.10},
+    {'field': 'Revenue', 'dist': 'normal', 'sigma': 0.03},
+    {'field': 'CFO', 'dist': 'normal', 'sigma': 0.10},
+]
+
+DEFAULT_SCENARIOS = 10_000
+QUANTILES = [0.05, 0.5, 0.95]
+# Largest (scenarios x rows) block scored at once by score_sensitivity
+MAX_CELLS = 4_000_000
+
+def validate_perturbations(perturbations):
+    """Check a perturbation set, returning it with parameters as floats"""
+    checked = []
+    for position, perturbation in enumerate(perturbations):
+        field, dist = perturbation.get('field'), perturbation.get('dist')
+        if field not in SCORE_FIELDS:
+            raise ValueError(f"Perturbation {position}: {field!r} is not a line item used by the scores")
+        if dist not in DISTRIBUTIONS:
+            raise ValueError(f"Perturbation {position}: unknown distribution {dist!r}")
+        missing = set(DISTRIBUTIONS[dist]) - set(perturbation)
+        if missing:
+            raise ValueError(f"Perturbation {position} ({dist}) is missing {', '.join(sorted(missing))}")
+        checked.append({'field': field, 'dist': dist,
+                        **{name: float(perturbation[name]) for name in DISTRIBUTIONS[dist]}})
+    return checked
+
+def load_perturbations(path):
+    """Perturbation set from a JSON file"""
+    with open(path, encoding='utf-8') as handle:
+        return validate_perturbations(json.load(handle))
+
+def draw_factors(rng, perturbation, shape, dtype=np.float32):
+    """Multiplicative factors for one perturbed line item"""
+    if perturbation['dist'] == 'uniform':
+        factors = rng.random(shape, dtype=dtype)
+        factors *= perturbation['high'] - perturbation['low']
+        factors += perturbation['low']
+        return factors
+    sigma = perturbation['sigma']
+    factors = rng.standard_normal(shape, dtype=dtype)
+    factors *= sigma
+    if perturbation['dist'] == 'normal':
+        factors += 1
+        return factors
+    factors -= sigma ** 2 / 2
+    return np.exp(factors, out=factors)
+
+def _prior_rows(index):
+    """Position of each row's prior year within its company, -1 where there is none
+
+    On quarterly panels the prior year is the same quarter a year earlier.
+    """
+    companies = index.codes[0]
+    lag = 4 if 'Quarter' in index.names else 1
+    rows = np.arange(len(index))
+    prior = rows - lag
+    found = prior >= 0
+    found[found] = companies[prior[found]] == companies[found]
+    if lag == 4:
+        periods = quarter_numbers(index)
+        found[found] = periods[prior[found]] == periods[found] - 4
+    prior[~found] = -1
+    return prior
+
+def simulate_scores(panel, perturbations=DEFAULT_PERTURBATIONS, n_scenarios=DEFAULT_SCENARIOS, seed=0,
+                    dtype=np.float32):
+    """Z-Score and M-Score of every scenario, as two (scenarios x rows) arrays
+
+    Rows follow the panel, which must be sorted by period within each company.
+    Scenarios are computed in single precision by default, which halves the
+    memory traffic and is far finer than the perturbations themselves.
+    """
+    perturbations = validate_perturbations(perturbations)
+    rng = np.random.default_rng(seed)
+    prior = _prior_rows(panel.index)
+    has_prior = prior >= 0
+
+    # Unperturbed items stay one row of values and broadcast across scenarios
+    current = {field: panel[field].to_numpy(dtype=dtype) for field in SCORE_FIELDS}
+    for perturbation in perturbations:
+        field = perturbation['field']
+        factors = draw_factors(rng, perturbation, (n_scenarios, len(panel)), dtype)
+        factors *= current[field]
+        current[field] = factors
+    previous = {field: np.where(has_prior, values[..., prior], np.nan) for field, values in current.items()}
+
+    # A perturbed denominator can reach zero; those scenarios score inf or NaN
+    with np.errstate(divide='ignore', invalid='ignore', over='ignore'):
+        z_scores = np.broadcast_to(calculate_altman_z_score(current), (n_scenarios, len(panel)))
+        indices = beneish_indices(current, previous)
+        m_scores = np.full((n_scenarios, len(panel)), BENEISH_INTERCEPT, dtype=dtype)
+        for component, weight in zip(BENEISH_COMPONENTS, BENEISH_WEIGHTS):
+            m_scores += weight * indices[component]
+    return z_scores, m_scores
+
+def summarize_scenarios(z_scores, m_scores, index, quantiles=QUANTILES):
+    """Mean, spread, quantiles and threshold-crossing probabilities of each row's simulated scores"""
+    summary = pd.DataFrame(index=index)
+    with np.errstate(divide='ignore', invalid='ignore', over='ignore'):
+        for name, scores in [('Z', z_scores), ('M', m_scores)]:
+            summary[f'{name}_Mean'] = scores.mean(axis=0, dtype=np.float64)
+            summary[f'{name}_Std'] = scores.std(axis=0, dtype=np.float64)
+            for q, values in zip(quantiles, np.quantile(scores, quantiles, axis=0)):
+                summary[f'{name}_p{round(q * 100)}'] = values
+        # Probabilities are over the scenarios with a finite score
+        for column, scores, crossed in [('P_Z_Distress', z_scores, z_scores < Z_DISTRESS),
+                                        ('P_M_Manipulator', m_scores, m_scores > M_MANIPULATOR)]:
+            finite = np.isfinite(scores)
+            valid = finite.sum(axis=0)
+            summary[column] = np.where(valid > 0, (crossed & finite).sum(axis=0) / valid, np.nan)
+    return summary
+
+def score_sensitivity(panel, perturbations=DEFAULT_PERTURBATIONS, n_scenarios=DEFAULT_SCENARIOS, seed=0,
+                      quantiles=QUANTILES, max_cells=MAX_CELLS):
+    """Score distribution summary for every company-year of a panel
+
+    Companies are simulated in blocks of at most ``max_cells`` scenario-rows
+    to bound memory; block ``i`` is seeded with ``(seed, i)``.
+    """
+    if not len(panel):
+        return summarize_scenarios(np.empty((1, 0)), np.empty((1, 0)), panel.index, quantiles)
+    companies = panel.index.codes[0]
+    starts = np.flatnonzero(np.r_[True, companies[1:] != companies[:-1]])
+    # Whole companies per block: a company joins the block its first row falls in
+    block_of_company = starts // max(1, max_cells // n_scenarios)
+    bounds = np.r_[starts[np.r_[True, np.diff(block_of_company) > 0]], len(panel)]
+    summaries = []
+    for block, (start, stop) in enumerate(zip(bounds[:-1], bounds[1:])):
+        rows = panel.iloc[start:stop]
+        z_scores, m_scores = simulate_scores(rows, perturbations, n_scenarios, (seed, block))
+        summaries.append(summarize_scenarios(z_scores, m_scores, rows.index, quantiles))
+    return pd.concat(summaries)
@@ -0,0 +1,188 @@
+"""
+Prebuilt binary snapshot of a universe for fast worker start-up.
+
+A snapshot is a directory of uncompressed Arrow IPC files: the panel, the
+company metadata and the derived tables a page needs first (Altman
+variants, Beneish components, ratios, common-size, trend and red flags
+under the built-in rules), plus a manifest.json. A worker memory-maps the
+files instead of building frames from Python literals or parsing CSV, and
+the float columns become DataFrame columns without a copy: pages are read
+from disk only when touched, and workers on one host share them through
+the page cache. The (Company, Year) index is stored dictionary-encoded, so
+it is rebuilt from its codes without hashing company names.
+
+Derived tables are only used while the snapshot's MODEL_VERSION matches the
+code's; otherwise they are recomputed as usual.
+
+Usage:
+    python snapshot.py --output fraud_snapshot              # built-in case studies
+    python snapshot.py universe.parquet --metadata companies.csv --output fraud_snapshot --compact
+"""
+
+import argparse
+import json
+import os
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+
+from fraud_data import load_builtin_universe, read_fundamentals, read_company_metadata, compact_panel
+from fraud_models import (
+    MODEL_VERSION, assign_altman_variants, calculate_altman_variants, calculate_beneish_components,
+    calculate_financial_tables
+)
+from red_flags import DEFAULT_RULES, calculate_red_flags
+
+SNAPSHOT_VERSION = '1'
+MANIFEST = 'manifest.json'
+
+def _write_frame(path, frame):
+    """Write a frame as one Arrow record batch, its index levels dictionary-encoded"""
+    arrays, names = [], []
+    if isinstance(frame.index, pd.MultiIndex):
+        index = frame.index.remove_unused_levels()
+        for level, codes, name in zip(index.levels, index.codes, index.names):
+            arrays.append(pa.DictionaryArray.from_arrays(pa.array(codes), pa.array(np.asarray(level))))
+            names.append(name)
+    else:
+        arrays.append(pa.array(np.asarray(frame.index)))
+        names.append(frame.index.name)
+    for column in frame.columns:
+        values = frame[column].to_numpy()
+        arrays.append(pa.array(values.astype(str) if values.dtype == object else values))
+        names.append(column)
+    table = pa.Table.from_arrays(arrays, names=names)
+    temp_path = f"{path}.tmp"
+    with pa.OSFile(temp_path, 'wb') as sink, pa.ipc.new_file(sink, table.schema) as writer:
+        writer.write_table(table)
+    os.replace(temp_path, path)
+
+def _read_frame(path, index_names):
+    """Memory-mapped frame written by _write_frame; float columns are read-only views of the file"""
+    table = pa.ipc.open_file(pa.memory_map(str(path), 'r')).read_all().combine_chunks()
+    columns = {}
+    for name, column in zip(table.column_names, table.columns):
+        array = column.chunk(0) if column.num_chunks else pa.array([], type=column.type)
+        if name in index_names:
+            continue
+        zero_copy = pa.types.is_floating(array.type) and array.null_count == 0
+        columns[name] = array.to_numpy(zero_copy_only=zero_copy)
+    if len(index_names) > 1:
+        levels, codes = [], []
+        for name in index_names:
+            array = table.column(name).chunk(0)
+            levels.append(pd.Index(array.dictionary.to_numpy(zero_copy_only=False), name=name))
+            codes.append(array.indices.to_numpy(zero_copy_only=False))
+        index = pd.MultiIndex(levels=levels, codes=codes, names=index_names, verify_integrity=False)
+    else:
+        index = pd.Index(table.column(index_names[0]).to_numpy(), name=index_names[0])
+    return pd.DataFrame(columns, index=index, copy=False)
+
+def snapshot_tables(panel, rules=DEFAULT_RULES, variants=None):
+    """Derived tables stored in a snapshot, named as in the dashboard's AnalyticsCache
+
+    ``variants`` (each company's assigned Altman variant) decides which
+    score the Bankruptcy_Risk rule judges; see calculate_red_flags.
+    """
+    financial = calculate_financial_tables(panel)
+    altman = calculate_altman_variants(panel)
+    beneish = calculate_beneish_components(panel)
+    return {
+        'altman_variants': altman,
+        'beneish': beneish,
+        'ratios': financial['ratios'],
+        'common_size': financial['common_size'],
+        'trend': financial['trend'],
+        'red_flags': calculate_red_flags(panel, rules, financial['ratios'], altman['Z_Score'], beneish,
+                                         altman, variants),
+    }
+
+def write_snapshot(directory, panel, metadata, rules=DEFAULT_RULES):
+    """Write a panel, its metadata and derived tables as a snapshot directory"""
+    directory = Path(directory)
+    directory.mkdir(parents=True, exist_ok=True)
+    if not panel.index.is_monotonic_increasing:
+        panel = panel.sort_index()
+    companies = panel.index.get_level_values('Company').unique()
+    variants = assign_altman_variants(metadata.reindex(companies), panel)
+    tables = snapshot_tables(panel, rules, variants)
+    _write_frame(directory / 'panel.arrow', panel)
+    _write_frame(directory / 'metadata.arrow', metadata.astype(object).where(metadata.notna(), ''))
+    for name, table in tables.items():
+        _write_frame(directory / f"{name}.arrow", table)
+    manifest = {
+        'snapshot_version': SNAPSHOT_VERSION,
+        'model_version': MODEL_VERSION,
+        'created': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'index': list(panel.index.names),
+        'rows': len(panel),
+        'companies': int(panel.index.get_level_values('Company').nunique()),
+        'rules': rules,
+        'altman_assignments': variants.to_dict(),
+        'tables': list(tables),
+    }
+    # The manifest goes last: a snapshot without one is incomplete
+    temp_path = directory / f"{MANIFEST}.tmp"
+    temp_path.write_text(json.dumps(manifest, indent=2))
+    os.replace(temp_path, directory / MANIFEST)
+    return manifest
+
+class Snapshot:
+    """A loaded snapshot: panel, metadata and the derived tables still valid for this MODEL_VERSION"""
+
+    def __init__(self, panel, metadata, tables, manifest):
+        self.panel = panel
+        self.metadata = metadata
+        self.tables = tables
+        self.manifest = manifest
+
+    @property
+    def rules(self):
+        return self.manifest['rules']
+
+    @property
+    def altman_assignments(self):
+        """Assigned Altman variant of each company, as used for the stored red flags"""
+        return self.manifest.get('altman_assignments', {})
+
+def read_snapshot(directory):
+    """Memory-map a snapshot directory written by write_snapshot"""
+    directory = Path(directory)
+    manifest = json.loads((directory / MANIFEST).read_text())
+    if manifest.get('snapshot_version') != SNAPSHOT_VERSION:
+        raise ValueError(f"{directory} is snapshot version {manifest.get('snapshot_version')}, "
+                         f"expected {SNAPSHOT_VERSION}; rebuild it with snapshot.py")
+    index = manifest['index']
+    panel = _read_frame(directory / 'panel.arrow', index)
+    metadata = _read_frame(directory / 'metadata.arrow', ['Company'])
+    tables = {}
+    if manifest['model_version'] == MODEL_VERSION:
+        tables = {name: _read_frame(directory / f"{name}.arrow", index) for name in manifest['tables']}
+    return Snapshot(panel, metadata, tables, manifest)
+
+def main():
+    parser = argparse.ArgumentParser(description="Build a memory-mappable snapshot of a universe and its scores")
+    parser.add_argument('universe', nargs='?', help="fundamentals file (CSV or Parquet); built-in case studies if omitted")
+    parser.add_argument('--metadata', help="company metadata (CSV/Parquet)")
+    parser.add_argument('--output', '-o', default='fraud_snapshot', help="snapshot directory")
+    parser.add_argument('--compact', action='store_true', help="store float32 line items and int16 years")
+    args = parser.parse_args()
+    if args.metadata and not args.universe:
+        parser.error("--metadata needs a universe file")
+
+    start = time.perf_counter()
+    if args.universe:
+        panel, metadata = read_fundamentals(args.universe), read_company_metadata(args.universe, args.metadata)
+    else:
+        panel, metadata = load_builtin_universe()
+    if args.compact:
+        panel = compact_panel(panel)
+    manifest = write_snapshot(args.output, panel, metadata)
+    print(f"Wrote {manifest['rows']} company-years for {manifest['companies']} companies and "
+          f"{len(manifest['tables'])} derived tables in {time.perf_counter() - start:.1f}s -> {args.output}")
+
+if __name__ == '__main__':
+    main()
@@ -3,13 +3,34 @@ Professional Financial Statement & Fraud Analysis Dashboard - Streamlit Version
 Companies: WorldCom, IL&FS, Xerox Corporation, Bhushan Steel
 """
 
+import time
+_script_started = time.perf_counter()
+
 import streamlit as st
 import pandas as pd
 import numpy as np
-import plotly.graph_objects as go
-import plotly.express as px
-from plotly.subplots import make_subplots
+import os
 import warnings
+from fraud_data import (
+    load_builtin_universe, read_fundamentals, read_company_metadata, compact_panel, memory_budget, read_only,
+    company_years
+)
+from fraud_models import (
+    ALTMAN_VARIANTS, BENEISH_COMPONENTS, assign_altman_variants, calculate_altman_variants,
+    calculate_beneish_components, calculate_all_ratios, calculate_common_size, calculate_trend
+)
+from red_flags import DEFAULT_RULES, calculate_red_flags, load_rules
+from benford import BENFORD_FIELDS, benford_by_group, benford_statistics
+from analytics_cache import AnalyticsCache, panel_fingerprint
+from figures import (
+    RATIO_CHARTS, OVERLAY_METRICS, OVERLAY_MAX_SERIES, FigureCache, z_score_gauge, m_score_gauge,
+    benford_chart, ratio_chart, score_histogram, overlay_chart
+)
+from peers import PeerIndex, company_industries, peer_metrics, universe_peer_metrics
+from similarity import DEFAULT_K, TrajectoryIndex, trajectory_features, universe_trajectory_features
+from instrumentation import METRICS, timed
+# sensitivity, ledger_benford and snapshot are imported where used: most pages never need them
+_imports_done = time.perf_counter()
 warnings.filterwarnings('ignore')
 
 # Page Configuration
@@ -62,290 +83,168 @@ st.markdown("""
 # =======================
 # DATA PREPARATION
 # =======================
+# Data and derived analytics are loaded once per server process and shared by
+# every session (st.cache_resource): readers get the same read-only frames,
+# never a per-session copy. Session state holds only widget selections.
 
-@st.cache_data
+# Prebuilt memory-mapped snapshot (see snapshot.py); takes the place of FRAUD_DATA_PATH when set
+SNAPSHOT_PATH = os.environ.get('FRAUD_SNAPSHOT_PATH')
+# Optional fundamentals file (CSV/Parquet) replacing the built-in case studies
+DATA_PATH = None if SNAPSHOT_PATH else os.environ.get('FRAUD_DATA_PATH')
+METADATA_PATH = None if SNAPSHOT_PATH else os.environ.get('FRAUD_METADATA_PATH')
+# Optional JSON red-flag rule set replacing the built-in rules
+RULES_PATH = os.environ.get('FRAUD_RULES_PATH')
+# Compact storage (float32 line items, int16 years) to fit more workers per node
+COMPACT = os.environ.get('FRAUD_COMPACT') == '1'
+# Performance panel in the sidebar, and where to export timings (.prom text or .json log)
+DEBUG = os.environ.get('FRAUD_DEBUG') == '1'
+METRICS_PATH = os.environ.get('FRAUD_METRICS_PATH')
+# Monte Carlo perturbations (JSON, see sensitivity.py); built-in set when unset
+PERTURBATIONS_PATH = os.environ.get('FRAUD_PERTURBATIONS_PATH')
+SCENARIO_COUNTS = [10_000, 25_000, 50_000, 100_000]
+# Bins of the simulated score histograms
+HISTOGRAM_BINS = 60
+
+@st.cache_resource
+@timed('load.company_data')
 def load_company_data():
-    """Load financial data for all companies"""
-    
-    # WorldCom Data (2000-2001) 
-    worldcom = pd.DataFrame({
-        'Year': [1999,2000, 2001],
-        'Revenue': [36000e6,39090e6, 35181e6],
-        'COGS': [17000e6, 15508e6, 15910e6],
-        'SGA': [7000e6, 7421e6, 7547e6],
-        'EBIT': [9000e6,10345e6, 7519e6],
-        'Net_Income': [4200e6,5134e6, 1514e6],
-        'Total_Assets': [95000e6, 104363e6, 107485e6],
-        'Current_Assets': [95000e6, 21033e6, 19526e6],
-        'Fixed_Assets': [50000e6,54653e6, 58365e6],
-        'Current_Liabilities': [16000e6, 17149e6, 20063e6],
-        'Total_Debt': [26000e6, 30323e6, 31983e6],
-        'Total_Equity': [42000e6,46557e6, 45289e6],
-        'Receivables': [4500e6,5138e6, 6304e6],
-        'Inventory': [1300e6, 1465e6, 1513e6],
-        'Retained_Earnings': [15000e6,17694e6, 19172e6],
-        'Market_Cap': [150000e6,115000e6, 45000e6],
-        'Depreciation': [6000e6, 6373e6, 7490e6],
-        'CFO':[3500e6, 10240e6, 7001e6]
-    })
-    
-    # IL&FS Data (2015-2018)
-    ilfs = pd.DataFrame({
-        'Year': [2015, 2016, 2017, 2018],
-        'Revenue': [192.125e8, 192.11557e8, 234.6465e8, 229.4347e8],
-        'COGS': [45.2e8, 52.1e8, 58.7e8, 62.4e8],
-        'SGA': [13.825e8, 16.5609e8, 18.9909e8, 19.0513e8],
-        'EBIT': [161.6385e8, 154.0426e8, 177.9783e8, 167.9961e8],
-        'Net_Income': [24.937e8, 19.2779e8, 20.8781e8, 9.9660e8],
-        'Total_Assets': [1542.844e8, 1795.6088e8, 1956.2608e8, 2188.9279e8],
-        'Current_Assets': [810.8627e8,  822.0826e8, 856.7468e8, 785.7735e8],
-        'Fixed_Assets': [0.4806e8, 0.4472e8, 0.4046e8,  0.7968e8],
-        'Current_Liabilities': [619.4992e8, 743.7955e8, 724.9711e8,  820.1098e8],
-        'Total_Debt': [917.3757e8, 1233.7509e8, 1341.9523e8, 1475.5373e8],
-        'Total_Equity': [203.1238e8, 230.6752e8, 240.7124e8, 239.9749e8],
-        'Receivables': [16.9873e8, 15.1298e8, 18.8868e8, 26.6748e8],
-        'Inventory': [0.0e8, 0.0e8, 0.0e8, 0.0e8],
-        'Retained_Earnings': [176.557e8, 191.6085e8, 201.6457e8, 200.9082e8],
-        'Market_Cap': [203.1238e8, 230.6752e8, 240.7124e8, 239.9749e8],#book equity
-        'Depreciation': [0.2075e8, 0.1746e8, 0.2247e8, 0.2541e8],
-        'CFO': [51.7917e8,  -35.4439e8, 9.2444e8, -283.6166e8],
-
-    })
-    
-    # Xerox Corporation Data (1997-2000)
-    xerox = pd.DataFrame({
-        'Year': [1997, 1998, 1999, 2000],
-        'Revenue': [18.166e9, 19.447e9, 19.228e9, 18.632e9],
-        'COGS': [16.003e9, 18.684e9, 17.192e9, 19.186e9],
-        'SGA': [5.517e9, 5.873e9, 5.603e9, 5.230e9],
-        'EBIT':[-3.354e9,-5.110e9,-3.567e9,-5.784e9],
-        'Net_Income': [1.452e9, 0.395e9, 1.424e9, -0.384e9],
-        'Total_Assets': [27.732e9, 30.024e9, 28.814e9, 29.687e9],
-        'Current_Assets': [10.766e9, 12.475e9, 11.985e9, 13.094e9],
-        'Fixed_Assets': [2.377e9, 2.386e9, 2.456e9, 2.495e9],
-        'Current_Liabilities': [7.692e9, 8.507e9, 7.950e9, 6.286e9],
-        'Total_Debt': [12.486e9, 14.971e9, 14.951e9, 18.097e9],
-        'Total_Equity': [4.985e9, 4.857e9, 4.911e9, 3.637e9],
-        'Receivables': [2.745e9, 2.671e9, 2.622e9, 2.281e9],
-        'Inventory': [2.792e9, 3.269e9, 2.961e9, 1.930e9],
-        'Retained_Earnings': [3.921e9, 3.348e9, 3.915e9, 2.879e9],
-        'Market_Cap': [31.2e9, 28.6e9, 29.9e9, 15.4e9],
-        'Depreciation': [1.543e9, 1.629e9, 1.718e9, 1.802e9],
-        'CFO': [0.472e9, -1.165e9, 1.224e9, -0.827e9],
-
-    })
-    
-    # Bhushan Steel Data (2014-2017)
-    bhushan = pd.DataFrame({
-       'Year': [2014, 2015, 2016, 2017],
-       'Revenue': [7845.0e8, 8567.0e8, 8234.0e8, 7589.0e8],
-       'COGS': [6234.0e8, 6845.0e8, 6789.0e8, 6523.0e8],
-       'SGA': [856.0e8, 945.0e8, 1023.0e8, 1145.0e8],
-       'EBIT': [755.0e8, 778.0e8, 422.0e8, -79.0e8],
-       'Net_Income': [345.0e8, 289.0e8, -245.0e8, -867.0e8],
-       'Total_Assets': [44567.0e8, 47892.0e8, 49234.0e8, 48567.0e8],
-       'Current_Assets': [12534.0e8, 13567.0e8, 13892.0e8, 13245.0e8],
-       'Fixed_Assets': [29833.0e8, 32125.0e8, 33142.0e8, 33122.0e8],
-       'Current_Liabilities': [9845.0e8, 11234.0e8, 14567.0e8, 17892.0e8],
-       'Total_Debt': [28567.0e8, 32589.0e8, 36892.0e8, 39845.0e8],
-       'Total_Equity': [8234.0e8, 8523.0e8, 8278.0e8, 7411.0e8],
-       'Receivables': [4567.0e8, 5234.0e8, 5678.0e8, 5892.0e8],
-       'Inventory': [3245.0e8, 3567.0e8, 3789.0e8, 3623.0e8],
-       'Retained_Earnings': [4567.0e8, 4856.0e8, 4611.0e8, 3744.0e8],
-       'Market_Cap': [12500.0e8, 11000.0e8, 7500.0e8, 3500.0e8],
-       'Depreciation': [1845.0e8, 2023.0e8, 2167.0e8, 2289.0e8],
-       'CFO': [945.0e8, 812.0e8, -678.0e8, -1845.0e8],
-   })
+    """Load the company-year panel and company metadata for all companies"""
+    panel, metadata = load_builtin_universe()
+    return read_only(((compact_panel(panel) if COMPACT else panel), metadata))
 
-    
-    return {
-        'WorldCom': worldcom,
-        'IL&FS': ilfs,
-        'Xerox': xerox,
-        'Bhushan Steel': bhushan
-    }
-# =======================
-# FRAUD DETECTION MODELS
-# =======================
+@st.cache_resource
+@timed('load.snapshot')
+def load_snapshot(path):
+    """Memory-mapped universe snapshot, its derived tables seeded into the analytics cache"""
+    from snapshot import read_snapshot
+    snapshot = read_snapshot(path)
+    cache = get_analytics_cache()
+    for name, table in snapshot.tables.items():
+        params = (snapshot.rules, snapshot.altman_assignments) if name == 'red_flags' else ()
+        cache.put(name, snapshot.panel, table, *params, persist=False)
+    return snapshot
 
-def calculate_altman_z_score(df):
-    """Altman Z-Score for bankruptcy prediction"""
-    working_capital = df['Current_Assets'] - df['Current_Liabilities']
-    
-    X1 = working_capital / df['Total_Assets']
-    X2 = df['Retained_Earnings'] / df['Total_Assets']
-    X3 = df['EBIT'] / df['Total_Assets']
-    X4 = df['Market_Cap'] / (df['Total_Assets'] - df['Total_Equity'])
-    X5 = df['Revenue'] / df['Total_Assets']
-    
-    z_score = 1.2*X1 + 1.4*X2 + 3.3*X3 + 0.6*X4 + 1.0*X5
-    
-    return z_score
+def load_universe():
+    """Panel and metadata of the whole universe: the snapshot when set, else the built-in case studies"""
+    if SNAPSHOT_PATH:
+        snapshot = load_snapshot(SNAPSHOT_PATH)
+        return snapshot.panel, snapshot.metadata
+    return load_company_data()
 
-def calculate_beneish_m_score(df):
-    """Beneish M-Score for earnings manipulation detection"""
-    m_scores = []
-    
-    for i in range(1, len(df)):
-        current = df.iloc[i]
-        previous = df.iloc[i-1]
-        
-        dsri = (current['Receivables']/current['Revenue']) / (previous['Receivables']/previous['Revenue'])
-        gmi = ((previous['Revenue']-previous['COGS'])/previous['Revenue']) / \
-              ((current['Revenue']-current['COGS'])/current['Revenue'])
-        
-        current_ca_fa = current['Current_Assets'] + current['Fixed_Assets']
-        previous_ca_fa = previous['Current_Assets'] + previous['Fixed_Assets']
-        aqi = (1 - current_ca_fa/current['Total_Assets']) / \
-              (1 - previous_ca_fa/previous['Total_Assets'])
-        
-        sgi = current['Revenue'] / previous['Revenue']
-        depi = (previous['Depreciation']/(previous['Depreciation']+previous['Fixed_Assets'])) / \
-               (current['Depreciation']/(current['Depreciation']+current['Fixed_Assets']))
-        sgai = (current['SGA']/current['Revenue']) / \
-               (previous['SGA']/previous['Revenue'])
-        lvgi = ((current['Total_Debt'])/current['Total_Assets']) / \
-               ((previous['Total_Debt'])/previous['Total_Assets'])
-        
-        current_ca = current['Current_Assets'] - current['Receivables']
-        current_cl = current['Current_Liabilities']
-        tata = (current['Net_Income'] - current['CFO']) / current['Total_Assets']
-        
-        m_score = -4.84 + 0.92*dsri + 0.528*gmi + 0.404*aqi + 0.892*sgi + \
-                  0.115*depi - 0.172*sgai + 4.679*tata - 0.327*lvgi
-        
-        m_scores.append(m_score)
-    
-    return [np.nan] + m_scores
-
-def benfords_law_analysis(financial_values):
-    """Benford's Law analysis for fraud detection"""
-    first_digits = []
-    for value in financial_values:
-        if value > 0:
-            first_digit = int(str(int(value))[0])
-            if first_digit != 0:
-                first_digits.append(first_digit)
-    
-    actual_counts = pd.Series(first_digits).value_counts().sort_index()
-    actual_dist = (actual_counts / len(first_digits) * 100).reindex(range(1, 10), fill_value=0)
-    expected_dist = pd.Series({i: np.log10(1 + 1/i) * 100 for i in range(1, 10)})
-    chi_square = sum(((actual_dist - expected_dist)**2) / expected_dist)
-    compliant = chi_square < 15.507
-    
-    return actual_dist, expected_dist, chi_square, compliant
+@st.cache_resource
+def load_company_list(path, metadata_path):
+    """Company metadata for a fundamentals file, without reading the fundamentals"""
+    return read_only(read_company_metadata(path, metadata_path))
+
+@st.cache_resource(max_entries=32)
+@timed('load.company_rows')
+def load_company_rows(path, company):
+    """Panel rows of a single company from a fundamentals file"""
+    return read_only(read_fundamentals(path, companies=[company], compact=COMPACT))
+
+@st.cache_data
+def load_red_flag_rules(path):
+    """Red-flag rules from a JSON file, or the built-in rules"""
+    return load_rules(path) if path else DEFAULT_RULES
+
+@st.cache_resource
+def get_analytics_cache():
+    """Process-wide cache of derived analytics, persisted to FRAUD_CACHE_DIR when set"""
+    return AnalyticsCache(directory=os.environ.get('FRAUD_CACHE_DIR'))
+
+@st.cache_resource
+def get_figure_cache():
+    """Process-wide cache of serialized chart figures"""
+    return FigureCache()
+
+@st.cache_resource
+@timed('load.universe_metrics')
+def load_universe_metrics(path, metadata_path):
+    """Ratios and scores of every company-year in the universe, with each company's industry"""
+    if path:
+        # Streamed a batch of companies at a time, so the whole universe is never in memory
+        metrics = universe_peer_metrics(path)
+        return read_only((metrics, company_industries(read_company_metadata(path, metadata_path))))
+    # The page's own tables, shared through the analytics cache (seeded from the snapshot when there is one)
+    panel, metadata = load_universe()
+    cache = get_analytics_cache()
+    metrics = peer_metrics(panel, cache.get('ratios', panel, calculate_all_ratios),
+                           cache.get('altman_variants', panel, calculate_altman_variants),
+                           cache.get('beneish', panel, calculate_beneish_components)['M_Score'])
+    return read_only((metrics, company_industries(metadata)))
+
+@st.cache_resource
+@timed('load.peer_index')
+def load_peer_index(path, metadata_path):
+    """Industry/year peer index over the whole universe, sorted once per process"""
+    return PeerIndex(*load_universe_metrics(path, metadata_path))
+
+@st.cache_resource(max_entries=32)
+def load_altman_assignments(fingerprint, _panel, _metadata):
+    """Assigned Altman variant of each company in a panel, as a dict (usable in analytics cache keys)"""
+    companies = _panel.index.get_level_values('Company').unique()
+    return assign_altman_variants(_metadata.reindex(companies), _panel).to_dict()
+
+def assigned_red_flags(panel, rules, variants):
+    """Red flags with Bankruptcy_Risk judged by each company's assigned Altman variant"""
+    altman = get_analytics_cache().get('altman_variants', panel, calculate_altman_variants)
+    return calculate_red_flags(panel, rules, altman=altman, variants=variants)
+
+def cached_trajectory_features(panel):
+    """Per-year similarity features of a panel, from the tables in the analytics cache"""
+    cache = get_analytics_cache()
+    return trajectory_features(panel, cache.get('ratios', panel, calculate_all_ratios),
+                               cache.get('altman_variants', panel, calculate_altman_variants),
+                               cache.get('beneish', panel, calculate_beneish_components))
+
+@st.cache_resource
+@timed('load.trajectory_index')
+def load_trajectory_index(path):
+    """Nearest-neighbour index of every company-year's trajectory in the universe, built once per process"""
+    if path:
+        return TrajectoryIndex(universe_trajectory_features(path))
+    panel, _ = load_universe()
+    return TrajectoryIndex(cached_trajectory_features(panel))
+
+@st.cache_resource(max_entries=16)
+@timed('analytics.sensitivity')
+def load_sensitivity(company_rows, n_scenarios, perturbations_path):
+    """Simulated score summary of one company's years, and score histograms per year"""
+    from sensitivity import DEFAULT_PERTURBATIONS, load_perturbations, simulate_scores, summarize_scenarios
+    perturbations = load_perturbations(perturbations_path) if perturbations_path else DEFAULT_PERTURBATIONS
+    z_scores, m_scores = simulate_scores(company_rows, perturbations, n_scenarios)
+    summary = summarize_scenarios(z_scores, m_scores, company_rows.index).droplevel('Company')
+    histograms = {}
+    for position, year in enumerate(summary.index):
+        histograms[year] = {}
+        for name, scores in [('Z', z_scores[:, position]), ('M', m_scores[:, position])]:
+            scores = scores[np.isfinite(scores)]
+            if len(scores):
+                # Trim the extreme tails so a few blown-up scenarios do not flatten the chart
+                counts, edges = np.histogram(scores, HISTOGRAM_BINS, range=tuple(np.quantile(scores, [0.005, 0.995])))
+                histograms[year][name] = (100 * counts / n_scenarios, edges)
+    return read_only((summary, histograms))
+
+@st.cache_resource(max_entries=8)
+@timed('load.ledger_histograms')
+def load_ledger_histograms(path, column, sign, modified):
+    """Digit histograms of a general ledger extract (``modified`` invalidates the cache when the file changes)"""
+    from ledger_benford import ledger_histograms
+    return read_only(ledger_histograms(path, column, sign))
 
-def calculate_all_ratios(df):
-    """Calculate comprehensive financial ratios"""
-    ratios = pd.DataFrame()
-    ratios['Year'] = df['Year']
-    
-    # Profitability
-    ratios['Gross_Margin'] = ((df['Revenue'] - df['COGS']) / df['Revenue'] * 100)
-    ratios['Operating_Margin'] = (df['EBIT'] / df['Revenue'] * 100)
-    ratios['Net_Profit_Margin'] = (df['Net_Income'] / df['Revenue'] * 100)
-    ratios['ROA'] = (df['Net_Income'] / df['Total_Assets'] * 100)
-    ratios['ROE'] = (df['Net_Income'] / df['Total_Equity'] * 100)
-    
-    # Liquidity
-    ratios['Current_Ratio'] = df['Current_Assets'] / df['Current_Liabilities']
-    ratios['Quick_Ratio'] = (df['Current_Assets'] - df['Inventory']) / df['Current_Liabilities']
-    
-    # Leverage
-    ratios['Debt_to_Equity'] = df['Total_Debt'] / df['Total_Equity']
-    ratios['Debt_Ratio'] = (df['Total_Debt'] / df['Total_Assets'] * 100)
-    
-    # Efficiency
-    ratios['Asset_Turnover'] = df['Revenue'] / df['Total_Assets']
-    ratios['Receivables_Turnover'] = df['Revenue'] / df['Receivables']
-    ratios['Days_Sales_Outstanding'] = 365 / ratios['Receivables_Turnover']
-    
-    return ratios
-    
-def calculate_common_size(df):
-    cs = pd.DataFrame()
-    cs['Year'] = df['Year']
-    cs['COGS_%'] = df['COGS'] / df['Revenue'] * 100
-    cs['Net_Income_%'] = df['Net_Income'] / df['Revenue'] * 100
-    cs['SGA_%'] = df['SGA'] / df['Revenue'] * 100
-    cs['EBIT_%'] = df['EBIT'] / df['Revenue'] * 100
-    cs['Net_Income_%'] = df['Net_Income'] / df['Revenue'] * 100
-    cs['Current_Assets_%'] = df['Current_Assets'] / df['Total_Assets'] * 100
-    cs['Fixed_Assets_%'] = df['Fixed_Assets'] / df['Total_Assets'] * 100
-    cs['Debt_%'] = df['Total_Debt'] / df['Total_Assets'] * 100
-    cs['Equity_%'] = df['Total_Equity'] / df['Total_Assets'] * 100
-    return cs
-
-def calculate_trend(df):
-    trend = pd.DataFrame()
-    trend['Year'] = df['Year']
-    base = df.iloc[0]
-    trend['Revenue_Index'] = df['Revenue'] / base['Revenue'] * 100
-    trend['Receivables_Index'] = df['Receivables'] / base['Receivables'] * 100
-    trend['EBIT_Index'] = df['EBIT'] / base['EBIT'] * 100
-    trend['Net_Income_Index'] = df['Net_Income'] / base['Net_Income'] * 100
-    trend['Assets_Index'] = df['Total_Assets'] / base['Total_Assets'] * 100
-    trend['Debt_Index'] = df['Total_Debt'] / base['Total_Debt'] * 100
-    trend['Equity_Index'] = df['Total_Equity'] / base['Total_Equity'] * 100
-    trend['Current_Assets_Index'] = df['Current_Assets'] / base['Current_Assets'] * 100
-    trend['Current_Liabilities_Index'] = df['Current_Liabilities'] / base['Current_Liabilities'] * 100
-    
-    return trend
 # =======================
-# MAIN APP
+# PAGE SECTIONS
 # =======================
+# Each section that depends on more than the selected company is a fragment,
+# so its own widgets rerun only that section instead of the whole page.
 
-def main():
-    # Title
-    st.markdown("<h1>🔍 Financial Statement & Fraud Analysis Dashboard</h1>", unsafe_allow_html=True)
-    st.markdown("<p style='text-align: center; color: #94a3b8; font-size: 1.2rem;'>Advanced Analytics for Corporate Fraud Detection</p>", unsafe_allow_html=True)
-    
-    # Load data
-    all_data = load_company_data()
-    
-    # Sidebar
-    st.sidebar.title("⚙️ Control Panel")
-    
-    company = st.sidebar.selectbox(
-        "Select Company",
-        list(all_data.keys()),
-        format_func=lambda x: f"🏢 {x}"
-    )
-    
-    df = all_data[company]
-    years = df['Year'].tolist()
-    
-    selected_year = st.sidebar.selectbox(
-        "Select Analysis Year",
-        years,
-        index=len(years)-1
-    )
-    
-    # Company Info Banner
-    company_info = {
-        'WorldCom': {
-            'fraud': 'Accounting Fraud - $11 billion',
-            'period': '2000-2002',
-            'description': 'WorldCom inflated assets by booking operating expenses as capital expenditures, leading to one of the largest accounting frauds in history.'
-        },
-        'IL&FS': {
-            'fraud': 'Debt Default Crisis - ₹91,000 crore',
-            'period': '2015-2018',
-            'description': 'IL&FS defaulted on debt obligations, revealing major accounting irregularities and poor governance practices.'
-        },
-        'Xerox': {
-            'fraud': 'Revenue Recognition Fraud - $6 billion',
-            'period': '1997-2000',
-            'description': 'Xerox manipulated revenue recognition by accelerating lease revenue and improperly accounting for equipment sales.'
-        },
-        'Bhushan Steel': {
-            'fraud': 'Bank Fraud & Debt Default - ₹47,000 crore',
-            'period': '2014-2017',
-            'description': 'Bhushan Steel was involved in fraudulent loans and fund diversion, leading to insolvency proceedings.'
-        }
-    }
-    
-    info = company_info[company]
+def show_chart(fig, name):
+    """Draw a figure, timing its serialization"""
+    with METRICS.time(f"plotly_chart.{name}"):
+        st.plotly_chart(fig, use_container_width=True)
+
+def render_company_banner(company, info):
+    """Company name, fraud summary and reporting currency"""
     st.markdown(f"""
     <div style='background: linear-gradient(135deg, #1e293b 0%, #334155 100%); 
                 border-left: 5px solid #ef4444; 
@@ -356,20 +255,63 @@ def main():
         <h2 style='color: #f1f5f9; margin-top: 0;'>🏢 {company}</h2>
         <div style='width: 60px; height: 4px; background: linear-gradient(90deg, #ef4444 0%, #f59e0b 100%); border-radius: 2px; margin: 1rem 0;'></div>
         <h4 style='color: #fbbf24; font-weight: 600;'>⚠️ {info['fraud']}</h4>
-        <p style='color: #94a3b8; font-size: 1.1rem;'>📅 Period: {info['period']}</p>
+        <p style='color: #94a3b8; font-size: 1.1rem;'>📅 Period: {info['period']} &nbsp;·&nbsp; 🏭 {info['industry']} &nbsp;·&nbsp; 💱 {info['currency']} ({info['units']})</p>
         <p style='color: #cbd5e1; font-size: 1.05rem; line-height: 1.7;'>{info['description']}</p>
     </div>
     """, unsafe_allow_html=True)
+
+def render_memory_budget(panel):
+    """Memory held by the panel and each derived table"""
+    cache = get_analytics_cache()
+    tables = {
+        'panel': panel,
+        'altman_variants': cache.get('altman_variants', panel, calculate_altman_variants),
+        'beneish': cache.get('beneish', panel, calculate_beneish_components),
+        'ratios': cache.get('ratios', panel, calculate_all_ratios),
+        'common_size': cache.get('common_size', panel, calculate_common_size),
+        'trend': cache.get('trend', panel, calculate_trend),
+    }
+    budget = memory_budget(tables)
+    st.caption("Compact storage" if COMPACT else "Full precision (set FRAUD_COMPACT=1 for compact storage)")
+    st.dataframe(budget[['Rows', 'Columns', 'MiB']].style.format({'MiB': '{:.3f}'}))
+
+def peer_caption(percentile, n_peers, industry):
+    if n_peers < 2 or np.isnan(percentile):
+        return f"Industry peers: not enough {industry} companies this year"
+    return f"Industry percentile: {percentile:.0f} (of {int(n_peers)} {industry} companies)"
+
+@st.fragment
+@timed('section.scores')
+def render_scores(panel, company, industry, variants):
+    """Score gauges, analysis-year card, peer percentiles and red flags for the selected year
+
+    The Altman gauge and the Bankruptcy_Risk flag use the company's assigned
+    variant (``variants``, see assign_altman_variants).
+    """
+    cache = get_analytics_cache()
+    variant = variants[company]
+    altman = cache.get('altman_variants', panel, calculate_altman_variants).xs(company, level='Company')
+    z_scores = altman[variant]
+    symbol = ALTMAN_VARIANTS[variant]['symbol']
+    beneish = cache.get('beneish', panel, calculate_beneish_components).xs(company, level='Company')
+    rules = load_red_flag_rules(RULES_PATH)
+    flags = cache.get('red_flags', panel, assigned_red_flags, rules, variants).xs(company, level='Company')
+    years = z_scores.index.tolist()
+    
+    selected_year = st.selectbox(
+        "Select Analysis Year",
+        years,
+        index=len(years)-1,
+        key=f"year_{company}"
+    )
     
-    # Fraud Detection Scores
-    st.markdown("<h2>🔍 Fraud Detection Models</h2>", unsafe_allow_html=True)
-    
-    z_scores = calculate_altman_z_score(df)
-    m_scores = calculate_beneish_m_score(df)
-    
-    year_idx = df[df['Year'] == selected_year].index[0]
-    z_score = z_scores.iloc[year_idx]
-    m_score = m_scores[year_idx]
+    z_score = z_scores.loc[selected_year]
+    m_score = beneish.loc[selected_year, 'M_Score']
+    ratios = cache.get('ratios', panel, calculate_all_ratios).xs(company, level='Company')
+    peer_index = load_peer_index(DATA_PATH, METADATA_PATH)
+    peer_ranks = peer_index.company_percentiles(
+        industry, selected_year, {**ratios.loc[selected_year], **altman.loc[selected_year], 'M_Score': m_score}
+    )
 
     if np.isnan(m_score):
         m_display = "Not Available (First Year)"
@@ -377,292 +319,296 @@ def main():
         m_display = f"{m_score:.3f}"
 
 
-    # Risk assessment
-    if z_score > 2.99:
-        z_risk = "Low"
-        z_color = "#10b981"
-    elif z_score > 1.81:
-        z_risk = "Medium"
-        z_color = "#f59e0b"
-    else:
-        z_risk = "High"
-        z_color = "#ef4444"
-    
-    if m_score > -1.78:
-        m_risk = "High"
-        m_color = "#ef4444"
-    else:
-        m_risk = "Low"
-        m_color = "#10b981"
-    
+    figure_cache = get_figure_cache()
     col1, col2, col3 = st.columns(3)
     
     with col1:
-        # Z-Score Gauge
-        fig_z = go.Figure(go.Indicator(
-            mode="gauge+number",
-            value=z_score,
-            title={'text': f"Altman Z-Score<br><span style='font-size:0.8em;color:{z_color}'>{z_risk} Risk</span>"},
-            gauge={
-                'axis': {'range': [None, 5]},
-                'bar': {'color': z_color},
-                'steps': [
-                    {'range': [0, 1.81], 'color': '#fee2e2'},
-                    {'range': [1.81, 2.99], 'color': '#fef3c7'},
-                    {'range': [2.99, 5], 'color': '#d1fae5'}
-                ],
-                'threshold': {
-                    'line': {'color': "red", 'width': 4},
-                    'thickness': 0.75,
-                    'value': 1.81
-                }
-            }
-        ))
-        fig_z.update_layout(
-            height=300,
-            paper_bgcolor='rgba(0,0,0,0)',
-            font={'color': '#f1f5f9'},
-            xaxis=dict(type='category')
-        )
-        st.plotly_chart(fig_z, use_container_width=True)
+        fig_z = figure_cache.get(company, 'z_gauge', (variant, repr(z_score)), z_score_gauge, z_score, variant)
+        show_chart(fig_z, 'z_gauge')
+        st.caption(f"{symbol}-Score model for {ALTMAN_VARIANTS[variant]['label']}")
+        st.caption(peer_caption(*peer_ranks.loc[variant, ['Percentile', 'Peers']], industry))
     
     with col2:
-        # M-Score Gauge
-        fig_m = go.Figure(go.Indicator(
-            mode="gauge+number",
-            value=m_score,
-            title={'text': f"Beneish M-Score<br><span style='font-size:0.8em;color:{m_color}'>{m_risk} Risk</span>"},
-            gauge={
-                'axis': {'range': [-5, 0]},
-                'bar': {'color': m_color},
-                'steps': [
-                    {'range': [-5, -2.22], 'color': '#d1fae5'},
-                    {'range': [-2.22, -1.78], 'color': '#fef3c7'},
-                    {'range': [-1.78, 0], 'color': '#fee2e2'}
-                ],
-                'threshold': {
-                    'line': {'color': "red", 'width': 4},
-                    'thickness': 0.75,
-                    'value': -1.78
-                }
-            }
-        ))
-        fig_m.update_layout(
-            height=300,
-            paper_bgcolor='rgba(0,0,0,0)',
-            font={'color': '#f1f5f9'},
-            xaxis=dict(type='category')
-        )
-        st.plotly_chart(fig_m, use_container_width=True)
+        fig_m = figure_cache.get(company, 'm_gauge', repr(m_score), m_score_gauge, m_score)
+        show_chart(fig_m, 'm_gauge')
+        st.caption(peer_caption(*peer_ranks.loc['M_Score', ['Percentile', 'Peers']], industry))
     
     with col3:
         st.markdown(f"""
         <div style='background: rgba(30,41,59,0.9); padding: 1.5rem; border-radius: 12px; text-align: center; margin-top: 40px;'>
             <h4 style='color: #f1f5f9;'>Analysis Year</h4>
             <h2 style='color: #3b82f6; font-size: 3rem;'>{selected_year}</h2>
-            <p style='color: #94a3b8; margin-top: 1rem;'>Z-Score: {z_score:.3f}</p>
+            <p style='color: #94a3b8; margin-top: 1rem;'>{symbol}-Score: {z_score:.3f}</p>
             <p style='color: #94a3b8;'>M-Score: {m_display}</p>
             
         </div>
         """, unsafe_allow_html=True)
+
+    with st.expander("Altman model variants"):
+        st.caption(f"Zones: distress below / safe above; {symbol} is assigned to this company")
+        st.dataframe(altman.rename(columns=lambda name: ALTMAN_VARIANTS[name]['symbol']).round(3),
+                     use_container_width=True)
+        st.dataframe(pd.DataFrame([(spec['symbol'], spec['label'], *spec['zones']) for spec in ALTMAN_VARIANTS.values()],
+                                  columns=['Variant', 'For', 'Distress below', 'Safe above']).set_index('Variant'),
+                     use_container_width=True)
     
-    # Benford's Law
-    st.markdown("<h2>📊 Benford's Law Analysis</h2>", unsafe_allow_html=True)
+    with st.expander("Beneish M-Score components"):
+        st.dataframe(beneish[BENEISH_COMPONENTS].round(3), use_container_width=True)
     
-    financial_values = []
-    for col in ['Revenue', 'COGS', 'SGA', 'Total_Assets', 'Current_Assets', 
-                'Current_Liabilities', 'Total_Debt', 'Receivables']:
-        financial_values.extend(df[col].tolist())
+    with st.expander(f"🏭 Industry peer percentiles ({industry}, {selected_year})"):
+        st.caption("Share of same-industry companies in the same year with a lower value")
+        st.dataframe(peer_ranks.round(2), use_container_width=True)
     
-    actual_dist, expected_dist, chi_square, compliant = benfords_law_analysis(financial_values)
+    with st.expander("🎲 Score sensitivity (Monte Carlo)"):
+        if st.toggle("Simulate", key=f"simulate_{company}"):
+            render_sensitivity(panel, company, selected_year)
     
-    fig_benford = go.Figure()
-    fig_benford.add_trace(go.Bar(
-        x=list(range(1, 10)),
-        y=expected_dist.values,
-        name='Expected (Benford)',
-        marker_color='#3b82f6',
-        opacity=0.85
-    ))
-    fig_benford.add_trace(go.Bar(
-        x=list(range(1, 10)),
-        y=actual_dist.values,
-        name='Actual',
-        marker_color='#10b981',
-        opacity=0.85
-    ))
+    # Red Flags
+    st.markdown("<h2>🚩 Red Flags Detected</h2>", unsafe_allow_html=True)
     
-    compliance_text = "✓ COMPLIANT" if compliant else "✗ NON-COMPLIANT"
-    compliance_color = "#10b981" if compliant else "#ef4444"
+    year_flags = flags.loc[selected_year]
+    red_flags = [rule for rule in rules if year_flags[rule['name']]]
     
-    fig_benford.update_layout(
-        title=f"Benford's Law Analysis - χ² = {chi_square:.2f} - <span style='color:{compliance_color}'>{compliance_text}</span>",
-        xaxis_title="First Digit",
-        yaxis_title="Frequency (%)",
-        barmode='group',
-        height=400,
-        template='plotly_dark',
-        paper_bgcolor='rgba(0,0,0,0)',
-        plot_bgcolor='rgba(15,23,42,0.8)',
-        xaxis=dict(type='category')
+    if red_flags:
+        for rule in red_flags:
+            if rule['severity'] in ('high', 'critical'):
+                st.error(rule['label'])
+            else:
+                st.warning(rule['label'])
+    else:
+        st.success("✅ No major red flags detected for this period.")
+
+def render_sensitivity(panel, company, year):
+    """Simulated Z/M distributions for one year and threshold-crossing probabilities for all years"""
+    from sensitivity import Z_DISTRESS, M_MANIPULATOR
+    n_scenarios = st.select_slider("Scenarios", SCENARIO_COUNTS, format_func="{:,}".format)
+    company_rows = panel.xs(company, level='Company', drop_level=False)
+    summary, histograms = load_sensitivity(company_rows, n_scenarios, PERTURBATIONS_PATH)
+    st.caption("Uncertain line items are perturbed at random; probabilities are the share of scenarios "
+               f"with Z below {Z_DISTRESS} or M above {M_MANIPULATOR}")
+    fingerprint = (panel_fingerprint(company_rows), n_scenarios, PERTURBATIONS_PATH, year)
+    figure_cache = get_figure_cache()
+    columns = st.columns(2)
+    for column, name, threshold, color in [(columns[0], 'Z', Z_DISTRESS, '#3b82f6'),
+                                           (columns[1], 'M', M_MANIPULATOR, '#f59e0b')]:
+        with column:
+            if name in histograms[year]:
+                counts, edges = histograms[year][name]
+                title = f"Simulated {name}-Score ({year})"
+                fig = figure_cache.get(company, f'{name.lower()}_sensitivity', fingerprint,
+                                       score_histogram, counts, edges, threshold, title, color)
+                show_chart(fig, f'{name.lower()}_sensitivity')
+            else:
+                st.info(f"No {name}-Score for {year}")
+    st.dataframe(summary.round(3), use_container_width=True)
+
+@st.fragment
+@timed('section.benford')
+def render_benford(panel, company, ledger_path, ledger_column, ledger_sign):
+    """Benford chart for the company's statement values or a general ledger extract"""
+    cache = get_analytics_cache()
+    benford_tests = {
+        'first': "First Digit",
+        'second': "Second Digit",
+        'first_two': "First Two Digits",
+        'last_two': "Last Two Digits"
+    }
+    benford_test = st.radio("Digit test", list(benford_tests), format_func=benford_tests.get, horizontal=True)
+    
+    if ledger_path and os.path.exists(ledger_path):
+        histograms = load_ledger_histograms(ledger_path, ledger_column, ledger_sign, os.path.getmtime(ledger_path))
+        digit_stats, digit_summary = benford_statistics(histograms[benford_test], benford_test)
+        digit_stats = digit_stats.xs(0, level='Group')
+        summary = digit_summary.iloc[0]
+        st.caption(f"Source: general ledger extract {os.path.basename(ledger_path)}")
+    else:
+        if ledger_path:
+            st.warning(f"Ledger file not found: {ledger_path}")
+        digit_stats, digit_summary = cache.get('benford', panel, benford_by_group, BENFORD_FIELDS, 'Company', benford_test)
+        digit_stats = digit_stats.xs(company, level='Company')
+        summary = digit_summary.loc[company]
+    fig_benford = get_figure_cache().get(
+        company, f'benford.{benford_test}', panel_fingerprint(digit_stats),
+        benford_chart, digit_stats, summary, benford_tests[benford_test]
     )
-    
-    st.plotly_chart(fig_benford, use_container_width=True)
-    # Financial Ratios
-    st.markdown("<h2>📈 Financial Ratios Analysis</h2>", unsafe_allow_html=True)
-    ratios = calculate_all_ratios(df)
-    analysis_tabs = st.tabs(["📊 Ratios", "📑 Common Size", "📈 Trend"])
+    show_chart(fig_benford, 'benford')
+    st.caption(f"{summary['N']} values tested. Digits with |Z| > 1.96 deviate significantly from Benford's Law.")
+    significant = digit_stats[digit_stats['Z'] > 1.96]
+    if not significant.empty:
+        st.dataframe(significant[['Count', 'Actual', 'Expected', 'Z']].round(3), use_container_width=True)
 
+@st.fragment
+@timed('section.ratio_analysis')
+def render_ratio_analysis(panel, company):
+    """Ratio charts, common-size and trend tables; only the open tab is built"""
+    cache = get_analytics_cache()
+    analysis_tabs = st.tabs(["📊 Ratios", "📑 Common Size", "📈 Trend"], key="analysis_tab", on_change="rerun")
 
     # ======================
-# RATIOS TAB
-# ======================
+    # RATIOS TAB
+    # ======================
     with analysis_tabs[0]:
-        tab1, tab2, tab3, tab4 = st.tabs(["📊 Profitability", "💧 Liquidity", "⚖️ Leverage", "⚡ Efficiency"])
-        with tab1:
-            fig_prof = go.Figure()
-            fig_prof.add_trace(go.Scatter(x=ratios['Year'], y=ratios['Gross_Margin'],
-                                      mode='lines+markers+text', name='Gross Margin %',
-                                      line=dict(color='#10b981', width=3)))
-            fig_prof.add_trace(go.Scatter(x=ratios['Year'], y=ratios['Net_Profit_Margin'],
-                                      mode='lines+markers+text', name='Net Profit Margin %',
-                                      line=dict(color='#3b82f6', width=3)))
-            fig_prof.add_trace(go.Scatter(x=ratios['Year'], y=ratios['ROA'],
-                                      mode='lines+markers+text', name='ROA %',
-                                      line=dict(color='#f59e0b', width=3)))
-            fig_prof.add_hline(y=5, line_dash="dot", line_color="orange",
-                           annotation_text="Low Profit Warning (5%)",
-                           annotation_position="top right")
-            fig_prof.add_hline(y=0, line_dash="dot", line_color="red",
-                           annotation_text="Negative Return Zone",
-                           annotation_position="bottom right")
-
-            fig_prof.update_layout(title="Profitability Ratios",
-            template='plotly_dark', 
-            height=400,
-            paper_bgcolor='rgba(0,0,0,0)',
-            plot_bgcolor='rgba(15,23,42,0.8)',
-            xaxis=dict(type='category')
-                                   )
-        st.plotly_chart(fig_prof, use_container_width=True)
-
-    # -------------------
-    # LIQUIDITY
-    # -------------------
-        with tab2:
-            fig_liq = go.Figure()
-            fig_liq.add_trace(go.Scatter(x=ratios['Year'], y=ratios['Current_Ratio'],
-                                     mode='lines+markers+text', name='Current Ratio',
-                                     line=dict(color='#8b5cf6', width=3)))
-            fig_liq.add_trace(go.Scatter(x=ratios['Year'], y=ratios['Quick_Ratio'],
-                                     mode='lines+markers+text', name='Quick Ratio',
-                                     line=dict(color='#ec4899', width=3)))
-            fig_liq.add_hline(y=1.0, line_dash="dash", line_color="red",
-                          annotation_text="Minimum Safe Level",
-                          annotation_position="top right")
-
-            fig_liq.update_layout(
-            title="Liquidity Ratios", 
-            template='plotly_dark', 
-            height=400,
-            paper_bgcolor='rgba(0,0,0,0)',
-            plot_bgcolor='rgba(15,23,42,0.8)',
-            xaxis=dict(type='category')
-        )
-        st.plotly_chart(fig_liq, use_container_width=True)
-
-    # -------------------
-    # LEVERAGE
-    # -------------------
-        with tab3:
-            fig_lev = go.Figure()
-            fig_lev.add_trace(go.Scatter(x=ratios['Year'], y=ratios['Debt_to_Equity'],
-                                     mode='lines+markers+text', name='Debt to Equity',
-                                     line=dict(color='#ef4444', width=3)))
-            fig_lev.add_trace(go.Scatter(x=ratios['Year'], y=ratios['Debt_Ratio'],
-                                     mode='lines+markers+text', name='Debt Ratio %',
-                                     line=dict(color='#f59e0b', width=3)))
-            fig_lev.add_hline(y=2.0, line_dash="dot", line_color="red",
-                          annotation_text="High Leverage Threshold (2.0)",
-                          annotation_position="top right")
-
-            fig_lev.update_layout(
-            title="Leverage Ratios", 
-            template='plotly_dark', 
-            height=400,
-            paper_bgcolor='rgba(0,0,0,0)',
-            plot_bgcolor='rgba(15,23,42,0.8)',
-            xaxis=dict(type='category')
-            )
-        st.plotly_chart(fig_lev, use_container_width=True)
-
-    # -------------------
-    # EFFICIENCY
-    # -------------------
-        with tab4:
-            fig_eff = go.Figure()
-            fig_eff.add_trace(go.Scatter(x=ratios['Year'], y=ratios['Asset_Turnover'],
-                                     mode='lines+markers+text', name='Asset Turnover',
-                                     line=dict(color='#06b6d4', width=3)))
-            # Receivables Turnover
-            fig_eff.add_trace(go.Scatter(x=ratios['Year'],y=ratios['Receivables_Turnover'],
-                                         mode='lines+markers+text',name='Receivables Turnover',
-                                         line=dict(color='#22c55e', width=3)))
-# Days Sales Outstanding
-            fig_eff.add_trace(go.Scatter(x=ratios['Year'],y=ratios['Days_Sales_Outstanding'],
-                                         mode='lines+markers+text',name='DSO (Days)',
-                                         line=dict(color='#f59e0b', width=3)))
-
-            fig_eff.update_layout(
-            title="Efficiency Ratios", 
-            template='plotly_dark', 
-            height=400,
-            paper_bgcolor='rgba(0,0,0,0)',
-            plot_bgcolor='rgba(15,23,42,0.8)',
-            xaxis=dict(type='category')
-            )
-        st.plotly_chart(fig_eff, use_container_width=True)
-# ======================
-# COMMON SIZE TAB
-# ======================
+        if analysis_tabs[0].open:
+            ratios = cache.get('ratios', panel, calculate_all_ratios).xs(company, level='Company')
+            tab1, tab2, tab3, tab4 = st.tabs(["📊 Profitability", "💧 Liquidity", "⚖️ Leverage", "⚡ Efficiency"],
+                                             key="ratio_tab", on_change="rerun")
+            fingerprint = panel_fingerprint(ratios)
+            figure_cache = get_figure_cache()
+            for tab, chart in zip([tab1, tab2, tab3, tab4], RATIO_CHARTS):
+                with tab:
+                    if tab.open:
+                        fig = figure_cache.get(company, chart, fingerprint, ratio_chart, ratios, chart)
+                        show_chart(fig, chart)
+
+    # ======================
+    # COMMON SIZE TAB
+    # ======================
     with analysis_tabs[1]:
-         cs = calculate_common_size(df)
-         st.write(cs)
-# ======================
-# TREND TAB
-# ======================
+        if analysis_tabs[1].open:
+            cs = cache.get('common_size', panel, calculate_common_size).xs(company, level='Company')
+            st.write(cs)
+
+    # ======================
+    # TREND TAB
+    # ======================
     with analysis_tabs[2]:
-        trend = calculate_trend(df)
-        st.write(trend)
+        if analysis_tabs[2].open:
+            trend = cache.get('trend', panel, calculate_trend).xs(company, level='Company')
+            st.write(trend)
+            if trend.isna().to_numpy().any():
+                st.caption("Blank indices have no positive base-year value (e.g. a loss in the first year)")
 
-    # Red Flags
-    st.markdown("<h2>🚩 Red Flags Detected</h2>", unsafe_allow_html=True)
+@st.fragment
+@timed('section.comparison')
+def render_comparison(company, industry):
+    """One metric's trajectories across the universe, with the selected company highlighted"""
+    metrics, industries = load_universe_metrics(DATA_PATH, METADATA_PATH)
+    col1, col2 = st.columns(2)
+    with col1:
+        metric = st.selectbox("Metric", list(OVERLAY_METRICS),
+                              format_func=lambda name: OVERLAY_METRICS[name]['title'], key="overlay_metric")
+    with col2:
+        scope = st.radio("Companies", [f"{industry} peers", "All companies"], horizontal=True, key="overlay_scope")
+    values = metrics[metric]
+    if scope != "All companies":
+        peers = industries.index[industries == industry]
+        values = values[values.index.get_level_values('Company').isin(peers)]
+    n_companies = values.index.get_level_values('Company').nunique()
+    if n_companies > OVERLAY_MAX_SERIES:
+        st.caption(f"More than {OVERLAY_MAX_SERIES} companies: showing the peer median and inter-quartile range")
+    fingerprint = (DATA_PATH, METADATA_PATH, scope)
+    fig = get_figure_cache().get(company, f'overlay.{metric}', fingerprint, overlay_chart, values, metric, company)
+    show_chart(fig, 'overlay')
+
+@st.fragment
+@timed('section.similarity')
+def render_similarity():
+    """Issuers whose multi-year trajectory resembles a built-in fraud case's"""
+    cases, case_info = load_company_data()
+    case = st.selectbox("Fraud case", case_info.index.tolist(), key="similar_case")
+    years = company_years(cases, case)
+    year = st.selectbox("Trajectory ending in", years, index=len(years) - 1, key=f"similar_year_{case}")
+    k = st.slider("Matches", 5, 50, DEFAULT_K, step=5, key="similar_k")
+    latest = st.toggle("Latest year of each issuer only", value=True, key="similar_latest")
+    matches = load_trajectory_index(DATA_PATH).query(cached_trajectory_features(cases), case, year, k, latest)
+    st.caption(f"Closest {case} {year} trajectories (ratios, Z, M and Beneish indices over three years); "
+               "distance in inter-quartile-range units")
+    st.dataframe(matches.round(3), use_container_width=True)
+
+# =======================
+# MAIN APP
+# =======================
+
+def render_debug_panel():
+    """Phase timings and analytics cache hit rates for this server process"""
+    with st.sidebar.expander("🐞 Performance", expanded=True):
+        phases = METRICS.phases()
+        st.dataframe(phases[['Calls', 'Mean_ms', 'p50_ms', 'p95_ms', 'Rows']].round(2), use_container_width=True)
+        cache = METRICS.cache()
+        if len(cache):
+            st.dataframe(cache.round(3), use_container_width=True)
+        if st.button("Reset timings"):
+            METRICS.reset()
+
+@st.cache_resource
+def process_startup():
+    """Import time of this server process's first script run, recorded once as startup.* timings"""
+    return {'started': _script_started, 'imports': _imports_done - _script_started, 'recorded': False}
+
+def main():
+    page_started = time.perf_counter()
+    startup = process_startup()
+    # Title
+    st.markdown("<h1>🔍 Financial Statement & Fraud Analysis Dashboard</h1>", unsafe_allow_html=True)
+    st.markdown("<p style='text-align: center; color: #94a3b8; font-size: 1.2rem;'>Advanced Analytics for Corporate Fraud Detection</p>", unsafe_allow_html=True)
     
-    year_data = df[df['Year'] == selected_year].iloc[0]
-    year_ratios = ratios[ratios['Year'] == selected_year].iloc[0]
+    # Load data
+    with METRICS.time('phase.load_data'):
+        if DATA_PATH:
+            companies = load_company_list(DATA_PATH, METADATA_PATH)
+        else:
+            panel, companies = load_universe()
     
-    red_flags = []
+    # Sidebar
+    st.sidebar.title("⚙️ Control Panel")
     
-    if year_ratios['Net_Profit_Margin'] < 5:
-        red_flags.append("📉 Low Net Profit Margin")
-    if year_ratios['Current_Ratio'] < 1.0:
-        red_flags.append("💧 Liquidity Crisis")
-    if year_ratios['Debt_to_Equity'] > 2.0:
-        red_flags.append("⚖️ High Leverage")
-    if z_score < 1.81:
-        red_flags.append("⚠️ Bankruptcy Risk")
-    if year_data['Total_Equity'] < 0:
-        red_flags.append("🚨 Negative Equity")
+    company = st.sidebar.selectbox(
+        "Select Company",
+        companies.index.tolist(),
+        format_func=lambda x: f"🏢 {x}"
+    )
     
-    if red_flags:
-        for flag in red_flags:
-            st.error(flag)
-    else:
-        st.success("✅ No major red flags detected for this period.")
+    if DATA_PATH:
+        with METRICS.time('phase.load_company_rows'):
+            panel = load_company_rows(DATA_PATH, company)
+    
+    with st.sidebar.expander("📒 General Ledger Benford Test"):
+        ledger_path = st.text_input("Ledger extract (CSV/Parquet path)").strip()
+        ledger_column = st.text_input("Amount column", value="Amount")
+        ledger_sign = st.selectbox("Entries", ['positive', 'negative', 'absolute'])
+    
+    with st.sidebar.expander("🧭 Similar to a fraud case"):
+        if st.toggle("Search universe"):
+            render_similarity()
+    
+    with st.sidebar.expander("💾 Memory Budget"):
+        if st.toggle("Measure tables"):
+            render_memory_budget(panel)
+    
+    # Company Info Banner
+    render_company_banner(company, companies.loc[company])
+    
+    # Fraud Detection Scores
+    st.markdown("<h2>🔍 Fraud Detection Models</h2>", unsafe_allow_html=True)
+    variants = load_altman_assignments(panel_fingerprint(panel), panel, companies)
+    render_scores(panel, company, company_industries(companies).loc[company], variants)
+    
+    # Benford's Law
+    st.markdown("<h2>📊 Benford's Law Analysis</h2>", unsafe_allow_html=True)
+    render_benford(panel, company, ledger_path, ledger_column, ledger_sign)
+    
+    # Financial Ratios
+    st.markdown("<h2>📈 Financial Ratios Analysis</h2>", unsafe_allow_html=True)
+    render_ratio_analysis(panel, company)
+    
+    # Cross-company comparison
+    st.markdown("<h2>🌐 Cross-Company Comparison</h2>", unsafe_allow_html=True)
+    render_comparison(company, company_industries(companies).loc[company])
     
     # Footer
     st.markdown("---")
     st.markdown("<p style='text-align: center; color: #94a3b8;'>Financial Fraud Analysis Dashboard</p>", unsafe_allow_html=True)
+    
+    METRICS.record('page', time.perf_counter() - page_started, len(panel))
+    if not startup['recorded']:
+        # From the first line of the script on its first run: module imports and the first full page
+        startup['recorded'] = True
+        METRICS.record('startup.imports', startup['imports'])
+        METRICS.record('startup.first_render', time.perf_counter() - startup['started'], len(panel))
+    if DEBUG:
+        render_debug_panel()
+    if METRICS_PATH:
+        METRICS.export(METRICS_PATH)
 
 if __name__ == '__main__':
     main()
@@ -0,0 +1,70 @@
+"""
+Synthetic company-year panels for benchmarks and load tests.
+
+Generates statistically plausible fundamentals with the same schema as
+``fraud_data`` (Company, Year and FIELDS). Each company gets its own
+scale, margin structure, balance-sheet mix and growth path; line items are
+derived from each other so that ratios and scores land in realistic
+ranges, including loss-making, highly levered and inventory-free firms.
+"""
+
+import numpy as np
+import pandas as pd
+
+from fraud_data import FIELDS, PANEL_INDEX
+
+def synthetic_panel(n_rows, years_per_company=10, first_year=2000, seed=0):
+    """Panel of ``n_rows`` company-years in the fraud_data layout
+
+    Companies are named C0000001, C0000002, ...; the last company may have
+    fewer years so the panel has exactly ``n_rows`` rows.
+    """
+    rng = np.random.default_rng(seed)
+    n_companies = int(np.ceil(n_rows / years_per_company))
+    shape = (n_companies, years_per_company)
+
+    def company_level(low, high):
+        return rng.uniform(low, high, (n_companies, 1))
+
+    def yearly(level, noise):
+        return level * rng.lognormal(0, noise, shape)
+
+    # Revenue follows a per-company random walk in growth
+    growth = rng.normal(company_level(-0.02, 0.12), 0.08, shape)
+    revenue = rng.lognormal(20, 2, (n_companies, 1)) * np.cumprod(1 + growth, axis=1)
+
+    cogs = revenue * np.clip(yearly(company_level(0.35, 0.85), 0.05), 0.05, 1.2)
+    sga = revenue * yearly(company_level(0.04, 0.25), 0.08)
+    total_assets = revenue / yearly(company_level(0.3, 2.0), 0.05)
+    fixed_assets = total_assets * yearly(company_level(0.05, 0.55), 0.05)
+    current_assets = total_assets * yearly(company_level(0.2, 0.4), 0.05)
+    depreciation = fixed_assets * yearly(company_level(0.04, 0.15), 0.1)
+    ebit = revenue - cogs - sga - depreciation
+
+    total_debt = total_assets * yearly(company_level(0.1, 0.75), 0.05)
+    current_liabilities = total_assets * yearly(company_level(0.1, 0.35), 0.08)
+    total_equity = total_assets - total_debt - current_liabilities * 0.5
+    net_income = (ebit - total_debt * 0.06) * 0.75
+
+    receivables = revenue * yearly(company_level(20, 90), 0.15) / 365
+    # Roughly one company in ten (services, financials) holds no inventory
+    holds_inventory = rng.random((n_companies, 1)) > 0.1
+    inventory = cogs * yearly(company_level(15, 120), 0.15) / 365 * holds_inventory
+    retained_earnings = total_equity * yearly(company_level(0.1, 0.9), 0.1)
+    market_cap = np.abs(total_equity) * yearly(company_level(0.5, 3.0), 0.25)
+    cfo = net_income + depreciation + revenue * rng.normal(0, 0.04, shape)
+
+    columns = {
+        'Revenue': revenue, 'COGS': cogs, 'SGA': sga, 'EBIT': ebit, 'Net_Income': net_income,
+        'Total_Assets': total_assets, 'Current_Assets': current_assets, 'Fixed_Assets': fixed_assets,
+        'Current_Liabilities': current_liabilities, 'Total_Debt': total_debt, 'Total_Equity': total_equity,
+        'Receivables': receivables, 'Inventory': inventory, 'Retained_Earnings': retained_earnings,
+        'Market_Cap': market_cap, 'Depreciation': depreciation, 'CFO': cfo
+    }
+    width = len(str(n_companies))
+    companies = np.array([f"C{i:0{max(width, 7)}d}" for i in range(1, n_companies + 1)])
+    index = pd.MultiIndex.from_arrays([
+        np.repeat(companies, years_per_company)[:n_rows],
+        np.tile(np.arange(first_year, first_year + years_per_company), n_companies)[:n_rows]
+    ], names=PANEL_INDEX)
+    return pd.DataFrame({field: columns[field].ravel()[:n_rows] for field in FIELDS}, index=index)
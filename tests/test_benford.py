@@ -0,0 +1,26 @@
+"""Leading-digit extraction near powers of ten"""
+
+import numpy as np
+import pytest
+
+from benford import _leading_two, digit_bins
+
+@pytest.mark.parametrize('digits', range(1, 16))
+def test_whole_amounts_just_below_a_power_of_ten(digits):
+    value = 10.0 ** digits - 1
+    assert _leading_two(np.array([value]))[0] == (90 if digits == 1 else 99)
+    assert digit_bins([value], 'first')[0] == 8
+
+@pytest.mark.parametrize('exponent', range(-6, 19))
+def test_powers_of_ten(exponent):
+    assert _leading_two(np.array([10.0 ** exponent]))[0] == 10
+
+def test_floating_point_noise_is_absorbed():
+    # 0.3 / 0.1 * 10 is 29.999999999999996
+    assert _leading_two(np.array([0.3 / 0.1 * 10, np.nextafter(1000.0, 0)])).tolist() == [30, 10]
+
+def test_matches_decimal_digits():
+    values = np.random.default_rng(0).lognormal(10, 4, 20_000)
+    values = np.concatenate([values, np.floor(values[values >= 1])])
+    expected = [int(f"{value:.17e}"[0] + f"{value:.17e}"[2]) for value in values]
+    assert _leading_two(values).tolist() == expected
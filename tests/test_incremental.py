@@ -0,0 +1,77 @@
+"""Incremental recomputation against a full recompute of the same panel"""
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from incremental import ANALYTICS, IncrementalAnalytics
+from synthetic_data import synthetic_panel
+
+def nan_led_panel():
+    """Synthetic panel whose first company reports no Revenue in its first two years and no EBIT in its first"""
+    panel = synthetic_panel(40, years_per_company=10)
+    company = panel.index.get_level_values('Company')[0]
+    panel.loc[[(company, 2000), (company, 2001)], 'Revenue'] = np.nan
+    panel.loc[(company, 2000), 'EBIT'] = np.nan
+    return panel, company
+
+def assert_matches_full(analytics):
+    for name, (compute, _) in ANALYTICS.items():
+        expected = compute(analytics.panel)
+        actual = analytics.tables[name]
+        if isinstance(expected, pd.Series):
+            pd.testing.assert_series_equal(actual, expected, check_names=False)
+        else:
+            pd.testing.assert_frame_equal(actual, expected)
+
+def restated(panel, key, **values):
+    rows = panel.loc[[key]].copy()
+    for field, value in values.items():
+        rows[field] = value
+    return rows
+
+@pytest.mark.parametrize('year, values', [
+    (2005, {'Revenue': 1234.5}),        # after every base row
+    (2002, {'Revenue': 999.0}),         # the Revenue base row
+    (2002, {'Revenue': np.nan}),        # base restated away: the base moves later
+    (2001, {'Revenue': 500.0}),         # back-filled before the base: it becomes the base
+    (2000, {'EBIT': 42.0}),
+])
+def test_restatement_of_nan_led_series(year, values):
+    panel, company = nan_led_panel()
+    analytics = IncrementalAnalytics(panel)
+    analytics.apply(restated(panel, (company, year), **values))
+    assert_matches_full(analytics)
+
+def test_trend_base_is_first_reported_value():
+    panel, company = nan_led_panel()
+    analytics = IncrementalAnalytics(panel)
+    analytics.apply(restated(panel, (company, 2005), Revenue=panel.loc[(company, 2005), 'Revenue'] * 1.5))
+    trend = analytics.tables['trend'].xs(company, level='Company')['Revenue_Index']
+    assert np.isnan(trend.loc[2000]) and trend.loc[2002] == pytest.approx(100.0)
+    assert analytics.recomputed['trend'] == 1
+
+def test_new_year_and_new_company():
+    panel, company = nan_led_panel()
+    analytics = IncrementalAnalytics(panel)
+    filings = pd.concat([
+        restated(panel, (company, 2009)).rename(index={2009: 2010}, level='Year'),
+        restated(panel, (company, 2003)).rename(index={company: 'ZZ New'}, level='Company'),
+    ])
+    analytics.apply(filings)
+    assert_matches_full(analytics)
+
+@pytest.mark.parametrize('name, shift', [
+    ('C0000001x', 0),       # same years as its neighbours, one of them new to the panel
+    ('C0000002 New', -3),   # starts before the next company's first year
+])
+def test_new_company_between_existing_ones(name, shift):
+    panel, company = nan_led_panel()
+    analytics = IncrementalAnalytics(panel)
+    history = panel.xs(company, level='Company', drop_level=False).iloc[2:]
+    filings = history.rename(index={company: name}, level='Company')
+    filings = filings.rename(index=lambda year: year + shift if year < 2009 else 2011, level='Year')
+    analytics.apply(filings)
+    assert analytics.panel.index.is_monotonic_increasing
+    pd.testing.assert_frame_equal(analytics.panel, pd.concat([panel, filings]).sort_index())
+    assert_matches_full(analytics)
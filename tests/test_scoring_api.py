@@ -0,0 +1,53 @@
+"""Error handling of the scoring API's HTTP layer"""
+
+import http.client
+import json
+import threading
+
+import pytest
+
+from fraud_data import load_builtin_universe
+from scoring_api import MAX_BODY_BYTES, ScoringIndex, ScoringServer
+
+@pytest.fixture(scope='module')
+def server():
+    panel, metadata = load_builtin_universe()
+    server = ScoringServer(('127.0.0.1', 0), ScoringIndex(panel, metadata))
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+def post(server, headers, body=b''):
+    connection = http.client.HTTPConnection(*server.server_address, timeout=5)
+    connection.putrequest('POST', '/batch')
+    for name, value in headers.items():
+        connection.putheader(name, value)
+    connection.endheaders(body)
+    response = connection.getresponse()
+    return response.status, json.loads(response.read())
+
+@pytest.mark.parametrize('length, status', [
+    ('abc', 400), ('-5', 400), ('1.5', 400), (str(MAX_BODY_BYTES + 1), 413),
+])
+def test_bad_content_length_is_a_json_error(server, length, status):
+    code, body = post(server, {'Content-Length': length})
+    assert code == status and 'error' in body
+
+def test_missing_content_length(server):
+    code, body = post(server, {})
+    assert code == 411 and 'error' in body
+
+def test_batch(server):
+    request = json.dumps({'queries': [{'company': 'Xerox', 'year': 1999}]}).encode()
+    code, body = post(server, {'Content-Length': str(len(request))}, request)
+    assert code == 200 and body['results'][0]['year'] == 1999
+
+def test_unexpected_error_is_a_500(server, monkeypatch):
+    def broken(*args):
+        raise RuntimeError("boom")
+    monkeypatch.setattr('scoring_api.score_batch', broken)
+    request = b'{"queries": []}'
+    code, body = post(server, {'Content-Length': str(len(request))}, request)
+    assert code == 500 and body == {'error': "internal server error"}
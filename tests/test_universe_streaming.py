@@ -0,0 +1,30 @@
+"""Peer and similarity indexes streamed from a file against the whole panel read at once"""
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from fraud_data import iter_company_panels, read_fundamentals, write_fundamentals
+from peers import peer_metrics, universe_peer_metrics
+from similarity import trajectory_features, universe_trajectory_features
+from synthetic_data import synthetic_panel
+
+@pytest.fixture(params=['universe.parquet', 'universe.csv'])
+def universe(request, tmp_path):
+    path = str(tmp_path / request.param)
+    write_fundamentals(synthetic_panel(300, years_per_company=10), path)
+    return path
+
+def test_panels_hold_whole_companies(universe):
+    panels = list(iter_company_panels(universe, chunk_companies=7))
+    companies = [panel.index.get_level_values('Company').unique() for panel in panels]
+    assert all(len(names) <= 7 for names in companies)
+    assert len(set().union(*companies)) == sum(len(names) for names in companies)
+    pd.testing.assert_frame_equal(pd.concat(panels), read_fundamentals(universe))
+
+def test_streamed_metrics_match_full_read(universe):
+    panel = read_fundamentals(universe)
+    pd.testing.assert_frame_equal(universe_peer_metrics(universe, chunk_companies=7), peer_metrics(panel))
+    # Summation order differs with the batch's alignment, so M_Score may move by an ulp
+    np.testing.assert_allclose(universe_trajectory_features(universe, chunk_companies=7).to_numpy(),
+                               trajectory_features(panel).to_numpy(), rtol=1e-12)
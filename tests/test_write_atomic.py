@@ -0,0 +1,44 @@
+"""Atomic file replacement with the umask's permissions"""
+
+import os
+import stat
+import threading
+
+import pytest
+
+from fraud_data import write_atomic
+
+@pytest.fixture
+def umask_027():
+    previous = os.umask(0o027)
+    yield
+    os.umask(previous)
+
+def test_new_file_gets_umask_mode(tmp_path, umask_027):
+    path = tmp_path / 'metrics.prom'
+    write_atomic(path, 'up 1\n')
+    assert path.read_text() == 'up 1\n'
+    assert stat.S_IMODE(path.stat().st_mode) == 0o640
+    assert os.listdir(tmp_path) == ['metrics.prom']
+
+def test_replaces_existing_file(tmp_path):
+    path = tmp_path / 'index.html'
+    path.write_text('old')
+    write_atomic(str(path), 'new')
+    assert path.read_text() == 'new'
+
+def test_concurrent_writers_leave_one_complete_file(tmp_path):
+    path = tmp_path / 'report.html'
+    texts = [str(n) * 10_000 for n in range(8)]
+    threads = [threading.Thread(target=write_atomic, args=(path, text)) for text in texts]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert path.read_text() in texts
+    assert os.listdir(tmp_path) == ['report.html']
+
+def test_failed_write_removes_temporary_file(tmp_path):
+    with pytest.raises(TypeError):
+        write_atomic(tmp_path / 'metrics.prom', None)
+    assert os.listdir(tmp_path) == []